@@ -0,0 +1,93 @@
+# Trajectory prediction for the aim preview (no Kivy imports)
+import math
+from collections import OrderedDict
+
+from world import GRAVITY, STEP, Projectile, Bombshell
+
+# Define the prediction settings
+PREVIEW_SECONDS = 1  # Seconds of flight shown by the preview
+PREVIEW_DOTS = 15  # Number of dots drawn along the predicted path
+ANGLE_STEP = 0.5  # Angle quantum in degrees, aims closer than this share a prediction
+FORCE_STEP = 4  # Launch speed quantum in pixels per second
+CANNON_STEP = 2  # Cannon position quantum in pixels
+CACHE_SIZE = 512  # Maximum number of predictions kept
+
+# Define the trajectory predictor class
+class TrajectoryPredictor:  # Define TrajectoryPredictor class, memoized forward simulation of the first second of a shot
+    weapons = {'projectile': Projectile, 'bombshell': Bombshell}  # Map predictable weapons to their body
+
+    def __init__(self, world, seconds=PREVIEW_SECONDS, dots=PREVIEW_DOTS, cache_size=CACHE_SIZE):  # Initialize TrajectoryPredictor
+        self.world = world  # Set simulation world
+        self.steps = round(seconds / STEP)  # Set number of simulated steps
+        self.dots = dots  # Set number of points returned
+        self.cache_size = cache_size  # Set maximum number of predictions kept
+        self.cache = OrderedDict()  # Map quantized shots to predicted points, least recently used first
+        self.field_key = None  # Initialize gravitonios the cached predictions were made for
+        self.hits = 0  # Initialize number of predictions served from the cache
+        self.misses = 0  # Initialize number of predictions simulated
+
+    def key(self, x, y, weapon):  # Define key method
+        angle, velocity_x, velocity_y = self.world.shot_velocity(x, y, self.world.weapon_force(weapon))  # Calculate launch as the world would
+        return (weapon, round(math.degrees(angle) / ANGLE_STEP), round(math.hypot(velocity_x, velocity_y) / FORCE_STEP),
+                round(self.world.cannon_x / CANNON_STEP))  # Return quantized shot
+
+    def predict(self, x, y, weapon=None):  # Define predict method
+        weapon = weapon or self.world.shooting_mode  # Default to the selected weapon
+        if weapon not in self.weapons:  # Check if weapon flies in a straight line
+            return []  # Return no preview
+        gravity = self.world.gravity  # Get gravity field
+        gravity.sync(self.world.gravitonios)  # Rebuild gravity field if gravitonios changed
+        if self.field_key != gravity.key:  # Check if gravitonios changed since the cache was filled
+            self.cache.clear()  # Drop predictions made for other gravitonios
+            self.field_key = gravity.key  # Remember gravitonios
+        key = self.key(x, y, weapon)  # Get quantized shot
+        points = self.cache.get(key)  # Look up prediction
+        if points is not None:  # Check if shot was already predicted
+            self.cache.move_to_end(key)  # Mark prediction as recently used
+            self.hits += 1  # Count hit
+            return points  # Return cached points
+        points = self.simulate(*key)  # Simulate shot
+        self.cache[key] = points  # Store prediction
+        if len(self.cache) > self.cache_size:  # Check if cache is full
+            self.cache.popitem(last=False)  # Evict least recently used prediction
+        self.misses += 1  # Count miss
+        return points  # Return points
+
+    def simulate(self, weapon, angle_step, force_step, cannon_step):  # Define simulate method
+        world = self.world  # Get simulation world
+        body = self.weapons[weapon]  # Get body class of the weapon
+        angle = math.radians(angle_step * ANGLE_STEP)  # Restore angle
+        force = force_step * FORCE_STEP  # Restore launch speed
+        cannon_x = cannon_step * CANNON_STEP + world.cannon_width / 2  # Restore cannon center x position
+        cannon_y = world.cannon_y + world.cannon_height / 2  # Get cannon center y position
+        x = cannon_x + 100 * math.cos(angle)  # Start at the barrel end
+        y = cannon_y + 100 * math.sin(angle)  # Start at the barrel end
+        velocity_x = force * math.cos(angle)  # Calculate launch velocity_x
+        velocity_y = force * math.sin(angle)  # Calculate launch velocity_y
+        every = max(self.steps // self.dots, 1)  # Calculate steps between dots
+        points = []  # Initialize predicted centres
+        for step in range(1, self.steps + 1):  # Iterate over simulation steps, in the order the world applies them
+            if weapon == 'projectile':  # Check if shot is a projectile
+                velocity_y += GRAVITY * STEP  # Apply gravity
+                x += velocity_x * STEP  # Move
+                y += velocity_y * STEP  # Move
+                pull_x, pull_y = world.gravity.sample((x,), (y,))  # Sample gravitonio pull
+                velocity_x += pull_x[0]  # Apply pull
+                velocity_y += pull_y[0]  # Apply pull
+            else:  # If shot is a bombshell
+                pull_x, pull_y = world.gravity.sample((x,), (y,))  # Sample gravitonio pull
+                velocity_x += pull_x[0]  # Apply pull
+                velocity_y += pull_y[0]  # Apply pull
+                x += velocity_x * STEP  # Move
+                y += velocity_y * STEP  # Move
+                velocity_y += GRAVITY * STEP  # Apply gravity
+            if y - body.height / 2 <= 0 or x < 0 or x > world.width:  # Check if shot left the playfield
+                break  # Stop prediction
+            if step % every == 0:  # Check if a dot falls on this step
+                points.append((float(x), float(y)))  # Add dot
+        return points  # Return predicted centres
+
+    def stats(self):  # Define stats method
+        lookups = self.hits + self.misses  # Count lookups
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 1.0,
+                'cached': len(self.cache)}  # Return cache statistics
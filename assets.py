@@ -0,0 +1,155 @@
+# Texture atlas and asset preloading for the Kivy view
+import functools
+import logging
+import time
+from collections import deque
+
+from kivy.clock import Clock
+from kivy.core.image import Image as CoreImage
+from kivy.graphics.texture import Texture
+
+# Set up logging
+logger = logging.getLogger(__name__)  # Create logger instance
+
+# Define the assets and the atlas settings
+SPRITES = ("obstacle.png", "projectile.png", "bombshell.png", "explosion.png", "obstacle piece.png", "elastonio.png",
+           "gravitonio.png", "wormhole.png", "perpetio.png", "cannon anticorpo.png")  # Sprites drawn during every level
+ATLAS_SIZE = 2048  # Side of an atlas page in pixels
+ATLAS_PADDING = 2  # Empty pixels between packed sprites, stops filtering from bleeding neighbours in
+PRELOAD_BUDGET = 0.008  # Seconds of loading per frame, keeps the splash screen animating
+
+# Define the helper listing the per-level assets
+def level_assets(levels):  # Define level_assets function
+    sprites = [f"target_{level}.png" for level in range(1, levels + 1)]  # Add target sprites
+    backgrounds = [f"level_{level}_bg.png" for level in range(1, levels + 1)]  # Add backgrounds
+    return sprites, backgrounds  # Return sprites to pack and backgrounds to load whole
+
+# Define the shelf packer
+def pack_shelves(sizes, page_size=ATLAS_SIZE, padding=ATLAS_PADDING):  # Define pack_shelves function
+    placements = {}  # Map sprites to their (page, x, y) position
+    page, x, y, shelf_height = 0, 0, 0, 0  # Start on the first shelf of the first page
+    for source in sorted(sizes, key=lambda source: sizes[source][1], reverse=True):  # Iterate over sprites, tallest first so shelves fill evenly
+        width, height = sizes[source][0] + padding, sizes[source][1] + padding  # Get padded size
+        if width > page_size or height > page_size:  # Check if sprite cannot fit in a page
+            continue  # Leave sprite in its own texture
+        if x + width > page_size:  # Check if shelf is full
+            x, y, shelf_height = 0, y + shelf_height, 0  # Open next shelf
+        if y + height > page_size:  # Check if page is full
+            page, x, y, shelf_height = page + 1, 0, 0, 0  # Open next page
+        placements[source] = (page, x, y)  # Place sprite
+        x += width  # Move along shelf
+        shelf_height = max(shelf_height, height)  # Grow shelf to the tallest sprite
+    return placements  # Return placements
+
+# Define the asset manager class
+class AssetManager:  # Define AssetManager class, loads every texture once and hands out shared atlas regions
+    def __init__(self, page_size=ATLAS_SIZE, budget=PRELOAD_BUDGET):  # Initialize AssetManager
+        self.page_size = page_size  # Set side of an atlas page
+        self.budget = budget  # Set seconds of loading per frame
+        self.textures = {}  # Map sources to their texture or atlas region, None if missing
+        self.decoded = {}  # Map sprites waiting for the atlas to their size and pixels
+        self.pages = []  # Initialize atlas page textures
+        self.queue = deque()  # Initialize preload work
+        self.event = None  # Initialize scheduled preload step
+        self.on_done = None  # Initialize callback run when preloading finishes
+        self.preloaded = False  # Initialize whether the preload finished
+        self.load_times = {}  # Map sources to their load time in seconds
+        self.hits = 0  # Initialize number of lookups served from the cache
+        self.misses = 0  # Initialize number of lookups that had to load
+        self.late_loads = []  # Initialize sources loaded after the preload, each one a hitch
+
+    def preload(self, sprites, backgrounds=(), on_done=None):  # Define preload method
+        self.queue.extend(('sprite', source) for source in sprites if source not in self.textures)  # Queue sprite decoding
+        self.queue.append(('atlas', None))  # Queue atlas packing
+        self.queue.extend(('texture', source) for source in backgrounds if source not in self.textures)  # Queue backgrounds, too large for a page
+        self.on_done = on_done  # Set callback
+        self.preloaded = False  # Mark preload as running
+        if self.event is None:  # Check if no step is scheduled
+            self.event = Clock.schedule_interval(self.step, 0)  # Load a slice every frame
+
+    def step(self, dt):  # Define step method
+        start = time.perf_counter()  # Start timer
+        while self.queue and time.perf_counter() - start < self.budget:  # Work until the frame budget is spent
+            kind, source = self.queue.popleft()  # Get next work item
+            if kind == 'sprite':  # Check if item is a sprite
+                self.decode(source)  # Decode sprite
+            elif kind == 'atlas':  # Check if item packs the atlas
+                self.build_atlas()  # Pack decoded sprites
+            else:  # If item is a whole texture
+                self.textures[source] = self.load(source)  # Load texture
+        if self.queue:  # Check if work remains
+            return True  # Keep stepping
+        self.event = None  # Forget step
+        self.preloaded = True  # Mark preload as finished
+        logger.info(f"Preloaded {len(self.textures)} textures on {len(self.pages)} atlas pages in "
+                    f"{sum(self.load_times.values()) * 1000:.0f} ms")  # Log summary
+        if self.on_done is not None:  # Check if a callback is set
+            self.on_done()  # Run callback
+        return False  # Stop stepping
+
+    def finish(self):  # Define finish method
+        if self.event is None:  # Check if no preload is running
+            return  # Return
+        self.event.cancel()  # Cancel scheduled step
+        budget, self.budget = self.budget, float('inf')  # Lift the frame budget
+        self.step(0)  # Run remaining work at once
+        self.budget = budget  # Restore the frame budget
+
+    def load(self, source):  # Define load method
+        start = time.perf_counter()  # Start timer
+        try:  # Try to load image
+            texture = CoreImage(source).texture  # Upload image as its own texture
+        except Exception as e:  # Handle missing or unreadable image
+            logger.warning(f"Could not load {source}: {e}")  # Log warning
+            texture = None  # Draw untextured
+        self.load_times[source] = time.perf_counter() - start  # Record load time
+        return texture  # Return texture
+
+    def decode(self, source):  # Define decode method
+        texture = self.load(source)  # Load image
+        if texture is None:  # Check if image is missing
+            self.textures[source] = None  # Remember missing image so it is not retried
+            return  # Return
+        start = time.perf_counter()  # Start timer
+        self.decoded[source] = (texture.size, texture.pixels)  # Read back upright RGBA pixels
+        self.textures[source] = texture  # Use standalone texture until the atlas is packed
+        self.load_times[source] += time.perf_counter() - start  # Record read back time
+
+    def build_atlas(self):  # Define build_atlas method
+        start = time.perf_counter()  # Start timer
+        placements = pack_shelves({source: size for source, (size, pixels) in self.decoded.items()}, self.page_size)  # Pack sprites
+        first_page = len(self.pages)  # Get index of the first new page
+        for source, (page, x, y) in placements.items():  # Iterate over packed sprites
+            while first_page + page >= len(self.pages):  # Check if page does not exist yet
+                self.pages.append(Texture.create(size=(self.page_size, self.page_size), colorfmt='rgba'))  # Create page
+            atlas = self.pages[first_page + page]  # Get page
+            size, pixels = self.decoded[source]  # Get sprite pixels
+            atlas.blit_buffer(pixels, size=size, colorfmt='rgba', bufferfmt='ubyte', pos=(x, y))  # Copy sprite into page
+            self.textures[source] = atlas.get_region(x, y, *size)  # Share region of the page
+        self.decoded.clear()  # Free pixels
+        logger.debug(f"Packed {len(placements)} sprites in {(time.perf_counter() - start) * 1000:.1f} ms")  # Log packing
+
+    def texture(self, source):  # Define texture method
+        if source in self.textures:  # Check if texture is loaded
+            self.hits += 1  # Count hit
+            return self.textures[source]  # Return shared texture
+        self.misses += 1  # Count miss
+        late = self.preloaded  # Check if the preload already finished
+        self.finish()  # Finish a running preload at once, it may hold this texture
+        if source not in self.textures:  # Check if texture was not preloaded
+            if late:  # Check if this load happens during play
+                self.late_loads.append(source)  # Record hitch
+                logger.warning(f"Texture {source} was not preloaded")  # Log warning
+            self.textures[source] = self.load(source)  # Load and cache texture
+        return self.textures[source]  # Return texture
+
+    def stats(self):  # Define stats method
+        lookups = self.hits + self.misses  # Count lookups
+        return {'textures': len(self.textures), 'pages': len(self.pages), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 1.0, 'late_loads': list(self.late_loads),
+                'load_ms': sum(self.load_times.values()) * 1000, 'preloaded': self.preloaded}  # Return cache statistics
+
+# Define the shared asset manager
+@functools.lru_cache(maxsize=None)
+def default_assets():  # Define default_assets function
+    return AssetManager()  # Create the asset manager once per process
@@ -0,0 +1,166 @@
+# Background music loading, caching and crossfading for the Kivy view
+import functools
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+from kivy.clock import Clock
+from kivy.core.audio import SoundLoader
+
+# Set up logging
+logger = logging.getLogger(__name__)  # Create logger instance
+
+# Define the audio settings
+MEMORY_CAP = 128 * 1024 * 1024  # Bytes of decoded audio kept in the cache
+BYTES_PER_SECOND = 44100 * 4  # Decoded size of a second of 16-bit stereo audio
+FADE_SECONDS = 1.0  # Length of a crossfade
+FADE_INTERVAL = 1 / 30  # Seconds between volume updates during a fade
+
+# Define the audio service class
+class AudioService:  # Define AudioService class, decodes tracks on a worker thread and crossfades between them
+    def __init__(self, memory_cap=MEMORY_CAP, fade=FADE_SECONDS):  # Initialize AudioService
+        self.memory_cap = memory_cap  # Set bytes of decoded audio kept
+        self.fade = fade  # Set default crossfade length
+        self.cache = OrderedDict()  # Map sources to (sound, bytes), least recently used first
+        self.memory = 0  # Initialize bytes of decoded audio cached
+        self.pending = set()  # Initialize sources queued on the worker
+        self.requests = queue.Queue()  # Initialize sources for the worker to load
+        self.current = None  # Initialize source of the track playing
+        self.wanted = None  # Initialize source to play as soon as the worker loaded it
+        self.wanted_fade = fade  # Initialize fade-in of the deferred track
+        self.fades = {}  # Map sounds to their [start volume, end volume, duration, elapsed]
+        self.fade_event = None  # Initialize scheduled fade step
+        self.hits = 0  # Initialize number of plays served from the cache
+        self.misses = 0  # Initialize number of plays that waited for the worker
+        self.load_times = {}  # Map sources to their load time in seconds, spent on the worker
+        self.worker = threading.Thread(target=self.work, name='audio-loader', daemon=True)  # Create worker thread
+        self.worker.start()  # Start worker thread
+
+    def work(self):  # Define work method, runs on the worker thread
+        while True:  # Serve requests until the process exits
+            source = self.requests.get()  # Wait for next source
+            start = time.perf_counter()  # Start timer
+            try:  # Try to load and decode track
+                sound = SoundLoader.load(source)  # Load track
+            except Exception as e:  # Handle unreadable track
+                logger.warning(f"Could not load {source}: {e}")  # Log warning
+                sound = None  # Play nothing
+            elapsed = time.perf_counter() - start  # Calculate load time
+            Clock.schedule_once(lambda dt, source=source, sound=sound, elapsed=elapsed: self.adopt(source, sound, elapsed))  # Hand track over to the main thread
+
+    def adopt(self, source, sound, elapsed):  # Define adopt method
+        self.pending.discard(source)  # Mark source as loaded
+        self.load_times[source] = elapsed  # Record load time
+        size = self.estimate(source, sound)  # Estimate decoded size
+        self.cache[source] = (sound, size)  # Cache track
+        self.memory += size  # Count decoded size
+        self.evict()  # Stay under the memory cap
+        logger.debug(f"Loaded {source} in {elapsed * 1000:.0f} ms on the worker")  # Log load
+        if self.wanted == source:  # Check if track was asked for while loading
+            self.wanted = None  # Forget request
+            self.start(source, self.wanted_fade)  # Start track
+
+    def estimate(self, source, sound):  # Define estimate method
+        if sound is None:  # Check if track is missing
+            return 0  # Return no memory
+        if sound.length > 0:  # Check if backend reports the track length
+            return int(sound.length * BYTES_PER_SECOND)  # Return decoded size
+        return os.path.getsize(source) if os.path.exists(source) else 0  # Return file size as a lower bound
+
+    def evict(self):  # Define evict method
+        for source in list(self.cache):  # Iterate over tracks, least recently used first
+            if self.memory <= self.memory_cap:  # Check if cache fits
+                break  # Stop evicting
+            sound, size = self.cache[source]  # Get track
+            if source == self.current or sound in self.fades:  # Check if track is audible
+                continue  # Keep track
+            del self.cache[source]  # Drop track
+            self.memory -= size  # Release decoded size
+            if sound is not None:  # Check if track was loaded
+                sound.unload()  # Free decoded audio
+            logger.debug(f"Evicted {source} from the audio cache")  # Log eviction
+
+    def prefetch(self, source):  # Define prefetch method
+        if source in self.cache or source in self.pending:  # Check if track is loaded or loading
+            return  # Return
+        self.pending.add(source)  # Mark source as loading
+        self.requests.put(source)  # Queue source on the worker
+
+    def play(self, source, fade=None):  # Define play method
+        fade = self.fade if fade is None else fade  # Default to the service crossfade
+        if source == self.current:  # Check if track is already playing
+            return  # Return
+        if source not in self.cache:  # Check if track is not loaded yet
+            self.misses += 1  # Count miss
+            self.wanted = source  # Play track once loaded instead of stalling the frame
+            self.wanted_fade = fade  # Remember fade-in
+            self.prefetch(source)  # Load track
+            self.fade_out(fade)  # Fade out the old track meanwhile
+            return  # Return
+        self.hits += 1  # Count hit
+        self.wanted = None  # Drop any deferred track
+        self.start(source, fade)  # Start track
+
+    def start(self, source, fade):  # Define start method
+        self.cache.move_to_end(source)  # Mark track as recently used
+        self.fade_out(fade)  # Fade out the old track
+        sound = self.cache[source][0]  # Get track
+        self.current = source  # Set track playing
+        if sound is None:  # Check if track is missing
+            return  # Return
+        sound.loop = True  # Loop music
+        sound.volume = 0 if fade > 0 else 1  # Start silent when fading in
+        sound.play()  # Play track
+        self.fade_to(sound, 1, fade)  # Fade track in
+
+    def stop(self, fade=None):  # Define stop method
+        self.wanted = None  # Drop deferred track
+        self.fade_out(self.fade if fade is None else fade)  # Fade out the track playing
+
+    def fade_out(self, fade):  # Define fade_out method
+        if self.current is None:  # Check if nothing is playing
+            return  # Return
+        sound = self.cache[self.current][0] if self.current in self.cache else None  # Get track playing
+        self.current = None  # Forget track playing
+        if sound is not None:  # Check if track was loaded
+            self.fade_to(sound, 0, fade)  # Fade track out
+
+    def fade_to(self, sound, volume, duration):  # Define fade_to method
+        if duration <= 0:  # Check if change is immediate
+            self.fades.pop(sound, None)  # Cancel running fade
+            sound.volume = volume  # Set volume
+            if volume == 0:  # Check if track is silent
+                sound.stop()  # Stop track
+            return  # Return
+        self.fades[sound] = [sound.volume, volume, duration, 0.0]  # Start fade from the current volume
+        if self.fade_event is None:  # Check if no fade step is scheduled
+            self.fade_event = Clock.schedule_interval(self.fade_step, FADE_INTERVAL)  # Schedule fade steps
+
+    def fade_step(self, dt):  # Define fade_step method
+        for sound, fade in list(self.fades.items()):  # Iterate over fading tracks
+            start, end, duration, elapsed = fade  # Unpack fade
+            fade[3] = elapsed = min(elapsed + dt, duration)  # Advance fade
+            sound.volume = start + (end - start) * elapsed / duration  # Set interpolated volume
+            if elapsed >= duration:  # Check if fade finished
+                del self.fades[sound]  # Forget fade
+                if end == 0:  # Check if track faded out
+                    sound.stop()  # Stop track
+        if self.fades:  # Check if fades remain
+            return True  # Keep stepping
+        self.fade_event = None  # Forget fade step
+        self.evict()  # Drop tracks kept only while audible
+        return False  # Stop stepping
+
+    def stats(self):  # Define stats method
+        plays = self.hits + self.misses  # Count plays
+        return {'cached': len(self.cache), 'memory_mb': self.memory / (1024 * 1024), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / plays if plays else 1.0, 'pending': len(self.pending),
+                'load_ms': {source: elapsed * 1000 for source, elapsed in self.load_times.items()}}  # Return cache statistics
+
+# Define the shared audio service
+@functools.lru_cache(maxsize=None)
+def default_audio():  # Define default_audio function
+    return AudioService()  # Create the audio service once per process
@@ -0,0 +1,292 @@
+# Headless batch simulator for balance statistics (no Kivy imports)
+# Run with: python batch.py --games 100000 --policy predictor --output balance.results
+import argparse
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import struct
+import time
+
+import numpy as np
+
+from aim import TrajectoryPredictor
+from levels import DEFAULT_PACK, LevelPack, align
+from solver import AimSolver
+from world import World, STEP
+
+# Set up logging
+logger = logging.getLogger(__name__)  # Create logger instance
+
+# Define the simulation settings
+WEAPONS = ('projectile', 'laser', 'bombshell', 'beam')  # Weapons in column order
+MAX_SECONDS = 120  # Simulated seconds after which a game counts as stalled
+GAME_OVER_DELAY = 3  # Seconds the view keeps simulating after the last shot before returning to the menu
+FIRE_INTERVAL = 0.5  # Seconds between policy shots, the longest weapon cooldown so no shot is wasted
+CHUNK_SIZE = 64  # Maximum games per worker task, each result message then carries a few kilobytes
+DEFEAT, VICTORY, STALLED = range(3)  # Game outcomes
+OUTCOMES = ('defeat', 'victory', 'stalled')  # Outcome names by code
+
+# Define the results file layout, one preallocated column per statistic
+MAGIC = b'CGBR'  # Identify results files
+VERSION = 1  # Results format version
+PREAMBLE = struct.Struct('<4sII')  # Magic, version and header size
+COLUMNS = [('seed', '<i8'), ('done', '|u1'), ('outcome', '|u1'), ('level', '<i2'), ('shots', '<i4')]  # Game columns
+COLUMNS += [(f'fired_{weapon}', '<i4') for weapon in WEAPONS] + [(f'hits_{weapon}', '<i4') for weapon in WEAPONS]  # Add per-weapon columns
+COLUMNS += [('seconds', '<f4'), ('clear_time', '<f4'), ('score', '<i4'), ('final_score', '<i4')]  # Add timing and scores
+
+# POLICIES
+
+# Define the random policy
+class RandomPolicy:  # Define RandomPolicy class, fires a random weapon at a random point of the right half
+    def __init__(self, world, rng):  # Initialize RandomPolicy
+        self.world = world  # Set simulation world
+        self.rng = rng  # Set policy random generator, separate from the world's so policies do not change levels
+
+    def choose(self):  # Define choose method
+        x = self.rng.uniform(self.world.width / 2, self.world.width)  # Pick x position
+        y = self.rng.uniform(0, self.world.height)  # Pick y position
+        return self.rng.choice(WEAPONS), x, y  # Return weapon and aim point
+
+# Define the sniper policy
+class SniperPolicy:  # Define SniperPolicy class, fires straight weapons at the target's current position
+    def __init__(self, world, rng):  # Initialize SniperPolicy
+        self.world = world  # Set simulation world
+        self.rng = rng  # Set policy random generator
+
+    def choose(self):  # Define choose method
+        x, y = self.world.target.center  # Aim at the target
+        return self.rng.choice(('laser', 'beam')), x, y  # Return weapon and aim point
+
+# Define the predictor policy
+class PredictorPolicy:  # Define PredictorPolicy class, picks the ballistic shot whose preview passes closest to the target
+    def __init__(self, world, rng, columns=12, rows=8):  # Initialize PredictorPolicy
+        self.world = world  # Set simulation world
+        self.rng = rng  # Set policy random generator
+        self.columns = columns  # Set number of aim points across
+        self.rows = rows  # Set number of aim points up
+        self.predictor = TrajectoryPredictor(world, cache_size=2 * columns * rows)  # Create predictor holding the whole grid
+
+    def choose(self):  # Define choose method
+        world = self.world  # Get simulation world
+        target_x, target_y = world.target.center  # Get target centre
+        best, choice = math.inf, None  # Initialize closest pass and its shot
+        for weapon in ('projectile', 'bombshell'):  # Iterate over ballistic weapons
+            for i in range(self.columns):  # Iterate over aim columns
+                for j in range(self.rows):  # Iterate over aim rows
+                    x = world.width * (0.5 + 0.5 * (i + 0.5) / self.columns)  # Calculate aim x position
+                    y = world.height * (j + 0.5) / self.rows  # Calculate aim y position
+                    for px, py in self.predictor.predict(x, y, weapon):  # Iterate over predicted centres
+                        distance = math.hypot(px - target_x, py - target_y)  # Calculate distance to the target
+                        if distance < best:  # Check if shot passes closer
+                            best, choice = distance, (weapon, x, y)  # Remember shot
+        if choice is None:  # Check if no shot reaches the playfield
+            return 'projectile', target_x, target_y  # Return direct shot
+        return choice  # Return closest shot
+
+# Define the solver policy
+class SolverPolicy:  # Define SolverPolicy class, fires the fastest hit of the vectorized auto-aim solver
+    def __init__(self, world, rng):  # Initialize SolverPolicy
+        self.world = world  # Set simulation world
+        self.rng = rng  # Set policy random generator
+        self.solver = AimSolver(world)  # Create solver
+
+    def choose(self):  # Define choose method
+        shots = self.solver.solve(budget=None, count=1, delay=0)  # Simulate every candidate for a shot fired now
+        if not shots:  # Check if no weapon can be solved
+            return 'projectile', *self.world.target.center  # Return direct shot
+        return shots[0]['weapon'], *shots[0]['aim']  # Return fastest hit, or the closest miss
+
+# Define the policy registry
+POLICIES = {'random': RandomPolicy, 'sniper': SniperPolicy, 'predictor': PredictorPolicy, 'solver': SolverPolicy}  # Map policy names to classes
+
+# GAMES
+
+# Define the helper that plays one game
+def play(seed, policy='random', width=800, height=600, pack=None, limit=MAX_SECONDS, interval=FIRE_INTERVAL):  # Define play function
+    world = World(width=width, height=height, seed=seed, pack=pack)  # Create world as the game does
+    world.create_level()  # Create the first level
+    shooter = POLICIES[policy](world, random.Random(seed ^ 0x5EED))  # Create policy
+    fired = dict.fromkeys(WEAPONS, 0)  # Initialize shots by weapon
+    hits = dict.fromkeys(WEAPONS, 0)  # Initialize target hits by weapon
+    outcome, stop_step = STALLED, round(limit / STEP)  # Initialize outcome and last step to run
+    every = max(round(interval / STEP), 1)  # Calculate steps between shots
+    step, out_of_shots = 0, False  # Initialize steps run and whether the last shot was fired
+    while step < stop_step:  # Run steps until the game ends
+        if not out_of_shots and step % every == 0 and world.target is not None:  # Check if a shot is due
+            weapon, x, y = shooter.choose()  # Ask policy for a shot
+            world.shooting_mode = weapon  # Select weapon
+            world.aim(x, y)  # Aim cannon
+            world.fire(x, y)  # Fire
+            fired[weapon] += 1  # Count shot
+        world.step(STEP)  # Advance simulation by one fixed step
+        step += 1  # Count step
+        for name, value in world.drain_events():  # Iterate over world events
+            if name == 'target_hit':  # Check if the target was hit
+                hits[value] += 1  # Count hit
+            elif name == 'victory':  # Check if the last level was cleared
+                outcome, stop_step = VICTORY, step  # Stop at once
+            elif name == 'out_of_shots' and not out_of_shots:  # Check if the last shot was fired
+                out_of_shots = True  # Stop firing
+                outcome, stop_step = DEFEAT, min(stop_step, step + round(GAME_OVER_DELAY / STEP))  # Let shots in flight land, like the view does
+    return {'seed': seed, 'outcome': outcome, 'level': world.level, 'shots': sum(fired.values()),
+            **{f'fired_{weapon}': count for weapon, count in fired.items()}, **{f'hits_{weapon}': count for weapon, count in hits.items()},
+            'seconds': world.time, 'clear_time': world.time if outcome == VICTORY else math.nan, 'score': world.score,
+            'final_score': world.calculate_score()}  # Return game statistics
+
+# WORKERS
+
+# Define the per-process state
+worker_pack = None  # Level pack of this worker process
+worker_options = {}  # Game options of this worker process
+
+# Define the helper that applies command line overrides to a pack
+def override_pack(pack, tuning=None, counts=None):  # Define override_pack function
+    for level in pack.levels:  # Iterate over level descriptions
+        level.setdefault('tuning', {}).update(tuning or {})  # Override tuning constants
+        level.setdefault('counts', {}).update(counts or {})  # Override hazard counts
+    if counts:  # Check if layouts change
+        pack.baked = None  # Generate levels, the compiled layouts hold the old counts
+    return pack  # Return pack
+
+# Define the worker initializer
+def init_worker(pack_path, tuning, counts, options):  # Define init_worker function
+    global worker_pack, worker_options  # Set per-process state
+    logging.disable(logging.CRITICAL)  # Silence the per-level debug logging, it dominates a headless game
+    worker_pack = override_pack(LevelPack.load(pack_path), tuning, counts)  # Load pack once per process
+    worker_options = options  # Set game options
+
+# Define the worker task
+def play_chunk(chunk):  # Define play_chunk function
+    indices, seeds = chunk  # Unpack row indices and game seeds
+    rows = [play(seed, pack=worker_pack, **worker_options) for seed in seeds]  # Play games
+    return indices, {name: np.array([row[name] for row in rows], dtype=dtype) for name, dtype in COLUMNS if name != 'done'}  # Return columns
+
+# RESULTS
+
+# Define the results file class
+class ResultsFile:  # Define ResultsFile class, preallocated columns filled in as chunks finish
+    def __init__(self, path, mode='r'):  # Initialize ResultsFile
+        with open(path, 'rb') as file:  # Open results file
+            magic, version, header_size = PREAMBLE.unpack(file.read(PREAMBLE.size))  # Read preamble
+            if magic != MAGIC or version != VERSION:  # Check format
+                raise ValueError(f'{path} is not a version {VERSION} results file')  # Raise error
+            self.header = json.loads(file.read(header_size))  # Read header
+        self.path = path  # Set path
+        data_start = align(PREAMBLE.size + header_size)  # Get start of the data section
+        games = self.header['games']  # Get number of rows
+        self.columns = {name: np.memmap(path, dtype=dtype, mode=mode, offset=data_start + offset, shape=(games,))
+                        for name, (offset, dtype) in self.header['columns'].items()}  # Map columns
+
+    @classmethod
+    def create(cls, path, games, **meta):  # Define create method
+        columns, offset = {}, 0  # Initialize column locations
+        for name, dtype in COLUMNS:  # Iterate over columns
+            columns[name] = [offset, dtype]  # Record column location
+            offset = align(offset + games * np.dtype(dtype).itemsize)  # Move to next aligned offset
+        header = json.dumps({'games': games, 'columns': columns, **meta}).encode()  # Encode header
+        data_start = align(PREAMBLE.size + len(header))  # Calculate start of the data section
+        with open(path, 'wb') as file:  # Create file
+            file.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))  # Write preamble
+            file.write(header)  # Write header
+            file.truncate(data_start + offset)  # Preallocate zeroed columns
+        return cls(path, mode='r+')  # Return writable results
+
+    def write(self, indices, columns):  # Define write method
+        for name, values in columns.items():  # Iterate over columns
+            self.columns[name][indices] = values  # Store values
+        self.columns['done'][indices] = 1  # Mark rows as played, last so a crash never marks a partial row
+
+    def pending(self):  # Define pending method
+        return np.flatnonzero(self.columns['done'] == 0)  # Return rows still to play
+
+    def flush(self):  # Define flush method
+        for column in self.columns.values():  # Iterate over columns
+            column.flush()  # Write dirty pages back
+
+    def table(self):  # Define table method
+        done = self.columns['done'] == 1  # Get played rows
+        return {name: np.asarray(column[done]) for name, column in self.columns.items() if name != 'done'}  # Return played rows
+
+# Define the results reader
+def load_results(path):  # Define load_results function
+    results = ResultsFile(path)  # Map results file
+    return results.header, results.table()  # Return run description and played rows
+
+# Define the helper that summarises a results table
+def summarize(table):  # Define summarize function
+    games = len(table['seed'])  # Count games
+    if games == 0:  # Check if nothing was played
+        return 'No games played'  # Return summary
+    lines = [f"{games} games: " + ', '.join(f"{name} {np.mean(table['outcome'] == code):.1%}" for code, name in enumerate(OUTCOMES))]  # Add outcomes
+    cleared = table['clear_time'][~np.isnan(table['clear_time'])]  # Get clear times of won games
+    if len(cleared):  # Check if any game was won
+        lines.append(f"clear time: median {np.median(cleared):.1f} s, p90 {np.percentile(cleared, 90):.1f} s")  # Add clear times
+    lines.append(f"shots: mean {table['shots'].mean():.1f}, score: mean {table['score'].mean():.0f}, "
+                 f"final score: mean {table['final_score'].mean():.0f}")  # Add shots and scores
+    for weapon in WEAPONS:  # Iterate over weapons
+        fired = table[f'fired_{weapon}'].sum()  # Count shots
+        if fired:  # Check if weapon was used
+            lines.append(f"{weapon:>10}: {fired} shots, {table[f'hits_{weapon}'].sum() / fired:.2f} hits per shot")  # Add hit rate
+    return '\n'.join(lines)  # Return summary
+
+# MAIN
+
+# Define the helper that parses key=value options
+def parse_overrides(pairs):  # Define parse_overrides function
+    overrides = {}  # Initialize overrides
+    for pair in pairs or ():  # Iterate over pairs
+        name, value = pair.split('=', 1)  # Split pair
+        overrides[name] = json.loads(value)  # Parse number
+    return overrides  # Return overrides
+
+# Define the command line entry point
+def main():  # Define main function
+    parser = argparse.ArgumentParser(description="Play many headless games with a scripted shooter and record balance statistics")  # Create argument parser
+    parser.add_argument('--games', type=int, default=10000)  # Set number of games
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='predictor')  # Set shooter policy
+    parser.add_argument('--processes', type=int, default=os.cpu_count())  # Set number of worker processes
+    parser.add_argument('--seed', type=int, default=0)  # Set seed of the first game
+    parser.add_argument('--pack', default=DEFAULT_PACK)  # Set level pack
+    parser.add_argument('--tune', action='append', metavar='NAME=VALUE', help="override a tuning constant on every level, e.g. shots=20")  # Set tuning overrides
+    parser.add_argument('--count', action='append', metavar='KIND=N', help="override a hazard count on every level, e.g. obstacles=6")  # Set hazard count overrides
+    parser.add_argument('--size', default='800x600')  # Set window size
+    parser.add_argument('--output', default='balance.results')  # Set results path
+    parser.add_argument('--resume', action='store_true', help="play only the games an interrupted run did not finish")  # Set resume
+    args = parser.parse_args()  # Parse arguments
+
+    width, height = (int(value) for value in args.size.split('x'))  # Parse window size
+    tuning, counts = parse_overrides(args.tune), parse_overrides(args.count)  # Parse overrides
+    options = {'policy': args.policy, 'width': width, 'height': height}  # Collect game options
+    if args.resume and os.path.exists(args.output):  # Check if an interrupted run continues
+        results = ResultsFile(args.output, mode='r+')  # Map results
+        header = results.header  # Get run description
+        options = {'policy': header['policy'], 'width': header['width'], 'height': header['height']}  # Use the recorded options
+        tuning, counts = header['tuning'], header['counts']  # Use the recorded overrides
+    else:  # If a new run starts
+        results = ResultsFile.create(args.output, args.games, seed=args.seed, pack=args.pack, tuning=tuning, counts=counts, **options)  # Create results
+        header = results.header  # Get run description
+    pending = results.pending()  # Get rows to play
+    tasks = max(-(-len(pending) // CHUNK_SIZE), args.processes * 4, 1)  # Count tasks, at least a few per process so they finish together
+    chunks = [(indices, (indices + header['seed']).tolist()) for indices in np.array_split(pending, tasks) if len(indices)]  # Split rows into tasks
+
+    start, played, last_flush = time.perf_counter(), 0, time.perf_counter()  # Start timer
+    with multiprocessing.Pool(args.processes, initializer=init_worker, initargs=(header['pack'], tuning, counts, options)) as pool:  # Start workers
+        for indices, columns in pool.imap_unordered(play_chunk, chunks):  # Iterate over finished tasks
+            results.write(indices, columns)  # Store games
+            played += len(indices)  # Count games
+            if time.perf_counter() - last_flush > 10:  # Check if results were not saved for a while
+                results.flush()  # Save progress, an interrupted run resumes from here
+                last_flush = time.perf_counter()  # Restart flush timer
+                elapsed = last_flush - start  # Calculate elapsed time
+                print(f"{played}/{len(pending)} games, {played / elapsed:.0f} games/s", flush=True)  # Print progress
+    results.flush()  # Save results
+    elapsed = time.perf_counter() - start  # Calculate run time
+    print(f"Played {played} games in {elapsed:.1f} s ({played / elapsed if elapsed else 0:.0f} games/s) on {args.processes} processes")  # Print throughput
+    print(summarize(results.table()))  # Print summary
+
+# Run the batch simulator
+if __name__ == "__main__":  # Check if script is run directly
+    main()  # Run main
@@ -0,0 +1,316 @@
+# Benchmarks for the headless simulation core
+# Run with: python benchmark.py collisions
+# Guard hot paths with: python benchmark.py suite --save, then python benchmark.py suite --check after a change
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import logging
+
+from world import World, Obstacle, MirrorBulletproof, Elastonio, Perpetio, Bombshell, Target, Wormhole, STEP
+from spatial import PointGrid, place
+from scores import ScoreStore
+from levels import LevelPack
+
+# Define the suite settings
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')  # Path of the saved suite results
+THRESHOLD = 0.25  # Slowdown over the baseline that counts as a regression
+
+# COLLISIONS
+
+# Define the helper that fills a world with hazards of every kind
+def populate_hazards(world, count, rng):  # Define populate_hazards function
+    kinds = [  # Define hazard factories and the lists they belong to
+        (world.obstacles, lambda x, y: Obstacle(x, y, rng.randint(5, 20), rng.uniform(1, 3))),
+        (world.mirrors, lambda x, y: MirrorBulletproof(x, y, rng.randint(0, 360))),
+        (world.elastonios, lambda x, y: Elastonio(x, y)),
+        (world.perpetios, lambda x, y: Perpetio(x, y)),
+    ]
+    for i in range(count):  # Iterate over hazards to create
+        entities, factory = kinds[i % len(kinds)]  # Pick hazard kind
+        hazard = factory(rng.uniform(0, world.width), rng.uniform(0, world.height))  # Create hazard
+        entities.append(hazard)  # Add hazard to its list
+        world.hazards.insert(hazard)  # Add hazard to broadphase
+
+# Define the helper that fills a world with shots of every kind
+def populate_shots(world, shots, rng):  # Define populate_shots function
+    for _ in range(shots):  # Iterate over projectiles to create
+        world.projectiles.spawn(rng.uniform(0, world.width), rng.uniform(0, world.height), rng.uniform(-300, 300), rng.uniform(-100, 300))  # Add projectile
+    for _ in range(shots // 10):  # Iterate over bombshells and lasers to create
+        world.bombshells.append(world.pools['bombshell'].acquire(rng.uniform(0, world.width), rng.uniform(0, world.height), rng.uniform(-200, 200), rng.uniform(0, 200)))  # Add bombshell through its pool, as shoot_bombshell does
+        world.lasers.append(world.pools['laser'].acquire(rng.uniform(0, world.width), rng.uniform(0, world.height), rng.uniform(0, 360)))  # Add laser through its pool, clear_level releases it there
+
+# Define the collision benchmark
+def bench_collisions(args):  # Define bench_collisions function
+    print(f"{'hazards':>8} {'shots/step':>11} {'step ms':>9} {'query us':>9} {'scan us':>9}")  # Print header
+    for count in args.hazards:  # Iterate over hazard counts
+        rng = random.Random(args.seed)  # Create benchmark random generator
+        world = World(width=1920, height=1080, seed=args.seed)  # Create world
+        populate_hazards(world, count, rng)  # Add hazards
+        populate_shots(world, args.shots, rng)  # Add shots
+        shots = len(world.projectiles) + len(world.bombshells) + len(world.lasers)  # Count shots
+
+        start = time.perf_counter()  # Start timer
+        for _ in range(args.steps):  # Iterate over steps
+            world.time += 1 / 60  # Advance simulation time
+            world.update_projectiles(1 / 60)  # Update projectiles
+            world.update_bombshells(1 / 60)  # Update bombshells
+            world.update_lasers(1 / 60)  # Update lasers
+            world.update_obstacles(1 / 60)  # Update obstacles
+        step_ms = (time.perf_counter() - start) / args.steps * 1000  # Calculate time per step
+
+        probes = [Bombshell(rng.uniform(0, world.width), rng.uniform(0, world.height)) for _ in range(1000)]  # Create probe bodies
+        hazards = world.obstacles + world.mirrors + world.elastonios + world.perpetios  # Collect hazards
+        start = time.perf_counter()  # Start timer
+        for probe in probes:  # Iterate over probes
+            [hazard for hazard in world.hazards.near(probe) if hazard.collide(probe)]  # Query broadphase and test candidates
+        query_us = (time.perf_counter() - start) / len(probes) * 1e6  # Calculate time per broadphase query
+        start = time.perf_counter()  # Start timer
+        for probe in probes:  # Iterate over probes
+            [hazard for hazard in hazards if hazard.collide(probe)]  # Test every hazard
+        scan_us = (time.perf_counter() - start) / len(probes) * 1e6  # Calculate time per linear scan
+
+        print(f"{count:>8} {shots:>11} {step_ms:>9.3f} {query_us:>9.2f} {scan_us:>9.2f}")  # Print results
+
+# PLACEMENT
+
+# Define the placement benchmark
+def bench_placement(args):  # Define bench_placement function
+    logging.disable(logging.WARNING)  # Silence "no room left" warnings while filling windows on purpose
+    print(f"{'window':>10} {'spacing':>8} {'wanted':>7} {'placed':>7} {'ms':>8} {'level ms':>9}")  # Print header
+    for window in args.windows:  # Iterate over window sizes
+        width, height = (int(value) for value in window.split('x'))  # Parse window size
+        for spacing in args.spacing:  # Iterate over minimum distances, smaller means denser levels
+            rng = random.Random(args.seed)  # Create benchmark random generator
+            grid = PointGrid()  # Create occupancy index
+            bounds = (0, width, 0, height)  # Use the whole window
+            start = time.perf_counter()  # Start timer
+            placed = 0  # Initialize number of placed entities
+            for _ in range(args.count):  # Iterate over entities to place
+                position = place(rng, bounds, spacing, grid)  # Find free position
+                if position is not None:  # Check if entity fits
+                    grid.add(*position)  # Reserve position
+                    placed += 1  # Count placed entity
+            place_ms = (time.perf_counter() - start) * 1000  # Calculate placement time
+
+            start = time.perf_counter()  # Start timer
+            for level in (1, 2):  # Iterate over levels
+                world = World(width=width, height=height, seed=args.seed)  # Create world
+                world.level = level  # Set level
+                world.create_level()  # Create level
+            level_ms = (time.perf_counter() - start) / 2 * 1000  # Calculate time per level
+            print(f"{window:>10} {spacing:>8} {args.count:>7} {placed:>7} {place_ms:>8.2f} {level_ms:>9.2f}")  # Print results
+    logging.disable(logging.NOTSET)  # Restore logging
+
+# SCORES
+
+# Define the score store benchmark
+def bench_scores(args):  # Define bench_scores function
+    logging.disable(logging.WARNING)  # Silence store logging
+    rng = random.Random(args.seed)  # Create benchmark random generator
+    with tempfile.TemporaryDirectory() as directory:  # Use a scratch directory
+        path = os.path.join(directory, 'hall_of_fame.json')  # Get snapshot path
+        log_path = os.path.join(directory, 'hall_of_fame.log')  # Get log path
+        store = ScoreStore(path, log_path)  # Open empty store
+        start = time.perf_counter()  # Start timer
+        for i in range(args.count):  # Iterate over submissions
+            store.submit(f'player {i}', rng.randint(0, 1000000))  # Submit score
+        submit_us = (time.perf_counter() - start) / args.count * 1e6  # Calculate time per submission on the calling thread
+        store.flush()  # Wait until every score is on disk
+        durable_s = time.perf_counter() - start  # Calculate time until every score is durable
+        start = time.perf_counter()  # Start timer
+        for _ in range(1000):  # Iterate over reads
+            store.top()  # Read best scores
+        top_us = (time.perf_counter() - start) / 1000 * 1e6  # Calculate time per read
+        pages = store.pages()  # Get number of leaderboard pages
+        start = time.perf_counter()  # Start timer
+        for i in range(1000):  # Iterate over lookups
+            store.page(rng.randrange(pages))  # Read random page
+            store.rank(rng.randint(0, 1000000))  # Rank random score
+        page_us = (time.perf_counter() - start) / 1000 * 1e6  # Calculate time per page and rank lookup
+        store.close()  # Close store
+        log_mb = os.path.getsize(log_path) / (1024 * 1024)  # Get log size
+        start = time.perf_counter()  # Start timer
+        store = ScoreStore(path, log_path)  # Reopen store from its snapshot
+        open_ms = (time.perf_counter() - start) * 1000  # Calculate start up time
+        store.board_ready.wait()  # Wait for the leaderboard
+        index_s = time.perf_counter() - start  # Calculate time until every logged score is ranked
+        store.close()  # Close store
+    print(f"{'scores':>9} {'submit us':>10} {'durable s':>10} {'top us':>8} {'page us':>8} {'open ms':>8} {'index s':>8} {'log MB':>7}")  # Print header
+    print(f"{args.count:>9} {submit_us:>10.2f} {durable_s:>10.2f} {top_us:>8.2f} {page_us:>8.2f} {open_ms:>8.2f} {index_s:>8.2f} {log_mb:>7.1f}")  # Print results
+    logging.disable(logging.NOTSET)  # Restore logging
+
+# SUITE
+
+# Define the helper that builds a world for a micro-benchmark
+def suite_world(rng, hazards=0, counts=None):  # Define suite_world function
+    pack = LevelPack([{'counts': counts}]) if counts else None  # Use a one-level pack when hazard counts are measured
+    world = World(width=1920, height=1080, seed=rng.randrange(1 << 30), pack=pack)  # Create world
+    populate_hazards(world, hazards, rng)  # Add hazards
+    world.build_target_space()  # Build target free space around the hazards
+    return world  # Return world
+
+# Define the helper that runs simulation steps of one system
+def suite_steps(world, update, steps=10):  # Define suite_steps function
+    def run():  # Define run function
+        for _ in range(steps):  # Iterate over steps
+            world.time += STEP  # Advance simulation time
+            update(STEP)  # Update system
+    return run  # Return measured function
+
+# Define the micro-benchmark cases, each builds a fresh world and returns the function to time
+def case_update_projectiles(count, rng):  # Define case_update_projectiles function
+    world = suite_world(rng, hazards=25)  # Create world
+    for _ in range(count):  # Iterate over projectiles to create
+        world.projectiles.spawn(rng.uniform(0, world.width), rng.uniform(0, world.height), rng.uniform(-300, 300), rng.uniform(-100, 300))  # Add projectile
+    return suite_steps(world, world.update_projectiles)  # Return measured steps
+
+def case_update_bombshells(count, rng):  # Define case_update_bombshells function
+    world = suite_world(rng, hazards=25)  # Create world
+    for _ in range(count):  # Iterate over bombshells to create
+        world.bombshells.append(world.pools['bombshell'].acquire(rng.uniform(0, world.width), rng.uniform(0, world.height), rng.uniform(-200, 200), rng.uniform(0, 200)))  # Add bombshell
+    return suite_steps(world, world.update_bombshells)  # Return measured steps
+
+def case_update_lasers(count, rng):  # Define case_update_lasers function
+    world = suite_world(rng, hazards=25)  # Create world
+    for _ in range(count):  # Iterate over lasers to create
+        world.lasers.append(world.pools['laser'].acquire(rng.uniform(0, world.width), rng.uniform(0, world.height), rng.uniform(0, 360)))  # Add laser
+    return suite_steps(world, world.update_lasers)  # Return measured steps
+
+def case_move_target(count, rng):  # Define case_move_target function
+    world = suite_world(rng, hazards=count)  # Create world
+    target = Target(image_source='', world=world)  # Create target
+    return lambda: [target.move_target(STEP, world) for _ in range(600)]  # Return ten seconds of target movement
+
+def case_target_blocked(count, rng):  # Define case_target_blocked function
+    world = suite_world(rng, hazards=count)  # Create world
+    points = [(rng.uniform(world.width * 2 / 3, world.width), rng.uniform(0, world.height)) for _ in range(1000)]  # Pick probe positions
+    return lambda: [world.target_blocked(point) for point in points]  # Return overlap checks of the target, formerly GameWidget.check_overlap
+
+def case_create(kind):  # Define case_create function
+    def case(count, rng):  # Define case function
+        world = suite_world(rng, counts={kind: count})  # Create world asking for count hazards of one kind
+        return getattr(world, f'create_{kind}')  # Return placement function
+    return case  # Return case
+
+def case_clear_level(count, rng):  # Define case_clear_level function
+    world = suite_world(rng, hazards=count)  # Create world
+    populate_shots(world, count, rng)  # Add shots
+    return world.clear_level  # Return measured function
+
+def case_transport(count, rng):  # Define case_transport function
+    world = suite_world(rng)  # Create world
+    world.wormholes = [Wormhole((rng.uniform(0, world.width), rng.uniform(0, world.height)),
+                                (rng.uniform(0, world.width), rng.uniform(0, world.height))) for _ in range(4)]  # Add wormholes
+    populate_shots(world, count, rng)  # Add shots
+    def run():  # Define run function
+        for _ in range(10):  # Iterate over steps
+            world.time += STEP  # Advance simulation time
+            world.projectiles.transport(world.wormholes, world.time)  # Transport projectiles
+            for body in world.bombshells + world.lasers:  # Iterate over bodies
+                for wormhole in world.wormholes:  # Iterate over wormholes
+                    wormhole.transport(body, world.time)  # Transport body
+    return run  # Return measured function
+
+SUITE = {'update_projectiles': case_update_projectiles, 'update_bombshells': case_update_bombshells,
+         'update_lasers': case_update_lasers, 'move_target': case_move_target, 'target_blocked': case_target_blocked,
+         **{f'create_{kind}': case_create(kind) for kind in ('obstacles', 'mirrors', 'elastonios', 'gravitonios', 'perpetios', 'wormholes')},
+         'clear_level': case_clear_level, 'transport': case_transport}  # Map case names to their builders
+
+# Define the helper that times one case
+def time_case(case, count, repeat, seed):  # Define time_case function
+    times = []  # Initialize run times
+    for i in range(repeat):  # Iterate over repeats
+        run = case(count, random.Random(seed + i))  # Build fresh state, untimed
+        start = time.perf_counter()  # Start timer
+        run()  # Run case
+        times.append(time.perf_counter() - start)  # Record run time
+    return min(times), statistics.median(times)  # Return best and median time, the best is the least noisy
+
+# Define the micro-benchmark suite
+def bench_suite(args):  # Define bench_suite function
+    logging.disable(logging.WARNING)  # Silence placement warnings when levels fill up on purpose
+    baseline = {}  # Initialize baseline results
+    if args.check:  # Check if results are compared with a baseline
+        try:  # Try to read baseline
+            with open(args.baseline) as file:  # Open baseline
+                saved = json.load(file)  # Read baseline
+            baseline = dict(saved['results'])  # Get baseline results
+        except (OSError, ValueError, KeyError, TypeError) as e:  # Handle missing or unreadable baseline
+            print(f"error: cannot read baseline {args.baseline} ({e}), run 'python benchmark.py suite --save' first", file=sys.stderr)  # Print error
+            sys.exit(2)  # Fail the run, a check without a baseline compares nothing
+        if saved.get('machine') != platform.node() or saved.get('python') != platform.python_version():  # Check if baseline was measured elsewhere
+            print(f"warning: baseline was saved on {saved.get('machine')} with Python {saved.get('python')}")  # Warn about comparing machines
+    results, regressions = {}, []  # Initialize results and regressions
+    print(f"{'case':>20} {'count':>6} {'best ms':>9} {'median ms':>10} {'base ms':>9} {'change':>8}")  # Print header
+    for name in args.cases or SUITE:  # Iterate over cases
+        for count in args.counts:  # Iterate over entity counts
+            key = f'{name}:{count}'  # Get result key
+            best, median = time_case(SUITE[name], count, args.repeat, args.seed)  # Time case
+            results[key] = best  # Record best time
+            line = f"{name:>20} {count:>6} {best * 1000:>9.3f} {median * 1000:>10.3f}"  # Format result
+            if key in baseline:  # Check if case has a baseline
+                change = best / baseline[key] - 1  # Calculate change
+                line += f" {baseline[key] * 1000:>9.3f} {change:>+8.1%}"  # Add comparison
+                if change > args.threshold:  # Check if case got slower than allowed
+                    regressions.append((key, change))  # Record regression
+                    line += "  REGRESSION"  # Flag result
+            print(line)  # Print result
+    logging.disable(logging.NOTSET)  # Restore logging
+    if args.save:  # Check if results become the new baseline
+        with open(args.baseline, 'w') as file:  # Open baseline
+            json.dump({'machine': platform.node(), 'python': platform.python_version(), 'results': results}, file, indent=1)  # Write baseline
+        print(f"Saved {len(results)} results to {args.baseline}")  # Print confirmation
+    if regressions:  # Check if any case regressed
+        print(f"{len(regressions)} regressions beyond {args.threshold:.0%}: " + ', '.join(f"{key} {change:+.1%}" for key, change in regressions))  # Print regressions
+        sys.exit(1)  # Fail the run
+
+# MAIN
+
+# Define the command line entry point
+def main():  # Define main function
+    parser = argparse.ArgumentParser(description="Benchmarks for the headless simulation core")  # Create argument parser
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)  # Create benchmark selector
+
+    collisions = subparsers.add_parser('collisions', help="cost of shot/hazard collisions as hazard counts grow")  # Add collision benchmark
+    collisions.add_argument('--hazards', type=int, nargs='+', default=[6, 25, 100, 400])  # Set hazard counts
+    collisions.add_argument('--shots', type=int, default=1000)  # Set number of projectiles
+    collisions.add_argument('--steps', type=int, default=120)  # Set number of steps
+    collisions.add_argument('--seed', type=int, default=1)  # Set random seed
+    collisions.set_defaults(run=bench_collisions)  # Set benchmark function
+
+    placement = subparsers.add_parser('placement', help="level generation time as density and window size vary")  # Add placement benchmark
+    placement.add_argument('--windows', nargs='+', default=['800x600', '1280x720', '1920x1080', '3840x2160'])  # Set window sizes
+    placement.add_argument('--spacing', type=int, nargs='+', default=[200, 80, 40])  # Set minimum distances between entities
+    placement.add_argument('--count', type=int, default=500)  # Set number of entities to place
+    placement.add_argument('--seed', type=int, default=1)  # Set random seed
+    placement.set_defaults(run=bench_placement)  # Set benchmark function
+
+    scores = subparsers.add_parser('scores', help="Hall of Fame submission latency, durability, leaderboard lookups and start up time")  # Add score store benchmark
+    scores.add_argument('--count', type=int, default=100000)  # Set number of submissions
+    scores.add_argument('--seed', type=int, default=1)  # Set random seed
+    scores.set_defaults(run=bench_scores)  # Set benchmark function
+
+    suite = subparsers.add_parser('suite', help="micro-benchmarks of the simulation and placement hot paths against a saved baseline")  # Add micro-benchmark suite
+    suite.add_argument('--cases', nargs='+', choices=sorted(SUITE))  # Set cases to run, all by default
+    suite.add_argument('--counts', type=int, nargs='+', default=[10, 100, 1000])  # Set entity counts
+    suite.add_argument('--repeat', type=int, default=7)  # Set number of timed runs per case
+    suite.add_argument('--seed', type=int, default=1)  # Set random seed
+    suite.add_argument('--baseline', default=BASELINE)  # Set baseline path
+    suite.add_argument('--save', action='store_true', help="store these results as the new baseline")  # Set save
+    suite.add_argument('--check', action='store_true', help="exit with an error when a case is slower than the baseline")  # Set check
+    suite.add_argument('--threshold', type=float, default=THRESHOLD)  # Set allowed slowdown
+    suite.set_defaults(run=bench_suite)  # Set benchmark function
+
+    args = parser.parse_args()  # Parse arguments
+    args.run(args)  # Run benchmark
+
+# Run the benchmarks
+if __name__ == "__main__":  # Check if script is run directly
+    main()  # Run main
@@ -0,0 +1,161 @@
+# Allocation and garbage collector diagnostics for the hot loops (no Kivy imports)
+# Run headless with: python diagnostics.py --seconds 60 --policy random
+import argparse
+import functools
+import gc
+import logging
+import os
+import random
+import time
+import tracemalloc
+from collections import Counter
+
+# Set up logging
+logger = logging.getLogger(__name__)  # Create logger instance
+
+# Define the diagnostics settings
+DIAGNOSTICS_ENV = 'CANNON_DIAGNOSTICS'  # Environment variable that turns diagnostics on at start up
+FREEZE_ENV = 'CANNON_GC_FREEZE'  # Environment variable that freezes level objects out of the cyclic collector
+SNAPSHOT_FRAMES = 60  # Frames between allocation snapshots, each one costs a few milliseconds
+TOP_SITES = 10  # Number of call sites reported
+COUNTED_MODULES = ('world', 'pools', 'spatial', 'aim', 'main', '__main__', 'kivy.graphics')  # Modules whose live objects are counted
+
+# Define the diagnostics class
+class Diagnostics:  # Define Diagnostics class, allocation sites per frame, collector pauses per level and live objects
+    def __init__(self, interval=SNAPSHOT_FRAMES, top=TOP_SITES, freeze=False):  # Initialize Diagnostics
+        self.interval = interval  # Set frames between allocation snapshots
+        self.top = top  # Set number of call sites reported
+        self.freeze = freeze  # Set whether level objects are frozen out of the cyclic collector
+        self.enabled = False  # Initialize whether allocations are traced
+        self.snapshot = None  # Initialize last allocation snapshot
+        self.frames = 0  # Initialize frames since the last snapshot
+        self.peaks = []  # Initialize transient bytes of the frames since the last snapshot
+        self.sites = []  # Initialize latest (site, blocks per frame, bytes per frame) rows
+        self.transient = (0, 0)  # Initialize mean and worst bytes allocated and freed again within a frame
+        self.level = None  # Initialize level collector statistics are filed under
+        self.collections = {}  # Map levels to their collector statistics
+        self.gc_start = None  # Initialize start of the running collection
+        self.filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]  # Hide the diagnostics' own allocations
+
+    def enable(self):  # Define enable method
+        if self.enabled:  # Check if diagnostics already run
+            return  # Return
+        tracemalloc.start()  # Trace allocations by call site
+        gc.callbacks.append(self.on_gc)  # Time collections
+        self.snapshot = self.take()  # Take first snapshot
+        self.frames = 0  # Reset frames since the snapshot
+        self.peaks = []  # Reset transient bytes
+        tracemalloc.reset_peak()  # Start measuring the first frame
+        self.enabled = True  # Mark diagnostics as running
+        logger.info('Allocation diagnostics enabled')  # Log start
+
+    def disable(self):  # Define disable method
+        if not self.enabled:  # Check if diagnostics are not running
+            return  # Return
+        gc.callbacks.remove(self.on_gc)  # Stop timing collections
+        tracemalloc.stop()  # Stop tracing allocations
+        self.snapshot = None  # Drop snapshot
+        self.enabled = False  # Mark diagnostics as stopped
+
+    def take(self):  # Define take method
+        return tracemalloc.take_snapshot().filter_traces(self.filters)  # Return snapshot of the game's allocations
+
+    def frame(self):  # Define frame method, call once at the end of every frame
+        current, peak = tracemalloc.get_traced_memory()  # Get traced bytes now and at the peak of this frame
+        self.peaks.append(peak - current)  # Record bytes allocated and freed again within the frame, invisible to snapshots
+        self.frames += 1  # Count frame
+        if self.frames >= self.interval:  # Check if a snapshot is due
+            snapshot = self.take()  # Take snapshot
+            stats = snapshot.compare_to(self.snapshot, 'lineno')  # Compare with the previous snapshot by call site
+            self.sites = [(f'{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}', stat.count_diff / self.frames,
+                           stat.size_diff / self.frames) for stat in stats if stat.size_diff > 0][:self.top]  # Keep sites that grew, largest first
+            self.transient = (sum(self.peaks) / len(self.peaks), max(self.peaks))  # Summarize transient bytes
+            self.snapshot, self.frames, self.peaks = snapshot, 0, []  # Start next interval
+        tracemalloc.reset_peak()  # Start measuring the next frame
+
+    def on_gc(self, phase, info):  # Define on_gc method, called by the collector around every collection
+        if phase == 'start':  # Check if a collection starts
+            self.gc_start = time.perf_counter()  # Start timer
+            return  # Return
+        pause = time.perf_counter() - self.gc_start  # Calculate pause
+        stats = self.collections.setdefault(self.level, {'collections': [0, 0, 0], 'collected': 0, 'pause': 0.0, 'max_pause': 0.0})  # Get level statistics
+        stats['collections'][info['generation']] += 1  # Count collection by generation
+        stats['collected'] += info['collected']  # Count freed objects
+        stats['pause'] += pause  # Add pause
+        stats['max_pause'] = max(stats['max_pause'], pause)  # Track longest pause
+
+    def level_started(self, level):  # Define level_started method
+        self.level = level  # File the next collections under this level
+        if self.freeze:  # Check if level objects are frozen
+            gc.unfreeze()  # Return the previous level's objects to the collector, they are garbage now
+            gc.collect()  # Free them before the level starts instead of during play
+            gc.freeze()  # Move every surviving object out of the collector's reach, collections then scan only new objects
+
+    def live_objects(self, top=TOP_SITES):  # Define live_objects method
+        counts = Counter(type(obj).__qualname__ for obj in gc.get_objects()
+                         if type(obj).__module__ in COUNTED_MODULES)  # Count tracked objects of the game's classes
+        return counts.most_common(top)  # Return most numerous classes
+
+    def lines(self):  # Define lines method
+        lines = [f"transient per frame: mean {self.transient[0] / 1024:.1f} KiB, worst {self.transient[1] / 1024:.1f} KiB"]  # Add transient bytes
+        lines += [f"  {site:<28}{blocks:>8.2f} blocks{size:>10.0f} B per frame" for site, blocks, size in self.sites]  # Add growing call sites
+        for level, stats in self.collections.items():  # Iterate over levels
+            lines.append(f"level {level}: gc {'/'.join(map(str, stats['collections']))} by generation, {stats['collected']} freed, "
+                         f"pause {stats['pause'] * 1000:.1f} ms total, {stats['max_pause'] * 1000:.2f} ms worst")  # Add collector statistics
+        frozen = f' ({gc.get_freeze_count()} frozen objects not counted)' if gc.get_freeze_count() else ''  # Note objects hidden by the freeze
+        lines.append(f'live{frozen}: ' + ', '.join(f'{name} {count}' for name, count in self.live_objects()))  # Add live objects
+        return lines  # Return report lines
+
+    def log(self):  # Define log method
+        for line in self.lines():  # Iterate over report lines
+            logger.info(line)  # Log line
+
+# Define the shared diagnostics
+@functools.lru_cache(maxsize=None)
+def default_diagnostics():  # Define default_diagnostics function
+    diagnostics = Diagnostics(freeze=bool(os.environ.get(FREEZE_ENV)))  # Create diagnostics once per process
+    if os.environ.get(DIAGNOSTICS_ENV):  # Check if diagnostics were asked for at start up
+        diagnostics.enable()  # Start diagnostics
+    return diagnostics  # Return diagnostics
+
+# MAIN
+
+# Define the command line entry point
+def main():  # Define main function
+    from batch import POLICIES, FIRE_INTERVAL  # Import here, only the headless run needs the scripted shooters
+    from world import World, GameLoop, STEP  # Import here, only the headless run needs a world
+
+    parser = argparse.ArgumentParser(description="Report allocations per frame and collector pauses of a headless game")  # Create argument parser
+    parser.add_argument('--seconds', type=float, default=30)  # Set simulated seconds
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='random')  # Set shooter policy
+    parser.add_argument('--seed', type=int, default=1)  # Set random seed
+    parser.add_argument('--freeze', action='store_true', help="freeze level objects out of the cyclic collector at level start")  # Set freeze
+    args = parser.parse_args()  # Parse arguments
+
+    logging.disable(logging.CRITICAL)  # Silence the per-level debug logging
+    diagnostics = Diagnostics(freeze=args.freeze)  # Create diagnostics
+    world = World(seed=args.seed)  # Create world
+    loop = GameLoop(world)  # Create fixed timestep loop
+    world.create_level()  # Create the first level
+    diagnostics.level_started(world.level)  # Start first level
+    shooter = POLICIES[args.policy](world, random.Random(args.seed))  # Create policy
+    every = max(round(FIRE_INTERVAL / STEP), 1)  # Calculate frames between shots
+    diagnostics.enable()  # Start diagnostics
+    for frame in range(round(args.seconds / STEP)):  # Iterate over frames
+        if frame % every == 0 and world.target is not None and world.remaining_shots > 0:  # Check if a shot is due
+            weapon, x, y = shooter.choose()  # Ask policy for a shot
+            world.shooting_mode = weapon  # Select weapon
+            world.aim(x, y)  # Aim cannon
+            world.fire(x, y)  # Fire
+        loop.advance(STEP)  # Run one frame of simulation
+        for name, value in world.drain_events():  # Iterate over world events
+            if name == 'level_started':  # Check if a level started
+                diagnostics.level_started(value)  # Start level
+        diagnostics.frame()  # End frame
+    for line in diagnostics.lines():  # Iterate over report lines
+        print(line)  # Print line
+    diagnostics.disable()  # Stop diagnostics
+
+# Run the diagnostics
+if __name__ == "__main__":  # Check if script is run directly
+    main()  # Run main
@@ -0,0 +1,109 @@
+# Heads-up display counters drawn from cached glyph textures for the Kivy view
+import functools
+import logging
+
+from kivy.core.text import Label as CoreLabel
+from kivy.graphics import Color, InstructionGroup, Rectangle
+
+# Set up logging
+logger = logging.getLogger(__name__)  # Create logger instance
+
+# Define the HUD settings
+HUD_FONT = 'TrueLies.ttf'  # Font of the HUD counters
+HUD_FONT_SIZE = 24  # Font size of the HUD counters
+PRERENDERED = '0123456789:-/ '  # Characters rendered before the first counter changes
+
+# Define the glyph cache class
+class GlyphCache:  # Define GlyphCache class, rasterizes every character once per font and size
+    def __init__(self):  # Initialize GlyphCache
+        self.textures = {}  # Map (character, font, size) to its texture
+        self.hits = 0  # Initialize number of glyphs served from the cache
+        self.misses = 0  # Initialize number of glyphs rasterized
+
+    def texture(self, char, font_name=HUD_FONT, font_size=HUD_FONT_SIZE):  # Define texture method
+        key = (char, font_name, font_size)  # Get cache key
+        texture = self.textures.get(key)  # Look up glyph
+        if texture is not None:  # Check if glyph was rendered
+            self.hits += 1  # Count hit
+            return texture  # Return cached glyph
+        label = CoreLabel(text=char, font_name=font_name, font_size=font_size)  # Create text renderer
+        label.refresh()  # Rasterize glyph
+        texture = self.textures[key] = label.texture  # Cache glyph
+        self.misses += 1  # Count miss
+        return texture  # Return glyph
+
+    def preload(self, chars, font_name=HUD_FONT, font_size=HUD_FONT_SIZE):  # Define preload method
+        for char in chars:  # Iterate over characters
+            self.texture(char, font_name, font_size)  # Render character
+
+    def stats(self):  # Define stats method
+        lookups = self.hits + self.misses  # Count lookups
+        return {'glyphs': len(self.textures), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 1.0}  # Return cache statistics
+
+# Define the shared glyph cache
+@functools.lru_cache(maxsize=None)
+def default_glyphs():  # Define default_glyphs function
+    return GlyphCache()  # Create the glyph cache once per process
+
+# Define the HUD counter class
+class HudCounter:  # Define HudCounter class, a line of text laid out from glyph rectangles reused between values
+    def __init__(self, prefix, pos, anchor='left', color=(1, 1, 1, 1), font_name=HUD_FONT, font_size=HUD_FONT_SIZE):  # Initialize HudCounter
+        self.prefix = prefix  # Set text shown before the value
+        self.pos = pos  # Set anchor position
+        self.anchor = anchor  # Set which end of the text sits at the anchor
+        self.font_name = font_name  # Set font name
+        self.font_size = font_size  # Set font size
+        self.text = None  # Initialize text shown
+        self.rectangles = []  # Initialize glyph rectangles, grown to the longest text shown
+        self.group = InstructionGroup()  # Create group holding the counter's instructions
+        self.group.add(Color(*color))  # Set counter color
+
+    def set(self, value):  # Define set method
+        text = f'{self.prefix}{value}'  # Format text
+        if text == self.text:  # Check if text is already shown
+            return  # Return
+        self.text = text  # Remember text shown
+        self.layout()  # Lay out glyphs
+
+    def move(self, pos):  # Define move method
+        self.pos = pos  # Set anchor position
+        if self.text is not None:  # Check if text is shown
+            self.layout()  # Lay out glyphs again
+
+    def layout(self):  # Define layout method
+        glyphs = default_glyphs()  # Get glyph cache
+        textures = [glyphs.texture(char, self.font_name, self.font_size) for char in self.text]  # Get cached glyphs
+        x, y = self.pos  # Get anchor position
+        if self.anchor == 'right':  # Check if text ends at the anchor
+            x -= sum(texture.width for texture in textures)  # Start left of the anchor
+        while len(self.rectangles) < len(textures):  # Check if the text is longer than any shown before
+            rectangle = Rectangle(size=(0, 0))  # Create glyph rectangle
+            self.group.add(rectangle)  # Add rectangle to counter
+            self.rectangles.append(rectangle)  # Keep rectangle for reuse
+        for rectangle, texture in zip(self.rectangles, textures):  # Iterate over glyphs
+            rectangle.texture = texture  # Set glyph
+            rectangle.pos = (x, y)  # Place glyph
+            rectangle.size = texture.size  # Size rectangle to the glyph
+            x += texture.width  # Advance pen
+        for rectangle in self.rectangles[len(textures):]:  # Iterate over unused rectangles
+            rectangle.size = (0, 0)  # Hide rectangle
+
+# Define the HUD class
+class Hud:  # Define Hud class, named counters redrawn only when their value changes
+    def __init__(self, canvas):  # Initialize Hud
+        self.canvas = canvas  # Set canvas the counters draw on
+        self.counters = {}  # Map names to their counters
+        default_glyphs().preload(PRERENDERED)  # Render digits before the first change
+
+    def add(self, name, prefix, pos, anchor='left', **kwargs):  # Define add method
+        counter = HudCounter(prefix, pos, anchor, **kwargs)  # Create counter
+        self.counters[name] = counter  # Register counter
+        self.canvas.add(counter.group)  # Draw counter
+        return counter  # Return counter
+
+    def set(self, name, value):  # Define set method
+        self.counters[name].set(value)  # Update counter, a no-op when the value is unchanged
+
+    def move(self, name, pos):  # Define move method
+        self.counters[name].move(pos)  # Move counter
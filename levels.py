@@ -0,0 +1,197 @@
+# Level packs: data-driven level content and its compiled layout cache (no Kivy imports)
+# Compile with: python levels.py compile packs/default.json
+import argparse
+import functools
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+# Set up logging
+logger = logging.getLogger(__name__)  # Create logger instance
+
+# Define the pack locations and the compiled file layout
+DEFAULT_PACK = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'packs', 'default.json')  # Path of the level pack shipped with the game
+MAGIC = b'CGLP'  # Identify compiled level packs
+VERSION = 1  # Compiled format version
+PREAMBLE = struct.Struct('<4sII')  # Magic, version and header size
+ALIGNMENT = 64  # Byte alignment of every array in the data section
+
+# Define the hazard record kinds, one row (kind, x, y, a, b) per hazard
+HAZARD_KINDS = ('obstacle', 'mirror', 'elastonio', 'gravitonio', 'perpetio', 'wormhole')  # Names of the kind codes
+
+# Define the level pack class
+class LevelPack:  # Define LevelPack class, the levels of one game and their tuning
+    def __init__(self, levels, resolutions=(), name='', path=None, digest=None):  # Initialize LevelPack
+        self.levels = levels  # Set level descriptions
+        self.resolutions = resolutions  # Set window sizes the compile step pre-bakes
+        self.name = name  # Set pack name
+        self.path = path  # Set source path
+        self.digest = digest  # Set hash of the source, compiled caches must match it
+        self.baked = None  # Initialize compiled layouts
+
+    def __len__(self):  # Define __len__ method
+        return len(self.levels)  # Return number of levels
+
+    def level(self, number):  # Define level method
+        return self.levels[min(max(number, 1), len(self.levels)) - 1]  # Return description of a level, numbered from 1
+
+    def count(self, number, kind):  # Define count method
+        return self.level(number).get('counts', {}).get(kind, 0)  # Return number of hazards of a kind
+
+    def tuning(self, number, name, default):  # Define tuning method
+        return self.level(number).get('tuning', {}).get(name, default)  # Return tuning constant or its default
+
+    def layout(self, number, width, height):  # Define layout method
+        if self.baked is None:  # Check if there is no compiled cache
+            return None  # Return no layout
+        return self.baked.layout(number, width, height)  # Return compiled layout, None if this size was not baked
+
+    @classmethod
+    def load(cls, path=DEFAULT_PACK, baked=True):  # Define load method
+        with open(path, 'rb') as file:  # Open level pack
+            raw = file.read()  # Read source
+        data = json.loads(raw)  # Parse source
+        pack = cls(data['levels'], [tuple(size) for size in data.get('resolutions', [])], data.get('name', ''), path,
+                   hashlib.sha1(raw).hexdigest())  # Create pack
+        compiled = os.path.splitext(path)[0] + '.pack'  # Get compiled cache path
+        if baked and os.path.exists(compiled):  # Check if a compiled cache exists
+            try:  # Try to map compiled cache
+                layouts = BakedLayouts(compiled)  # Map compiled cache
+            except (OSError, ValueError) as e:  # Handle unreadable cache
+                logger.warning(f'Ignoring compiled level pack {compiled}: {e}')  # Log warning
+            else:  # If cache was mapped
+                if layouts.digest == pack.digest:  # Check if cache was compiled from this source
+                    pack.baked = layouts  # Use compiled layouts
+                else:  # If source changed since the last compile
+                    logger.warning(f'Compiled level pack {compiled} is stale, recompile it')  # Log warning
+                    layouts.close()  # Unmap cache
+        return pack  # Return pack
+
+# Define the shared default pack
+@functools.lru_cache(maxsize=None)
+def default_pack():  # Define default_pack function
+    return LevelPack.load(DEFAULT_PACK)  # Load the shipped pack once per process
+
+# Define the baked layouts class
+class BakedLayouts:  # Define BakedLayouts class, a memory-mapped compiled level pack
+    def __init__(self, path):  # Initialize BakedLayouts
+        self.file = open(path, 'rb')  # Open compiled file
+        try:  # Try to read the header
+            self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)  # Map file
+            magic, version, header_size = PREAMBLE.unpack_from(self.buffer, 0)  # Read preamble
+            if magic != MAGIC or version != VERSION:  # Check format
+                raise ValueError(f'not a version {VERSION} level pack')  # Raise error
+            header = json.loads(self.buffer[PREAMBLE.size:PREAMBLE.size + header_size])  # Read header
+        except Exception:  # Handle any failure
+            self.file.close()  # Close file
+            raise  # Re-raise error
+        self.digest = header['digest']  # Set hash of the source the file was compiled from
+        self.data_start = align(PREAMBLE.size + header_size)  # Set start of the data section
+        self.entries = header['layouts']  # Map "level:WIDTHxHEIGHT" keys to their arrays
+
+    def layout(self, number, width, height):  # Define layout method
+        entry = self.entries.get(f'{number}:{int(width)}x{int(height)}')  # Look up layout
+        if entry is None:  # Check if layout was not baked
+            return None  # Return no layout
+        return {name: np.frombuffer(self.buffer, dtype=dtype, count=int(np.prod(shape)), offset=self.data_start + offset).reshape(shape)
+                for name, (offset, dtype, shape) in entry.items()}  # Return read-only views into the mapped file
+
+    def close(self):  # Define close method
+        self.buffer.close()  # Unmap file
+        self.file.close()  # Close file
+
+# Define the alignment helper
+def align(offset):  # Define align function
+    return -(-offset // ALIGNMENT) * ALIGNMENT  # Round offset up to the alignment
+
+# COMPILE
+
+# Define the helper that lists a level's hazards as records
+def layout_rows(world):  # Define layout_rows function
+    rows = [(0, *obstacle.initial_pos, obstacle.oscillation_amplitude, obstacle.oscillation_speed) for obstacle in world.obstacles]  # Add obstacles
+    rows += [(1, mirror.x, mirror.y, mirror.angle, 0) for mirror in world.mirrors]  # Add mirrors
+    rows += [(2, elastonio.x, elastonio.y, 0, 0) for elastonio in world.elastonios]  # Add elastonios
+    rows += [(3, gravitonio.x, gravitonio.y, gravitonio.effect == "repel", 0) for gravitonio in world.gravitonios]  # Add gravitonios
+    rows += [(4, perpetio.x, perpetio.y, 0, 0) for perpetio in world.perpetios]  # Add perpetios
+    rows += [(5, *wormhole.pos1, *wormhole.pos2) for wormhole in world.wormholes]  # Add wormholes
+    return np.array(rows, dtype=np.float64).reshape(-1, 5)  # Return hazard records
+
+# Define the helper that turns a generated level into arrays
+def bake_layout(world):  # Define bake_layout function
+    arrays = {'hazards': layout_rows(world)}  # Store hazard records
+    world.gravity.sync(world.gravitonios)  # Build gravity field
+    if world.gravity.pull_x is not None:  # Check if level has gravitonios
+        arrays['gravity_x'] = world.gravity.pull_x  # Store field along x
+        arrays['gravity_y'] = world.gravity.pull_y  # Store field along y
+        arrays['gravity_origin'] = np.array(world.gravity.origin, dtype=np.float64)  # Store position of the first sample
+    arrays['target_space'] = world.target_space.counts  # Store target free-space grid
+    return arrays  # Return arrays
+
+# Define the compile step
+def compile_pack(path, output=None, verifier=None):  # Define compile_pack function
+    from world import World  # Import here, world.py imports this module
+    pack = LevelPack.load(path, baked=False)  # Load source without any old cache
+    output = output or os.path.splitext(path)[0] + '.pack'  # Get compiled cache path
+    entries = {}  # Initialize header entries
+    blobs = []  # Initialize array bytes in file order
+    offset = 0  # Initialize offset in the data section
+    for number in range(1, len(pack) + 1):  # Iterate over levels
+        if pack.level(number).get('seed') is None:  # Check if level is random on every play
+            logger.warning(f'Level {number} has no seed, it is generated at load time')  # Log warning
+            continue  # Skip level
+        for width, height in pack.resolutions:  # Iterate over window sizes
+            world = World(width=width, height=height, seed=0, pack=pack)  # Create world
+            world.level = number  # Set level
+            world.verifier = verifier  # Re-roll layouts the verifier rejects, if given
+            world.create_level(baked=False)  # Generate level
+            entry = {}  # Initialize entry arrays
+            for name, array in bake_layout(world).items():  # Iterate over arrays
+                array = np.ascontiguousarray(array)  # Make array contiguous
+                entry[name] = [offset, array.dtype.str, list(array.shape)]  # Record array location
+                blobs.append((offset, array.tobytes()))  # Keep array bytes
+                offset = align(offset + array.nbytes)  # Move to next aligned offset
+            entries[f'{number}:{width}x{height}'] = entry  # Add entry
+    header = json.dumps({'digest': pack.digest, 'layouts': entries}).encode()  # Encode header
+    data_start = align(PREAMBLE.size + len(header))  # Calculate start of the data section
+    with open(output + '.tmp', 'wb') as file:  # Write to a temporary file first
+        file.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))  # Write preamble
+        file.write(header)  # Write header
+        for blob_offset, blob in blobs:  # Iterate over arrays
+            file.seek(data_start + blob_offset)  # Move to array offset
+            file.write(blob)  # Write array
+    os.replace(output + '.tmp', output)  # Replace old cache atomically
+    return output, len(entries)  # Return compiled path and number of layouts
+
+# MAIN
+
+# Define the command line entry point
+def main():  # Define main function
+    parser = argparse.ArgumentParser(description="Level pack tools")  # Create argument parser
+    subparsers = parser.add_subparsers(dest='command', required=True)  # Create command selector
+    compile_parser = subparsers.add_parser('compile', help="pre-bake layouts, indexes and gravity fields of a level pack")  # Add compile command
+    compile_parser.add_argument('pack', nargs='?', default=DEFAULT_PACK)  # Set source path
+    compile_parser.add_argument('--output')  # Set compiled cache path
+    compile_parser.add_argument('--verify', action='store_true', help="re-roll layouts the solvability verifier rejects")  # Set verification
+    args = parser.parse_args()  # Parse arguments
+
+    start = time.perf_counter()  # Start timer
+    verifier = None  # Initialize solvability verifier
+    if args.verify:  # Check if layouts are verified
+        from verifier import LayoutVerifier  # Import here, the verifier imports the world
+        verifier = LayoutVerifier(budget=None)  # Wait for every verdict, compiling has no frame to keep
+    try:  # Compile pack
+        output, layouts = compile_pack(args.pack, args.output, verifier)  # Compile pack
+    finally:  # Stop workers even when compiling fails
+        if verifier is not None:  # Check if layouts were verified
+            verifier.close()  # Stop workers and save verdicts
+    print(f"Compiled {layouts} layouts into {output} in {(time.perf_counter() - start) * 1000:.0f} ms")  # Print summary
+
+# Run the command line tools
+if __name__ == "__main__":  # Check if script is run directly
+    main()  # Run main
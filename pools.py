@@ -0,0 +1,64 @@
+# Object pools for short-lived game objects (no Kivy imports)
+
+# Define the default number of idle objects a pool keeps
+HIGH_WATER = 64  # Set default high-water mark
+
+# Define the pool class
+class Pool:  # Define Pool class, a bounded free list of reusable objects of one type
+    def __init__(self, factory, reset=None, high_water=HIGH_WATER, name=None):  # Initialize Pool
+        self.factory = factory  # Set function creating a new object
+        self.reset = reset  # Set function re-initializing a recycled object, None to reuse it as is
+        self.high_water = high_water  # Set maximum number of idle objects kept
+        self.name = name or getattr(factory, '__name__', 'pool')  # Set pool name
+        self.free = []  # Initialize idle objects list
+        self.hits = 0  # Initialize number of acquires served from the free list
+        self.misses = 0  # Initialize number of acquires that created an object
+        self.drops = 0  # Initialize number of releases discarded above the high-water mark
+        self.in_use = 0  # Initialize number of acquired objects not yet released
+        self.peak_in_use = 0  # Initialize highest number of objects in use at once
+
+    def __len__(self):  # Define __len__ method
+        return len(self.free)  # Return number of idle objects
+
+    def acquire(self, *args, **kwargs):  # Define acquire method
+        if self.free:  # Check if an idle object is available
+            obj = self.free.pop()  # Take idle object
+            if self.reset is not None:  # Check if object needs re-initializing
+                self.reset(obj, *args, **kwargs)  # Re-initialize object in place
+            self.hits += 1  # Count hit
+        else:  # If the pool is empty
+            obj = self.factory(*args, **kwargs)  # Create object
+            self.misses += 1  # Count miss
+        self.in_use += 1  # Count object in use
+        if self.in_use > self.peak_in_use:  # Check if this is a new peak
+            self.peak_in_use = self.in_use  # Update peak
+        return obj  # Return object
+
+    def release(self, obj):  # Define release method
+        self.in_use -= 1  # Count object returned
+        if len(self.free) < self.high_water:  # Check if pool has room
+            self.free.append(obj)  # Keep object for reuse
+        else:  # If pool is full
+            self.drops += 1  # Let the object be collected
+
+    def release_all(self, objs):  # Define release_all method
+        for obj in objs:  # Iterate over objects
+            self.release(obj)  # Return object to pool
+
+    def prefill(self, count, *args, **kwargs):  # Define prefill method
+        while len(self.free) < min(count, self.high_water):  # Check if pool needs more idle objects
+            self.free.append(self.factory(*args, **kwargs))  # Create idle object ahead of time
+
+    def stats(self):  # Define stats method
+        acquires = self.hits + self.misses  # Count acquires
+        return {
+            'name': self.name,  # Pool name
+            'hits': self.hits,  # Acquires served from the free list
+            'misses': self.misses,  # Acquires that created an object
+            'hit_rate': self.hits / acquires if acquires else 1.0,  # Share of acquires that allocated nothing
+            'drops': self.drops,  # Releases discarded above the high-water mark
+            'in_use': self.in_use,  # Objects currently acquired
+            'peak_in_use': self.peak_in_use,  # Highest number of objects in use at once
+            'idle': len(self.free),  # Objects waiting in the pool
+            'high_water': self.high_water,  # Maximum number of idle objects kept
+        }  # Return pool statistics
@@ -0,0 +1,126 @@
+# Opt-in per-system frame profiler with rolling percentiles and Chrome trace export (no Kivy imports)
+# Open the saved trace in chrome://tracing or https://ui.perfetto.dev
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+# Set up logging
+logger = logging.getLogger(__name__)  # Create logger instance
+
+# Define the profiler settings
+PROFILE_ENV = 'CANNON_PROFILE'  # Environment variable that turns the profiler on at start up
+TRACE_PATH = 'profile_trace.json'  # Trace file written when a profiling session ends
+WINDOW = 600  # Samples kept per system for the percentiles, ten seconds of frames at 60 fps
+TRACE_LIMIT = 1000000  # Maximum trace events kept, about a quarter of an hour of a fully instrumented game
+
+# Define the profiler class
+class Profiler:  # Define Profiler class, swaps timed wrappers over registered methods only while enabled
+    def __init__(self, window=WINDOW, trace_limit=TRACE_LIMIT):  # Initialize Profiler
+        self.window = window  # Set samples kept per system
+        self.trace_limit = trace_limit  # Set maximum trace events kept
+        self.enabled = False  # Initialize whether timed wrappers are installed
+        self.targets = []  # Initialize registered (object, method name, label) triples
+        self.samples = {}  # Map labels to their latest durations in seconds
+        self.trace = []  # Initialize trace events as (label, start, duration, thread) tuples
+        self.dropped = 0  # Initialize number of trace events over the limit
+        self.origin = time.perf_counter()  # Set time zero of the trace
+
+    def instrument(self, obj, name, label=None):  # Define instrument method
+        target = (obj, name, label or name)  # Describe target
+        self.targets.append(target)  # Register target
+        if self.enabled:  # Check if profiling is running
+            self.wrap(*target)  # Time target at once
+
+    def wrap(self, obj, name, label):  # Define wrap method
+        method = getattr(obj, name)  # Get bound method
+        samples = self.samples.setdefault(label, deque(maxlen=self.window))  # Get rolling samples of the label
+        trace, clock, ident = self.trace, time.perf_counter, threading.get_ident  # Bind names used on every call
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):  # Define timed wrapper
+            start = clock()  # Start timer
+            try:  # Run method
+                return method(*args, **kwargs)  # Return its result
+            finally:  # Record time even when the method raises
+                duration = clock() - start  # Calculate duration
+                samples.append(duration)  # Add sample
+                if len(trace) < self.trace_limit:  # Check if the trace has room
+                    trace.append((label, start, duration, ident()))  # Add trace event
+                else:  # If the trace is full
+                    self.dropped += 1  # Count dropped event
+        obj.__dict__[name] = timed  # Shadow the method on this instance only
+
+    def unwrap(self, obj, name):  # Define unwrap method
+        obj.__dict__.pop(name, None)  # Drop the shadowing wrapper, calls reach the plain method again
+
+    def enable(self):  # Define enable method
+        if self.enabled:  # Check if profiling is already running
+            return  # Return
+        self.enabled = True  # Mark profiling as running
+        self.trace.clear()  # Start a new session
+        self.dropped = 0  # Reset dropped events
+        self.origin = time.perf_counter()  # Reset time zero of the trace
+        for target in self.targets:  # Iterate over targets
+            self.wrap(*target)  # Time target
+        logger.info(f'Profiling {len(self.targets)} systems')  # Log start
+
+    def disable(self):  # Define disable method
+        if not self.enabled:  # Check if profiling is not running
+            return  # Return
+        self.enabled = False  # Mark profiling as stopped
+        for obj, name, label in self.targets:  # Iterate over targets
+            self.unwrap(obj, name)  # Restore plain method
+
+    def toggle(self):  # Define toggle method
+        if self.enabled:  # Check if profiling is running
+            self.disable()  # Stop profiling
+        else:  # If profiling is stopped
+            self.enable()  # Start profiling
+        return self.enabled  # Return new state
+
+    def percentiles(self, label):  # Define percentiles method
+        ordered = sorted(self.samples.get(label, ()))  # Sort latest samples
+        if not ordered:  # Check if system never ran
+            return None  # Return no percentiles
+        pick = lambda q: ordered[min(int(q * len(ordered)), len(ordered) - 1)]  # Define nearest-rank lookup
+        return pick(0.5), pick(0.95), pick(0.99)  # Return p50, p95 and p99 in seconds
+
+    def report(self):  # Define report method
+        rows = []  # Initialize report rows
+        for label, samples in self.samples.items():  # Iterate over systems
+            result = self.percentiles(label)  # Get percentiles
+            if result is not None:  # Check if system ran
+                rows.append((label, len(samples), *result))  # Add row
+        return sorted(rows, key=lambda row: row[3], reverse=True)  # Return rows, slowest p95 first
+
+    def lines(self):  # Define lines method
+        lines = [f"{'system':<22}{'p50':>7}{'p95':>7}{'p99':>7} ms"]  # Add header
+        for label, count, p50, p95, p99 in self.report():  # Iterate over rows
+            lines.append(f"{label:<22}{p50 * 1000:>7.2f}{p95 * 1000:>7.2f}{p99 * 1000:>7.2f}")  # Add row
+        if self.dropped:  # Check if the trace overflowed
+            lines.append(f"trace full, {self.dropped} events dropped")  # Add warning
+        return lines  # Return overlay lines
+
+    def save_trace(self, path=TRACE_PATH):  # Define save_trace method
+        if not self.trace:  # Check if nothing was recorded
+            return None  # Return no path
+        pid = os.getpid()  # Get process id
+        events = [{'name': label, 'cat': 'frame', 'ph': 'X', 'ts': (start - self.origin) * 1e6, 'dur': duration * 1e6,
+                   'pid': pid, 'tid': thread} for label, start, duration, thread in self.trace]  # Convert to complete events in microseconds
+        with open(path + '.tmp', 'w') as file:  # Write to a temporary file first
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)  # Write trace
+        os.replace(path + '.tmp', path)  # Replace old trace atomically
+        logger.info(f'Saved {len(events)} trace events to {path}')  # Log save
+        return path  # Return path
+
+# Define the shared profiler
+@functools.lru_cache(maxsize=None)
+def default_profiler():  # Define default_profiler function
+    profiler = Profiler()  # Create the profiler once per process
+    if os.environ.get(PROFILE_ENV):  # Check if profiling was asked for at start up
+        profiler.enable()  # Start profiling
+    return profiler  # Return profiler
@@ -0,0 +1,218 @@
+# Session recording and deterministic replay (no Kivy imports)
+# Replay with: python replay.py last_session.replay
+import argparse
+import logging
+import os
+import struct
+import time
+import zlib
+
+from world import World, STEP
+
+# Set up logging
+logger = logging.getLogger(__name__)  # Create logger instance
+
+# Define the recording file layout
+LAST_SESSION = 'last_session.replay'  # Recording of the latest session, attach it to bug reports
+MAGIC = b'CGRP'  # Identify recordings
+VERSION = 2  # Recording format version
+HEADER = struct.Struct('<4sHqHHH8s')  # Magic, version, seed, width, height, max level and level pack digest prefix
+
+# Define the input opcodes, each event is (step delta, opcode, zigzag varint operands)
+AIM, FIRE, MODE, MOVE, RESIZE, RESET, END, LAYOUT = range(8)  # Opcodes
+OPERANDS = {AIM: 2, FIRE: 2, MODE: 1, MOVE: 1, RESIZE: 2, RESET: 0, END: 0, LAYOUT: 2}  # Number of operands of each opcode
+MODES = ('projectile', 'laser', 'bombshell', 'beam')  # Shooting modes by index
+
+# Define the varint helpers
+def write_varint(buffer, value):  # Define write_varint function
+    while value >= 0x80:  # Check if more than seven bits remain
+        buffer.append(value & 0x7F | 0x80)  # Write seven bits with the continuation flag
+        value >>= 7  # Drop written bits
+    buffer.append(value)  # Write last seven bits
+
+def read_varint(data, offset):  # Define read_varint function
+    value, shift = 0, 0  # Initialize value and bit position
+    while True:  # Read bytes until the continuation flag is clear
+        byte = data[offset]  # Read byte
+        offset += 1  # Move past byte
+        value |= (byte & 0x7F) << shift  # Add seven bits
+        if byte < 0x80:  # Check if this was the last byte
+            return value, offset  # Return value and next offset
+        shift += 7  # Move to next seven bits
+
+def zigzag(value):  # Define zigzag function
+    return value * 2 if value >= 0 else -value * 2 - 1  # Map signed to unsigned so small deltas stay one byte
+
+def unzigzag(value):  # Define unzigzag function
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2  # Map unsigned back to signed
+
+# Define the state fingerprint, compared at the end of a replay
+def fingerprint(world):  # Define fingerprint function
+    target = (round(world.target.x, 6), round(world.target.y, 6), world.target.life) if world.target else None  # Get target state
+    state = (world.level, world.score, world.remaining_shots, world.finished, round(world.cannon_x, 6), target,
+             len(world.projectiles), len(world.bombshells), len(world.obstacles), len(world.elastonios))  # Collect state
+    return zlib.crc32(repr(state).encode())  # Return checksum of the state
+
+# Define the input recorder class
+class InputRecorder:  # Define InputRecorder class, the single path from player input to the world
+    def __init__(self, world, loop):  # Initialize InputRecorder
+        self.world = world  # Set simulation world
+        self.loop = loop  # Set fixed timestep loop, its step count timestamps events
+        self.header = HEADER.pack(MAGIC, VERSION, world.seed, int(world.width), int(world.height), world.max_level,
+                                  bytes.fromhex(world.pack.digest or '0' * 16)[:8])  # Describe the starting world
+        self.events = bytearray()  # Initialize encoded events
+        self.last_step = 0  # Initialize step of the last event
+        self.cursor = (0, 0)  # Initialize last recorded cursor position
+        self.direction = 0  # Initialize last recorded cannon direction
+        self.count = 0  # Initialize number of recorded events
+
+    def record(self, opcode, *operands):  # Define record method
+        step = self.loop.steps  # Get steps simulated so far
+        write_varint(self.events, step - self.last_step)  # Write steps since the last event
+        self.events.append(opcode)  # Write opcode
+        for operand in operands:  # Iterate over operands
+            write_varint(self.events, zigzag(operand))  # Write operand
+        self.last_step = step  # Remember step
+        self.count += 1  # Count event
+
+    def aim(self, x, y):  # Define aim method
+        x, y = round(x), round(y)  # Snap cursor to whole pixels, the live game uses the recorded value
+        if (x, y) != self.cursor:  # Check if cursor moved
+            self.record(AIM, x - self.cursor[0], y - self.cursor[1])  # Record movement
+            self.cursor = (x, y)  # Remember cursor
+        self.world.aim(x, y)  # Aim cannon
+
+    def fire(self, x, y):  # Define fire method
+        x, y = round(x), round(y)  # Snap touch to whole pixels
+        self.record(FIRE, x - self.cursor[0], y - self.cursor[1])  # Record touch relative to the cursor, usually zero
+        self.world.fire(x, y)  # Fire the selected weapon
+
+    def select(self, mode):  # Define select method
+        self.record(MODE, MODES.index(mode))  # Record weapon switch
+        self.world.shooting_mode = mode  # Set shooting mode
+
+    def move(self, direction):  # Define move method
+        if direction != self.direction:  # Check if direction changed
+            self.record(MOVE, direction)  # Record new direction
+            self.direction = direction  # Remember direction
+        self.world.cannon_direction = direction  # Set cannon direction for the next steps
+
+    def resize(self, width, height):  # Define resize method
+        width, height = int(width), int(height)  # Use whole pixels
+        if (width, height) != (self.world.width, self.world.height):  # Check if size changed
+            self.record(RESIZE, width, height)  # Record new size
+        self.world.resize(width, height)  # Resize world
+
+    def reset(self):  # Define reset method
+        self.record(RESET)  # Record reset
+        self.world.reset()  # Reset world
+
+    def layout(self, count, attempt):  # Define layout method, called for every layout_rerolled event of the world
+        self.record(LAYOUT, count, attempt)  # Record the re-roll the verifier kept, its verdicts may differ on replay
+
+    def data(self):  # Define data method
+        end = bytearray()  # Initialize end marker
+        write_varint(end, self.loop.steps - self.last_step)  # Write steps after the last event
+        end.append(END)  # Write opcode
+        write_varint(end, fingerprint(self.world))  # Write final state checksum
+        return self.header + bytes(self.events) + bytes(end)  # Return whole recording
+
+    def save(self, path=LAST_SESSION):  # Define save method
+        data = self.data()  # Encode recording
+        with open(path + '.tmp', 'wb') as file:  # Write to a temporary file first
+            file.write(data)  # Write recording
+        os.replace(path + '.tmp', path)  # Replace old recording atomically
+        logger.debug(f'Saved {self.count} input events over {self.loop.steps} steps to {path} ({len(data)} bytes)')  # Log save
+
+# Define the replayer class
+class Replayer:  # Define Replayer class, re-runs a recording on a fresh world
+    def __init__(self, data):  # Initialize Replayer
+        magic, version, self.seed, self.width, self.height, self.max_level, self.digest = HEADER.unpack_from(data, 0)  # Read header
+        if magic != MAGIC or version != VERSION:  # Check format
+            raise ValueError(f'not a version {VERSION} recording')  # Raise error
+        self.data = data  # Set recording
+
+    @classmethod
+    def load(cls, path=LAST_SESSION):  # Define load method
+        with open(path, 'rb') as file:  # Open recording
+            return cls(file.read())  # Return replayer
+
+    def events(self):  # Define events method
+        offset, step = HEADER.size, 0  # Start after the header
+        while offset < len(self.data):  # Iterate over events
+            delta, offset = read_varint(self.data, offset)  # Read steps since the last event
+            step += delta  # Advance step
+            opcode = self.data[offset]  # Read opcode
+            offset += 1  # Move past opcode
+            operands = []  # Initialize operands
+            for _ in range(OPERANDS[opcode]):  # Iterate over operands
+                value, offset = read_varint(self.data, offset)  # Read operand
+                operands.append(unzigzag(value))  # Decode operand
+            if opcode == END:  # Check if recording ended
+                checksum, offset = read_varint(self.data, offset)  # Read final state checksum
+                operands.append(checksum)  # Keep checksum
+            yield step, opcode, operands  # Yield event
+
+    def world(self):  # Define world method
+        world = World(width=self.width, height=self.height, seed=self.seed, max_level=self.max_level)  # Create world as the game did
+        if world.pack.digest and bytes.fromhex(world.pack.digest)[:8] != self.digest:  # Check if levels changed since recording
+            logger.warning('Level pack differs from the recorded one, the replay may diverge')  # Log warning
+        world.layout_plan = {operands[0]: operands[1] for step, opcode, operands in self.events() if opcode == LAYOUT}  # Re-roll generated layouts as the game did
+        world.create_level()  # Create the first level
+        return world  # Return world
+
+    def run(self, realtime=False, on_step=None):  # Define run method
+        world = self.world()  # Create world
+        cursor_x, cursor_y = 0, 0  # Initialize cursor
+        step, expected = 0, None  # Initialize steps run and recorded checksum
+        start = time.perf_counter()  # Start timer
+        for event_step, opcode, operands in self.events():  # Iterate over events
+            while step < event_step:  # Run steps up to the event
+                if realtime:  # Check if replay is paced
+                    delay = start + step * STEP - time.perf_counter()  # Calculate time until this step is due
+                    if delay > 0:  # Check if step is early
+                        time.sleep(delay)  # Wait
+                world.step(STEP)  # Advance simulation by one fixed step
+                step += 1  # Count step
+                if on_step is not None:  # Check if a step callback is set
+                    on_step(world, step)  # Report step
+            if opcode == AIM:  # Check if cursor moved
+                cursor_x, cursor_y = cursor_x + operands[0], cursor_y + operands[1]  # Move cursor
+                world.aim(cursor_x, cursor_y)  # Aim cannon
+            elif opcode == FIRE:  # Check if player fired
+                world.fire(cursor_x + operands[0], cursor_y + operands[1])  # Fire the selected weapon
+            elif opcode == MODE:  # Check if weapon changed
+                world.shooting_mode = MODES[operands[0]]  # Set shooting mode
+            elif opcode == MOVE:  # Check if cannon direction changed
+                world.cannon_direction = operands[0]  # Set cannon direction
+            elif opcode == RESIZE:  # Check if window was resized
+                world.resize(*operands)  # Resize world
+            elif opcode == RESET:  # Check if game was restarted
+                world.reset()  # Reset world
+            elif opcode == END:  # Check if recording ended
+                expected = operands[0]  # Get recorded checksum
+            world.drain_events()  # Drop events the view would have shown
+        elapsed = time.perf_counter() - start  # Calculate replay time
+        matched = expected is None or fingerprint(world) == expected  # Compare final state with the recording
+        if not matched:  # Check if replay diverged
+            logger.warning('Replay diverged from the recorded session')  # Log warning
+        return world, {'steps': step, 'seconds': elapsed, 'speedup': step * STEP / elapsed if elapsed else float('inf'),
+                       'matched': matched}  # Return final world and replay statistics
+
+# MAIN
+
+# Define the command line entry point
+def main():  # Define main function
+    parser = argparse.ArgumentParser(description="Replay a recorded session")  # Create argument parser
+    parser.add_argument('path', nargs='?', default=LAST_SESSION)  # Set recording path
+    parser.add_argument('--realtime', action='store_true', help="pace the replay at game speed")  # Set pacing
+    args = parser.parse_args()  # Parse arguments
+
+    replayer = Replayer.load(args.path)  # Load recording
+    world, stats = replayer.run(realtime=args.realtime)  # Replay session
+    print(f"Replayed {stats['steps']} steps in {stats['seconds']:.2f} s ({stats['speedup']:.0f}x game speed), "
+          f"level {world.level}, score {world.score}, state {'matches' if stats['matched'] else 'DIVERGED from'} the recording")  # Print summary
+
+# Run the replayer
+if __name__ == "__main__":  # Check if script is run directly
+    main()  # Run main
@@ -0,0 +1,389 @@
+# Hall of Fame storage: append-only score log, atomic snapshots, an in-memory top-K index and a full leaderboard (no Kivy imports)
+import bisect
+import functools
+import heapq
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import zlib
+
+# Set up logging
+logger = logging.getLogger(__name__)  # Create logger instance
+
+# Define the file names and the store settings
+HALL_OF_FAME_FILE = 'hall_of_fame.json'  # Snapshot of the best scores and of the log position it covers
+HALL_OF_FAME_LOG = 'hall_of_fame.log'  # Append-only log of every submitted score
+TOP_K = 10  # Number of best scores kept in memory and in the snapshot
+COMPACT_EVERY = 1000  # Number of logged scores between snapshots, bounds the log replayed at start up
+SNAPSHOT_VERSION = 1  # Snapshot format version
+PAGE_SIZE = 10  # Number of leaderboard rows on a Hall of Fame page
+LEADERBOARD_LOAD = 1000  # Target length of a leaderboard bucket, buckets split at twice this
+INDEX_CHUNK = 4096  # Number of log records decoded with one JSON parse while building the leaderboard
+
+# Define the record helpers
+def encode_record(seq, score, name, stamp):  # Define encode_record function
+    body = json.dumps([seq, score, name, stamp], separators=(',', ':'))  # Encode record
+    return f"{zlib.crc32(body.encode()):08x} {body}\n".encode()  # Prefix checksum so torn writes are detected
+
+def decode_record(line):  # Define decode_record function
+    if not line.endswith(b'\n') or len(line) < 10:  # Check if record was cut short
+        raise ValueError('truncated record')  # Raise error
+    checksum, body = line[:8], line[9:-1]  # Split checksum and body
+    if int(checksum, 16) != zlib.crc32(body):  # Check if body matches its checksum
+        raise ValueError('checksum mismatch')  # Raise error
+    seq, score, name, stamp = json.loads(body)  # Decode record
+    return seq, score, name, stamp  # Return fields
+
+def decode_records(lines):  # Define decode_records function
+    for line in lines:  # Iterate over records
+        if not line.endswith(b'\n') or int(line[:8], 16) != zlib.crc32(line[9:-1]):  # Check if record is torn
+            raise ValueError('damaged record')  # Raise error
+    return json.loads(b'[' + b','.join(line[9:-1] for line in lines) + b']')  # Parse every body at once, much cheaper than one parse per record
+
+# Define the helper that replaces a file without ever leaving it half written
+def write_atomic(path, data):  # Define write_atomic function
+    temporary = path + '.tmp'  # Get temporary path
+    with open(temporary, 'wb') as file:  # Open temporary file
+        file.write(data)  # Write data
+        file.flush()  # Flush Python buffers
+        os.fsync(file.fileno())  # Flush data to disk before the rename
+    os.replace(temporary, path)  # Swap files atomically
+    sync_directory(path)  # Persist the rename
+
+def sync_directory(path):  # Define sync_directory function
+    if not hasattr(os, 'O_DIRECTORY'):  # Check if directories cannot be opened, as on Windows
+        return  # Return
+    descriptor = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)  # Open directory
+    try:  # Try to flush directory entry
+        os.fsync(descriptor)  # Flush directory entry
+    finally:  # Always close directory
+        os.close(descriptor)  # Close directory
+
+# Define the top-K index class
+class TopScores:  # Define TopScores class, a min-heap holding the best scores seen
+    def __init__(self, size=TOP_K):  # Initialize TopScores
+        self.size = size  # Set number of scores kept
+        self.heap = []  # Initialize heap of (score, -seq, name), worst kept score at the root
+        self.ranked = None  # Initialize cached best-first list
+
+    def add(self, seq, score, name):  # Define add method
+        entry = (score, -seq, name)  # Rank higher scores first, earlier submissions first on ties
+        if len(self.heap) < self.size:  # Check if index is not full
+            heapq.heappush(self.heap, entry)  # Keep score
+        elif entry > self.heap[0]:  # Check if score beats the worst kept score
+            heapq.heapreplace(self.heap, entry)  # Replace worst kept score
+        else:  # If score does not make the cut
+            return False  # Return unchanged
+        self.ranked = None  # Invalidate cached list
+        return True  # Return changed
+
+    def entries(self):  # Define entries method
+        if self.ranked is None:  # Check if cached list is stale
+            self.ranked = [{'name': name, 'score': score, 'seq': -seq} for score, seq, name in sorted(self.heap, reverse=True)]  # Rank best first
+        return self.ranked  # Return best-first entries
+
+# Define the leaderboard class
+class Leaderboard:  # Define Leaderboard class, an order-statistics index over every score
+    def __init__(self, load=LEADERBOARD_LOAD):  # Initialize Leaderboard
+        self.load = load  # Set target bucket length
+        self.buckets = []  # Initialize sorted buckets of (-score, seq, name), best first
+        self.maxes = []  # Initialize last key of each bucket, bisected to find a bucket
+        self.tree = []  # Initialize Fenwick tree over bucket lengths, turns positions into buckets in O(log n)
+        self.size = 0  # Initialize number of scores
+        self.best_by_name = {}  # Map names to their best (score, seq)
+
+    def __len__(self):  # Define __len__ method
+        return self.size  # Return number of scores
+
+    def build(self, keys):  # Define build method
+        keys.sort()  # Sort keys best first in one pass
+        self.buckets = [keys[i:i + self.load] for i in range(0, len(keys), self.load)]  # Cut keys into buckets
+        self.maxes = [bucket[-1] for bucket in self.buckets]  # Record last key of each bucket
+        self.size = len(keys)  # Set number of scores
+        self.best_by_name = {}  # Reset best scores
+        for negative_score, seq, name in reversed(keys):  # Iterate from worst to best so the best overwrites
+            self.best_by_name[name] = (-negative_score, seq)  # Record best score
+        self.reindex()  # Build Fenwick tree
+
+    def reindex(self):  # Define reindex method
+        self.tree = [len(bucket) for bucket in self.buckets]  # Start from bucket lengths
+        for i in range(len(self.tree)):  # Iterate over nodes
+            parent = i | (i + 1)  # Get parent node
+            if parent < len(self.tree):  # Check if parent exists
+                self.tree[parent] += self.tree[i]  # Add node to parent
+
+    def add(self, seq, score, name):  # Define add method
+        key = (-score, seq, name)  # Order higher scores first, earlier submissions first on ties
+        best = self.best_by_name.get(name)  # Get best score of this name
+        if best is None or (-score, seq) < (-best[0], best[1]):  # Check if score is the name's best
+            self.best_by_name[name] = (score, seq)  # Record best score
+        self.size += 1  # Count score
+        if not self.buckets:  # Check if leaderboard is empty
+            self.buckets, self.maxes = [[key]], [key]  # Create first bucket
+            self.reindex()  # Build Fenwick tree
+            return  # Return
+        i = min(bisect.bisect_left(self.maxes, key), len(self.buckets) - 1)  # Find bucket, past the end goes in the last one
+        bucket = self.buckets[i]  # Get bucket
+        bisect.insort(bucket, key)  # Insert key
+        self.maxes[i] = bucket[-1]  # Update last key
+        if len(bucket) > 2 * self.load:  # Check if bucket grew too long
+            self.buckets[i:i + 1] = [bucket[:self.load], bucket[self.load:]]  # Split bucket
+            self.maxes[i:i + 1] = [bucket[self.load - 1], bucket[-1]]  # Update last keys
+            self.reindex()  # Rebuild Fenwick tree, bucket count changed
+            return  # Return
+        while i < len(self.tree):  # Walk up the Fenwick tree
+            self.tree[i] += 1  # Count key
+            i |= i + 1  # Move to parent
+
+    def before(self, bucket):  # Define before method
+        total = 0  # Initialize number of keys in earlier buckets
+        while bucket > 0:  # Walk down the Fenwick tree
+            total += self.tree[bucket - 1]  # Add node
+            bucket &= bucket - 1  # Move to previous node
+        return total  # Return number of keys
+
+    def locate(self, position):  # Define locate method
+        bucket = 0  # Initialize bucket index
+        step = 1 << len(self.tree).bit_length()  # Start from the highest power of two
+        while step:  # Binary lift through the Fenwick tree
+            node = bucket + step  # Get candidate bucket count
+            if node <= len(self.tree) and self.tree[node - 1] <= position:  # Check if position lies past these buckets
+                bucket = node  # Skip buckets
+                position -= self.tree[node - 1]  # Skip their keys
+            step >>= 1  # Halve step
+        return bucket, position  # Return bucket and offset inside it
+
+    def rank(self, score):  # Define rank method
+        key = (-score,)  # Sort before every key with this score
+        i = bisect.bisect_left(self.maxes, key)  # Find bucket
+        if i == len(self.buckets):  # Check if every score is higher
+            return self.size + 1  # Return rank after everyone
+        return self.before(i) + bisect.bisect_left(self.buckets[i], key) + 1  # Return one plus the number of higher scores
+
+    def page(self, number, size=PAGE_SIZE):  # Define page method
+        start = number * size  # Get position of the first row
+        if start < 0 or start >= self.size:  # Check if page is empty
+            return []  # Return no rows
+        bucket, offset = self.locate(start)  # Find first row
+        rows = []  # Initialize rows
+        while len(rows) < size and bucket < len(self.buckets):  # Collect rows across buckets
+            for negative_score, seq, name in self.buckets[bucket][offset:offset + size - len(rows)]:  # Iterate over rows in bucket
+                rows.append({'rank': start + len(rows) + 1, 'name': name, 'score': -negative_score, 'seq': seq})  # Add row
+            bucket, offset = bucket + 1, 0  # Move to next bucket
+        return rows  # Return rows
+
+    def pages(self, size=PAGE_SIZE):  # Define pages method
+        return max(-(-self.size // size), 1)  # Return number of pages, at least one
+
+    def best(self, name):  # Define best method
+        best = self.best_by_name.get(name)  # Get best score of this name
+        if best is None:  # Check if name never scored
+            return None  # Return nothing
+        return {'name': name, 'score': best[0], 'rank': self.rank(best[0])}  # Return best score and its rank
+
+# Define the score store class
+class ScoreStore:  # Define ScoreStore class, crash-safe Hall of Fame persistence with a background writer
+    def __init__(self, path=HALL_OF_FAME_FILE, log_path=HALL_OF_FAME_LOG, top=TOP_K, compact_every=COMPACT_EVERY):  # Initialize ScoreStore
+        self.path = path  # Set snapshot path
+        self.log_path = log_path  # Set log path
+        self.compact_every = compact_every  # Set number of logged scores between snapshots
+        self.index = TopScores(top)  # Initialize index read by the UI, includes scores not yet on disk
+        self.durable = TopScores(top)  # Initialize index of the scores on disk, owned by the writer
+        self.next_seq = 0  # Initialize sequence number of the next submission
+        self.log_offset = 0  # Initialize log position covered by the snapshot
+        self.logged_seq = 0  # Initialize sequence number following the last durable score
+        self.since_snapshot = 0  # Initialize number of scores logged after the snapshot
+        self.written = 0  # Initialize number of scores made durable by this process
+        self.requests = queue.Queue()  # Initialize records for the writer
+        self.legacy = []  # Initialize old Hall of Fame entries that are not in the log yet
+        self.board = Leaderboard()  # Initialize leaderboard of every score
+        self.board_lock = threading.Lock()  # Guard leaderboard, filled by the indexer and the UI
+        self.board_ready = threading.Event()  # Initialize whether the leaderboard holds the whole log
+        self.load()  # Recover state from disk
+        self.logged_seq = self.next_seq  # Everything recovered is durable
+        self.log = open(self.log_path, 'ab')  # Open log for appending
+        if self.legacy:  # Check if old entries must be moved into the log
+            self.append([(entry['seq'], entry['score'], entry['name'], time.time()) for entry in self.legacy])  # Log old entries
+            self.compact()  # Replace old snapshot
+        self.log_end = self.log.tell()  # Get end of the log written by earlier runs
+        self.worker = threading.Thread(target=self.work, name='score-writer', daemon=True)  # Create writer thread
+        self.worker.start()  # Start writer thread
+        self.indexer = threading.Thread(target=self.index_log, name='score-indexer', daemon=True)  # Create leaderboard thread
+        self.indexer.start()  # Start reading the whole log in the background
+
+    def load(self):  # Define load method
+        start = time.perf_counter()  # Start timer
+        top = []  # Initialize snapshot entries
+        if os.path.exists(self.path):  # Check if snapshot exists
+            try:  # Try to read snapshot
+                with open(self.path, 'r') as file:  # Open snapshot
+                    snapshot = json.load(file)  # Load JSON data
+            except (OSError, ValueError) as e:  # Handle unreadable snapshot
+                logger.warning(f'Ignoring unreadable Hall of Fame snapshot: {e}')  # Log warning
+                snapshot = {}  # Replay the whole log instead
+            if isinstance(snapshot, list):  # Check if snapshot is a plain list from older versions
+                self.legacy = [dict(entry, seq=i) for i, entry in enumerate(snapshot)]  # Keep old entries in their order
+                for entry in self.legacy:  # Iterate over old entries
+                    self.index.add(entry['seq'], entry['score'], entry['name'])  # Add entry to index, the log adds it to the durable one
+                self.next_seq = len(self.legacy)  # Number new submissions after them
+            elif snapshot.get('version') == SNAPSHOT_VERSION:  # Check if snapshot format is known
+                top = snapshot['top']  # Get best scores
+                self.log_offset = snapshot['log_offset']  # Get log position covered
+                self.next_seq = snapshot['next_seq']  # Get next sequence number
+        for entry in top:  # Iterate over snapshot entries
+            self.index.add(entry['seq'], entry['score'], entry['name'])  # Add entry to index
+            self.durable.add(entry['seq'], entry['score'], entry['name'])  # Add entry to durable index
+        replayed = self.replay()  # Add scores logged after the snapshot
+        logger.debug(f'Loaded Hall of Fame, replayed {replayed} logged scores in {(time.perf_counter() - start) * 1000:.1f} ms')  # Log load
+
+    def replay(self):  # Define replay method
+        if not os.path.exists(self.log_path):  # Check if log exists
+            return 0  # Return nothing replayed
+        replayed = 0  # Initialize number of replayed scores
+        with open(self.log_path, 'r+b') as file:  # Open log
+            if os.path.getsize(self.log_path) < self.log_offset:  # Check if log is shorter than the snapshot says
+                logger.warning('Hall of Fame log is shorter than its snapshot, replaying it whole')  # Log warning
+                self.log_offset = 0  # Replay whole log
+            file.seek(self.log_offset)  # Skip scores the snapshot covers
+            position = self.log_offset  # Initialize position of the next record
+            for line in file:  # Iterate over records
+                try:  # Try to decode record
+                    seq, score, name, stamp = decode_record(line)  # Decode record
+                except ValueError as e:  # Handle record torn by a crash
+                    logger.warning(f'Truncating Hall of Fame log at byte {position}: {e}')  # Log warning
+                    file.truncate(position)  # Drop torn tail, everything before it was synced
+                    break  # Stop replay
+                self.index.add(seq, score, name)  # Add score to index
+                self.durable.add(seq, score, name)  # Add score to durable index
+                self.next_seq = max(self.next_seq, seq + 1)  # Advance sequence number
+                position += len(line)  # Move past record
+                replayed += 1  # Count replayed score
+        self.since_snapshot = replayed  # Count scores not covered by the snapshot
+        return replayed  # Return number of replayed scores
+
+    def submit(self, name, score):  # Define submit method
+        seq = self.next_seq  # Get sequence number
+        self.next_seq += 1  # Advance sequence number
+        self.index.add(seq, score, name)  # Show score at once
+        with self.board_lock:  # Lock leaderboard
+            self.board.add(seq, score, name)  # Rank score at once
+        self.requests.put((seq, score, name, time.time()))  # Hand record to the writer
+
+    def top(self, count=None):  # Define top method
+        entries = self.index.entries()  # Get best-first entries
+        return entries if count is None else entries[:count]  # Return best scores
+
+    def index_log(self):  # Define index_log method, runs on the indexer thread
+        start = time.perf_counter()  # Start timer
+        keys = []  # Initialize keys of logged scores
+        try:  # Try to read log
+            with open(self.log_path, 'rb') as file:  # Open log
+                position = 0  # Initialize position of the next record
+                while position < self.log_end:  # Read records logged by earlier runs, the UI ranks the ones logged by this run
+                    lines = list(itertools.islice(file, INDEX_CHUNK))  # Read chunk of records
+                    if not lines:  # Check if log ended
+                        break  # Stop reading
+                    for i, line in enumerate(lines):  # Iterate over records
+                        position += len(line)  # Move past record
+                        if position > self.log_end:  # Check if record was logged by this run
+                            del lines[i:]  # Drop it and the records after it
+                            break  # Stop chunk
+                    keys.extend((-score, seq, name) for seq, score, name, stamp in decode_records(lines))  # Add keys
+        except (OSError, ValueError) as e:  # Handle unreadable log
+            logger.error(f'Error indexing Hall of Fame log: {e}')  # Log error
+        with self.board_lock:  # Lock leaderboard
+            for bucket in self.board.buckets:  # Iterate over scores ranked by the UI meanwhile
+                keys.extend(bucket)  # Keep them
+            self.board.build(keys)  # Rebuild leaderboard
+        self.board_ready.set()  # Mark leaderboard as complete
+        logger.debug(f'Indexed {len(keys)} Hall of Fame scores in {(time.perf_counter() - start) * 1000:.0f} ms')  # Log indexing
+
+    def rank(self, score):  # Define rank method
+        if not self.board_ready.is_set():  # Check if the log is still being indexed
+            entries = self.top()  # Get best scores, complete while the leaderboard is not
+            higher = sum(entry['score'] > score for entry in entries)  # Count kept scores above this one
+            if higher < len(entries) or len(entries) < self.index.size:  # Check if the score would make the top-K index, every higher score is then kept
+                return higher + 1  # Return exact rank
+            return None  # Return unknown rank, it lies below the top-K index
+        with self.board_lock:  # Lock leaderboard
+            return self.board.rank(score)  # Return rank the score would take
+
+    def page(self, number, size=PAGE_SIZE):  # Define page method
+        if not self.board_ready.is_set():  # Check if the log is still being indexed
+            return [dict(entry, rank=i + 1) for i, entry in enumerate(self.top(size))] if number == 0 else []  # Serve the first page from the top-K index
+        with self.board_lock:  # Lock leaderboard
+            return self.board.page(number, size)  # Return rows of a page
+
+    def pages(self, size=PAGE_SIZE):  # Define pages method
+        if not self.board_ready.is_set():  # Check if the log is still being indexed
+            return 1  # Return only the first page
+        with self.board_lock:  # Lock leaderboard
+            return self.board.pages(size)  # Return number of pages
+
+    def best(self, name):  # Define best method
+        if not self.board_ready.is_set():  # Check if the log is still being indexed
+            return None  # Return nothing, earlier runs' scores are not ranked yet
+        with self.board_lock:  # Lock leaderboard
+            return self.board.best(name)  # Return best score of a name
+
+    def work(self):  # Define work method, runs on the writer thread
+        while True:  # Serve records until closed
+            batch = [self.requests.get()]  # Wait for next record
+            while True:  # Collect records that queued up meanwhile
+                try:  # Try to take another record
+                    batch.append(self.requests.get_nowait())  # Take record
+                except queue.Empty:  # Handle empty queue
+                    break  # Stop collecting
+            records = [record for record in batch if record is not None]  # Drop close markers
+            try:  # Try to persist records
+                if records:  # Check if there is anything to write
+                    self.append(records)  # Write batch with one sync
+                if None in batch or self.since_snapshot >= self.compact_every:  # Check if a snapshot is due
+                    self.compact()  # Write snapshot
+            except OSError as e:  # Handle full or failing disk
+                logger.error(f'Error saving Hall of Fame: {e}')  # Log error
+            for _ in batch:  # Iterate over handled requests
+                self.requests.task_done()  # Mark request as handled
+            if None in batch:  # Check if store was closed
+                return  # Stop writer
+
+    def append(self, records):  # Define append method
+        self.log.write(b''.join(encode_record(*record) for record in records))  # Append records
+        self.log.flush()  # Flush Python buffers
+        os.fsync(self.log.fileno())  # Make records survive a power cut before counting them
+        for seq, score, name, stamp in records:  # Iterate over durable records
+            self.durable.add(seq, score, name)  # Add score to durable index
+            self.logged_seq = max(self.logged_seq, seq + 1)  # Advance durable sequence number
+        self.since_snapshot += len(records)  # Count scores after the snapshot
+        self.written += len(records)  # Count durable scores
+
+    def compact(self):  # Define compact method
+        offset = self.log.tell()  # Get end of the synced log
+        snapshot = {'version': SNAPSHOT_VERSION, 'log_offset': offset, 'next_seq': self.logged_seq,
+                    'top': self.durable.entries()}  # Describe durable state
+        write_atomic(self.path, json.dumps(snapshot, indent=4).encode())  # Replace snapshot atomically
+        self.log_offset = offset  # Remember log position covered
+        self.since_snapshot = 0  # Reset scores after the snapshot
+
+    def flush(self):  # Define flush method
+        self.requests.join()  # Wait until every submitted score is on disk
+
+    def close(self):  # Define close method
+        if not self.worker.is_alive():  # Check if store is already closed
+            return  # Return
+        self.requests.put(None)  # Ask writer to snapshot and stop
+        self.worker.join()  # Wait for writer
+        self.log.close()  # Close log
+
+    def stats(self):  # Define stats method
+        return {'next_seq': self.next_seq, 'written': self.written, 'queued': self.requests.qsize(),
+                'since_snapshot': self.since_snapshot, 'snapshot_offset': self.log_offset}  # Return store statistics
+
+# Define the shared score store
+@functools.lru_cache(maxsize=None)
+def default_scores():  # Define default_scores function
+    return ScoreStore()  # Open the Hall of Fame once per process
@@ -0,0 +1,238 @@
+# Vectorized auto-aim solver for bots, attract mode and level difficulty tuning (no Kivy imports)
+# Rate the levels of a pack with: python solver.py --seeds 20
+import argparse
+import logging
+import math
+import time
+
+import numpy as np
+
+from world import World, STEP, GRAVITY, WORMHOLE_COOLDOWN, Projectile, Bombshell
+
+# Set up logging
+logger = logging.getLogger(__name__)  # Create logger instance
+
+# Define the solver settings
+SOLVER_BUDGET = 0.002  # Seconds of solving per call, small enough to run inside a frame
+HORIZON = 3  # Seconds of flight simulated per candidate, the target sits in the right third
+ANGLES = 64  # Number of candidate launch angles
+FORCES = 24  # Number of candidate launch speeds
+ANGLE_RANGE = (-20, 90)  # Lowest and highest candidate angles in degrees
+FORCE_RANGE = (0.15, 1)  # Lowest and highest candidate speeds as a fraction of the weapon force
+LAUNCH_DELAY = 0.5  # Seconds between planning and firing, the solve is sliced over the frames in between
+BODIES = {'projectile': Projectile, 'bombshell': Bombshell}  # Map solvable weapons to their body
+
+# Define the helper testing boxes against many boxes at once
+def overlaps(x, y, width, height, box_x, box_y, box_width, box_height):  # Define overlaps function, same rules as Body.collide
+    return ~((x[:, None] + width < box_x) | (x[:, None] > box_x + box_width) |
+             (y[:, None] + height < box_y) | (y[:, None] > box_y + box_height))  # Return candidates by boxes overlap matrix
+
+# Define the candidate batch class
+class ShotBatch:  # Define ShotBatch class, one weapon's candidate shots stepped together in NumPy arrays
+    def __init__(self, weapon, angles, speeds, cannon):  # Initialize ShotBatch
+        self.weapon = weapon  # Set weapon
+        self.width = BODIES[weapon].width  # Set body width
+        self.height = BODIES[weapon].height  # Set body height
+        self.angles = angles  # Set launch angles in radians
+        self.speeds = speeds  # Set launch speeds
+        cannon_x, cannon_y = cannon  # Get cannon centre
+        barrel_x = cannon_x + 100 * np.cos(angles)  # Calculate barrel end x positions, as the world fires
+        barrel_y = cannon_y + 100 * np.sin(angles)  # Calculate barrel end y positions
+        self.x = barrel_x - self.width / 2  # Set lower-left x positions
+        self.y = barrel_y - self.height / 2  # Set lower-left y positions
+        self.velocity_x = speeds * np.cos(angles)  # Set x velocities
+        self.velocity_y = speeds * np.sin(angles)  # Set y velocities
+        self.last_transport_time = np.full(angles.shape, -np.inf)  # Set wormhole cooldowns
+        self.index = np.arange(angles.size)  # Map live rows to candidates
+        self.hit_time = np.full(angles.shape, np.inf)  # Initialize flight time to the target, inf for misses
+        self.miss = np.full(angles.shape, np.inf)  # Initialize closest approach to the target centre
+
+    def __len__(self):  # Define __len__ method
+        return self.index.size  # Return number of live candidates
+
+    def kill(self, dead):  # Define kill method
+        if not dead.any():  # Check if every candidate survives
+            return  # Return
+        keep = ~dead  # Get surviving rows
+        for name in ('x', 'y', 'velocity_x', 'velocity_y', 'last_transport_time', 'index'):  # Iterate over columns
+            setattr(self, name, getattr(self, name)[keep])  # Drop finished rows, later steps only touch live shots
+
+# Define the solver class
+class AimSolver:  # Define AimSolver class, simulates thousands of candidate shots with the world's physics and keeps the hits
+    def __init__(self, world, angles=ANGLES, forces=FORCES, horizon=HORIZON):  # Initialize AimSolver
+        self.world = world  # Set simulation world
+        self.angles = angles  # Set number of candidate angles
+        self.forces = forces  # Set number of candidate speeds
+        self.horizon = round(horizon / STEP)  # Set steps simulated per candidate
+        self.batches = []  # Initialize candidate batches
+        self.step = 0  # Initialize steps simulated since launch
+        self.launch_time = 0  # Initialize simulation time the shots leave the cannon
+        self.evaluated = 0  # Initialize candidate steps simulated, for statistics
+
+    def plan(self, weapons=tuple(BODIES), delay=LAUNCH_DELAY):  # Define plan method
+        world = self.world  # Get simulation world
+        lead = round(delay / STEP)  # Get steps until launch
+        self.launch_time = world.time + lead * STEP  # Set launch time
+        self.step = 0  # Restart simulation
+        self.target_path = self.predict_target(lead + self.horizon)[lead:]  # Predict target corner for every step after launch
+        self.obstacle_path = self.predict_obstacles()  # Predict obstacle corners for every step after launch
+        angles, fractions = np.meshgrid(np.radians(np.linspace(*ANGLE_RANGE, self.angles)), np.linspace(*FORCE_RANGE, self.forces))  # Span candidate launches
+        if world.target is None:  # Check if there is nothing to aim at
+            self.batches = []  # Plan no shots
+            return  # Return
+        self.batches = [ShotBatch(weapon, angles.ravel(), fractions.ravel() * world.weapon_force(weapon), world.cannon_center())
+                        for weapon in weapons]  # Create one batch per weapon
+
+    def predict_target(self, steps):  # Define predict_target method
+        target = self.world.target  # Get target
+        path = np.empty((steps + 1, 2))  # Allocate target corners, now and after every step
+        if target is None:  # Check if there is no target
+            return path  # Return path, nothing will be simulated
+        x, y = target.x, target.y  # Start at the current position
+        path[0] = (x, y)  # Store current corner
+        for i in range(1, steps + 1):  # Iterate over steps
+            dx, dy = target.target_x - x, target.target_y - y  # Calculate distance to the waypoint
+            length = math.hypot(dx, dy)  # Calculate distance
+            if length > target.speed * STEP:  # Check if waypoint is still ahead, the next one is random and unknown
+                x, y = x + dx * target.speed * STEP / length, y + dy * target.speed * STEP / length  # Move as move_target does
+            path[i] = (x, y)  # Store corner after this step
+        return path  # Return path
+
+    def predict_obstacles(self):  # Define predict_obstacles method
+        obstacles = self.world.obstacles  # Get obstacles
+        times = self.launch_time + np.arange(self.horizon + 1) * STEP  # Positions collide one step late, update_obstacles runs last
+        amplitude = np.array([[obstacle.oscillation_amplitude] for obstacle in obstacles]).reshape(-1, 1)  # Get amplitudes
+        speed = np.array([[obstacle.oscillation_speed] for obstacle in obstacles]).reshape(-1, 1)  # Get speeds
+        origin = np.array([obstacle.initial_pos for obstacle in obstacles]).reshape(-1, 2)  # Get oscillation centres
+        return (origin[:, :1] + amplitude * np.sin(times * speed), origin[:, 1:] + amplitude * np.cos(times * speed))  # Return corners by obstacle and step
+
+    def advance(self, budget=SOLVER_BUDGET):  # Define advance method
+        deadline = time.perf_counter() + budget if budget is not None else math.inf  # Calculate deadline
+        world = self.world  # Get simulation world
+        blockers = world.perpetios + world.mirrors  # Get hazards that stop shots
+        blocker_box = tuple(np.array([getattr(hazard, name) for hazard in blockers]) for name in ('x', 'y', 'width', 'height'))  # Get blocker boxes
+        elastonio_box = tuple(np.array([getattr(hazard, name) for hazard in world.elastonios]) for name in ('x', 'y', 'width', 'height'))  # Get elastonio boxes
+        world.gravity.sync(world.gravitonios)  # Build gravity field if gravitonios changed
+        while not self.done():  # Run steps until every candidate landed
+            self.step += 1  # Advance step
+            now = self.launch_time + self.step * STEP  # Get simulation time of this step
+            target_x, target_y = self.target_path[self.step]  # Get target corner
+            for batch in self.batches:  # Iterate over weapons
+                if len(batch):  # Check if batch has live candidates
+                    self.evaluated += len(batch)  # Count candidate steps
+                    self.step_batch(batch, now, target_x, target_y, blocker_box, elastonio_box)  # Step batch
+            if time.perf_counter() > deadline:  # Check if the budget is spent
+                break  # Resume on the next call
+        return self.done()  # Return whether every candidate landed
+
+    def done(self):  # Define done method
+        return self.step >= self.horizon or not any(len(batch) for batch in self.batches)  # Check if nothing is left to simulate
+
+    def step_batch(self, batch, now, target_x, target_y, blocker_box, elastonio_box):  # Define step_batch method, the order of update_projectiles and update_bombshells
+        world = self.world  # Get simulation world
+        width, height = batch.width, batch.height  # Get body size
+        if batch.weapon == 'projectile':  # Check if batch holds projectiles
+            batch.velocity_y += GRAVITY * STEP  # Apply gravity
+            batch.x += batch.velocity_x * STEP  # Move
+            batch.y += batch.velocity_y * STEP  # Move
+            pull_x, pull_y = world.gravity.sample(batch.x + width / 2, batch.y + height / 2)  # Sample field after moving
+            batch.velocity_x += pull_x  # Apply pull
+            batch.velocity_y += pull_y  # Apply pull
+        else:  # If batch holds bombshells
+            pull_x, pull_y = world.gravity.sample(batch.x + width / 2, batch.y + height / 2)  # Sample field before moving
+            batch.velocity_x += pull_x  # Apply pull
+            batch.velocity_y += pull_y  # Apply pull
+            batch.x += batch.velocity_x * STEP  # Move
+            batch.y += batch.velocity_y * STEP  # Move
+            batch.velocity_y += GRAVITY * STEP  # Apply gravity
+        if elastonio_box[0].size:  # Check if there are elastonios
+            bounced = overlaps(batch.x, batch.y, width, height, *elastonio_box).any(axis=1)  # Find shots touching an elastonio, each bounces once
+            batch.velocity_x[bounced] *= -1  # Invert velocity_x
+            batch.velocity_y[bounced] *= -1  # Invert velocity_y
+        for wormhole in world.wormholes:  # Iterate over wormholes, same rules as ProjectileStore.transport
+            radius = wormhole.size[0] / 2  # Calculate mouth radius
+            center_x, center_y = batch.x + width / 2, batch.y + height / 2  # Calculate centres
+            ready = now - batch.last_transport_time >= WORMHOLE_COOLDOWN  # Find shots out of cooldown
+            entered1 = ready & (np.hypot(center_x - wormhole.pos1[0] - radius, center_y - wormhole.pos1[1] - radius) <= radius)  # Find shots in the first mouth
+            entered2 = ready & ~entered1 & (np.hypot(center_x - wormhole.pos2[0] - radius, center_y - wormhole.pos2[1] - radius) <= radius)  # Find shots in the second mouth
+            shift_x, shift_y = wormhole.pos2[0] - wormhole.pos1[0], wormhole.pos2[1] - wormhole.pos1[1]  # Calculate offset between mouths
+            batch.x += np.where(entered1, shift_x, 0) - np.where(entered2, shift_x, 0)  # Move shots through
+            batch.y += np.where(entered1, shift_y, 0) - np.where(entered2, shift_y, 0)  # Move shots through
+            batch.last_transport_time[entered1 | entered2] = now  # Update last_transport_time
+
+        target = self.world.target  # Get target for its size
+        hit = ~((batch.x + width < target_x) | (batch.x > target_x + target.width) |
+                       (batch.y + height < target_y) | (batch.y > target_y + target.height))  # Find shots touching the target
+        batch.hit_time[batch.index[hit]] = self.step * STEP  # Record flight time of the hits
+        distance = np.hypot(batch.x + (width - target.width) / 2 - target_x, batch.y + (height - target.height) / 2 - target_y)  # Calculate distance between centres
+        batch.miss[batch.index] = np.minimum(batch.miss[batch.index], distance)  # Track closest approach
+        dead = hit | (batch.y <= 0)  # Remove hits and shots that fell out of bounds
+        if batch.weapon == 'projectile' and world.obstacles:  # Check if obstacles stop this weapon, bombshells break through
+            obstacle_x, obstacle_y = self.obstacle_path[0][:, self.step - 1], self.obstacle_path[1][:, self.step - 1]  # Get obstacle corners
+            dead |= ((obstacle_x < batch.x[:, None]) & (batch.x[:, None] < obstacle_x + world.obstacles[0].width) &
+                     (obstacle_y < batch.y[:, None]) & (batch.y[:, None] < obstacle_y + world.obstacles[0].height)).any(axis=1)  # Remove shots inside an obstacle
+        if blocker_box[0].size:  # Check if there are perpetios or mirrors
+            dead |= overlaps(batch.x, batch.y, width, height, *blocker_box).any(axis=1)  # Remove shots touching a blocker
+        dead |= ((batch.x > world.width) & (batch.velocity_x > 0)) | ((batch.x + width < 0) & (batch.velocity_x < 0))  # Remove shots that left the screen for good
+        batch.kill(dead)  # Drop finished shots
+
+    def results(self):  # Define results method
+        cannon_x, cannon_y = self.world.cannon_center()  # Get cannon centre
+        results = []  # Initialize candidate results
+        for batch in self.batches:  # Iterate over weapons
+            force = self.world.weapon_force(batch.weapon)  # Get weapon force
+            distance = batch.speeds / force * 1000  # Invert shot_velocity, full force is reached 1000 pixels from the cannon
+            aim_x = cannon_x + distance * np.cos(batch.angles)  # Calculate aim x positions
+            aim_y = cannon_y + distance * np.sin(batch.angles)  # Calculate aim y positions
+            results.append((batch.weapon, aim_x, aim_y, batch.hit_time, batch.miss))  # Add weapon results
+        return results  # Return per-weapon arrays
+
+    def best(self, count=5):  # Define best method
+        shots = []  # Initialize best shots
+        for weapon, aim_x, aim_y, hit_time, miss in self.results():  # Iterate over weapons
+            order = np.lexsort((miss, hit_time))[:count]  # Rank hits by flight time, then misses by closest approach
+            shots += [{'weapon': weapon, 'aim': (float(aim_x[i]), float(aim_y[i])), 'hit': bool(np.isfinite(hit_time[i])),
+                       'flight': float(hit_time[i]), 'miss': float(miss[i]), 'launch_time': self.launch_time} for i in order]  # Add shots
+        shots.sort(key=lambda shot: (shot['flight'], shot['miss']))  # Rank shots of every weapon together
+        return shots[:count]  # Return best shots
+
+    def hit_rate(self):  # Define hit_rate method
+        return {weapon: float(np.isfinite(hit_time).mean()) for weapon, aim_x, aim_y, hit_time, miss in self.results()}  # Return fraction of candidates hitting, a difficulty measure
+
+    def solve(self, budget=SOLVER_BUDGET, count=5, **kwargs):  # Define solve method
+        self.plan(**kwargs)  # Span candidates
+        self.advance(budget)  # Simulate them within the budget
+        return self.best(count)  # Return best shots found so far, hits are found in order of flight time
+
+# MAIN
+
+# Define the command line entry point
+def main():  # Define main function
+    parser = argparse.ArgumentParser(description="Rate level difficulty by the share of candidate shots that hit the target")  # Create argument parser
+    parser.add_argument('--seeds', type=int, default=10)  # Set number of worlds per level
+    parser.add_argument('--size', default='800x600')  # Set window size
+    args = parser.parse_args()  # Parse arguments
+
+    logging.disable(logging.CRITICAL)  # Silence the per-level debug logging
+    width, height = (int(value) for value in args.size.split('x'))  # Parse window size
+    world = World(width=width, height=height, seed=0)  # Create world to read the number of levels
+    print(f"{'level':>5} {'projectile':>11} {'bombshell':>10} {'solve ms':>9} {'candidates':>11}")  # Print header
+    for level in range(1, world.max_level + 1):  # Iterate over levels
+        rates, elapsed, evaluated = {}, 0, 0  # Initialize level statistics
+        for seed in range(args.seeds):  # Iterate over worlds
+            world = World(width=width, height=height, seed=seed)  # Create world
+            world.level = level  # Set level
+            world.create_level()  # Create level
+            solver = AimSolver(world)  # Create solver
+            start = time.perf_counter()  # Start timer
+            solver.solve(budget=None)  # Simulate every candidate to the end
+            elapsed += time.perf_counter() - start  # Add solve time
+            evaluated += solver.angles * solver.forces * len(solver.batches)  # Count candidates
+            for weapon, rate in solver.hit_rate().items():  # Iterate over weapons
+                rates[weapon] = rates.get(weapon, 0) + rate / args.seeds  # Average hit rate
+        print(f"{level:>5} {rates['projectile']:>11.1%} {rates['bombshell']:>10.1%} {elapsed / args.seeds * 1000:>9.1f} "
+              f"{evaluated // args.seeds:>11}")  # Print results
+
+# Run the solver
+if __name__ == "__main__":  # Check if script is run directly
+    main()  # Run main
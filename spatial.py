@@ -0,0 +1,279 @@
+# Spatial indexes for the simulation core (no Kivy imports)
+import math
+
+import numpy as np
+
+# Define the default cell size, a little larger than the biggest hazard (perpetio, 150 px)
+CELL_SIZE = 160  # Set cell size in pixels
+OCCUPANCY_CELL = 8  # Set free-space grid resolution in pixels
+
+# Define the spatial hash class
+class SpatialHash:  # Define SpatialHash class, a uniform grid of buckets keyed by cell coordinates
+    def __init__(self, cell_size=CELL_SIZE):  # Initialize SpatialHash
+        self.cell_size = cell_size  # Set cell size
+        self.cells = {}  # Map cell coordinates to the bodies overlapping them
+        self.bodies = {}  # Map bodies to the cell range they occupy
+        self.tickets = {}  # Map bodies to their insertion number, so queries come back in a deterministic order
+        self.next_ticket = 0  # Initialize next insertion number
+        self.version = 0  # Initialize counter bumped whenever the set of bodies changes
+
+    def __len__(self):  # Define __len__ method
+        return len(self.bodies)  # Return number of indexed bodies
+
+    def __contains__(self, body):  # Define __contains__ method
+        return body in self.bodies  # Check if body is indexed
+
+    def cell_range(self, x, y, width, height):  # Define cell_range method
+        size = self.cell_size  # Get cell size
+        return (math.floor(x / size), math.floor(y / size),
+                math.floor((x + width) / size), math.floor((y + height) / size))  # Return first and last covered cells
+
+    def insert(self, body):  # Define insert method
+        cells = self.cell_range(body.x, body.y, body.width, body.height)  # Get covered cells
+        self.bodies[body] = cells  # Remember covered cells
+        if body not in self.tickets:  # Check if body is new
+            self.tickets[body] = self.next_ticket  # Assign insertion number
+            self.next_ticket += 1  # Increment next insertion number
+            self.version += 1  # Record change of the body set
+        x0, y0, x1, y1 = cells  # Unpack cell range
+        for cx in range(x0, x1 + 1):  # Iterate over covered columns
+            for cy in range(y0, y1 + 1):  # Iterate over covered rows
+                self.cells.setdefault((cx, cy), set()).add(body)  # Add body to bucket
+
+    def remove(self, body):  # Define remove method
+        if self.tickets.pop(body, None) is not None:  # Forget insertion number
+            self.version += 1  # Record change of the body set
+        self.unlink(body)  # Remove body from its buckets
+
+    def unlink(self, body):  # Define unlink method
+        cells = self.bodies.pop(body, None)  # Forget covered cells
+        if cells is None:  # Check if body was not indexed
+            return  # Return
+        x0, y0, x1, y1 = cells  # Unpack cell range
+        for cx in range(x0, x1 + 1):  # Iterate over covered columns
+            for cy in range(y0, y1 + 1):  # Iterate over covered rows
+                bucket = self.cells.get((cx, cy))  # Get bucket
+                if bucket is not None:  # Check if bucket exists
+                    bucket.discard(body)  # Remove body from bucket
+                    if not bucket:  # Check if bucket is empty
+                        del self.cells[(cx, cy)]  # Drop empty bucket
+
+    def update(self, body):  # Define update method
+        if self.bodies.get(body) != self.cell_range(body.x, body.y, body.width, body.height):  # Check if body changed cells
+            self.unlink(body)  # Remove body from old cells
+            self.insert(body)  # Insert body into new cells, keeping its insertion number
+
+    def clear(self):  # Define clear method
+        self.cells.clear()  # Drop every bucket
+        self.bodies.clear()  # Forget every body
+        self.tickets.clear()  # Forget every insertion number
+        self.version += 1  # Record change of the body set
+
+    def query(self, x, y, width, height):  # Define query method
+        x0, y0, x1, y1 = self.cell_range(x, y, width, height)  # Get covered cells
+        found = set()  # Initialize found bodies
+        for cx in range(x0, x1 + 1):  # Iterate over covered columns
+            for cy in range(y0, y1 + 1):  # Iterate over covered rows
+                bucket = self.cells.get((cx, cy))  # Get bucket
+                if bucket:  # Check if bucket has bodies
+                    found.update(bucket)  # Add bodies to result
+        if len(found) < 2:  # Check if there is nothing to order
+            return list(found)  # Return candidate bodies
+        return sorted(found, key=self.tickets.__getitem__)  # Return candidate bodies in insertion order
+
+    def near(self, body):  # Define near method
+        return self.query(body.x, body.y, body.width, body.height)  # Return bodies sharing a cell with body
+
+# RAY CASTING
+
+# Define the smallest ray distance counted as a hit, so a reflected ray does not hit its own mirror again
+RAY_EPSILON = 1e-6  # Set minimum hit distance in pixels
+
+# Define the ray/segment intersection helper
+def ray_segment(ox, oy, dx, dy, ax, ay, bx, by):  # Define ray_segment function
+    ex, ey = bx - ax, by - ay  # Calculate segment direction
+    denominator = dx * ey - dy * ex  # Calculate cross product of the directions
+    if abs(denominator) < 1e-12:  # Check if ray and segment are parallel
+        return None  # Return no hit
+    wx, wy = ax - ox, ay - oy  # Calculate offset from ray origin to segment start
+    t = (wx * ey - wy * ex) / denominator  # Calculate distance along the ray
+    u = (wx * dy - wy * dx) / denominator  # Calculate position along the segment
+    if t > RAY_EPSILON and 0 <= u <= 1:  # Check if the hit is ahead of the origin and on the segment
+        return t  # Return hit distance
+    return None  # Return no hit
+
+# Define the ray/box intersection helper
+def ray_box(ox, oy, dx, dy, x, y, width, height):  # Define ray_box function, slab test against an axis-aligned box
+    near, far = -math.inf, math.inf  # Initialize distances where the ray enters and leaves the box
+    for origin, direction, low, high in ((ox, dx, x, x + width), (oy, dy, y, y + height)):  # Iterate over axes
+        if direction == 0:  # Check if ray is parallel to this slab
+            if not low <= origin <= high:  # Check if ray runs outside the slab
+                return None  # Return no hit
+            continue  # Skip axis
+        t1 = (low - origin) / direction  # Calculate distance to the low side
+        t2 = (high - origin) / direction  # Calculate distance to the high side
+        near = max(near, min(t1, t2))  # Update entry distance
+        far = min(far, max(t1, t2))  # Update exit distance
+    if far < max(near, 0):  # Check if the box is missed or behind the origin
+        return None  # Return no hit
+    return max(near, 0)  # Return hit distance, zero if the origin is inside the box
+
+# Define the ray exit helper
+def ray_exit(ox, oy, dx, dy, width, height):  # Define ray_exit function
+    limits = []  # Initialize distances to the bounds crossed by the ray
+    if dx:  # Check if ray moves horizontally
+        limits.append(((width if dx > 0 else 0) - ox) / dx)  # Add distance to the left or right edge
+    if dy:  # Check if ray moves vertically
+        limits.append(((height if dy > 0 else 0) - oy) / dy)  # Add distance to the bottom or top edge
+    return max(min(limits), 0) if limits else 0  # Return distance where the ray leaves the area
+
+# PLACEMENT
+
+# Define the default number of random candidates tried before the stratified scan
+PLACEMENT_ATTEMPTS = 30  # Set number of dart throws per placement
+
+# Define the point grid class
+class PointGrid:  # Define PointGrid class, an occupancy index of placed points for minimum-distance checks
+    def __init__(self, cell_size=CELL_SIZE):  # Initialize PointGrid
+        self.cell_size = cell_size  # Set cell size
+        self.cells = {}  # Map cell coordinates to the points inside them
+        self.count = 0  # Initialize number of points
+        self.saturated = {}  # Map placement bounds to the smallest distance that no longer fits, points are never removed
+        self.strata = {}  # Map placement bounds and distance to the stratified candidates not tried yet
+
+    def __len__(self):  # Define __len__ method
+        return self.count  # Return number of points
+
+    def add(self, x, y):  # Define add method
+        key = (math.floor(x / self.cell_size), math.floor(y / self.cell_size))  # Get cell of the point
+        self.cells.setdefault(key, []).append((x, y))  # Add point to cell
+        self.count += 1  # Increment number of points
+
+    def clear(self):  # Define clear method
+        self.cells.clear()  # Drop every cell
+        self.count = 0  # Reset number of points
+        self.saturated.clear()  # Forget full areas
+        self.strata.clear()  # Forget stratified candidates
+
+    def occupied(self, x, y, limit):  # Define occupied method
+        size = self.cell_size  # Get cell size
+        reach = math.ceil(limit / size)  # Calculate number of neighbouring cells that can hold a close point
+        cx, cy = math.floor(x / size), math.floor(y / size)  # Get cell of the query point
+        for i in range(cx - reach, cx + reach + 1):  # Iterate over neighbouring columns
+            for j in range(cy - reach, cy + reach + 1):  # Iterate over neighbouring rows
+                for px, py in self.cells.get((i, j), ()):  # Iterate over points in cell
+                    if math.hypot(x - px, y - py) < limit:  # Check distance
+                        return True  # Return True
+        return False  # Return False
+
+# Define the placement helper
+def place(rng, bounds, limit, grid, attempts=PLACEMENT_ATTEMPTS):  # Define place function, bounded Poisson-disk dart throwing with a stratified fallback
+    x_min, x_max, y_min, y_max = bounds  # Unpack integer bounds, max excluded
+    if grid.saturated.get(bounds, math.inf) <= limit:  # Check if an equal or smaller distance already found no room
+        return None  # Return no position without searching again
+    candidates = grid.strata.get((bounds, limit))  # Get stratified candidates left from earlier placements
+    if candidates is None:  # Check if the area is not crowded yet
+        for _ in range(attempts):  # Iterate over dart throws
+            x, y = rng.randint(x_min, x_max - 1), rng.randint(y_min, y_max - 1)  # Pick random candidate
+            if not grid.occupied(x, y, limit):  # Check if candidate is far enough from every placed point
+                return x, y  # Return position
+        step = max(limit / math.sqrt(2), 1)  # Calculate stratum size, no stratum can hold two valid points
+        columns = math.ceil((x_max - x_min) / step)  # Calculate number of stratum columns
+        rows = math.ceil((y_max - y_min) / step)  # Calculate number of stratum rows
+        candidates = [(min(int(x_min + (i + rng.random()) * step), x_max - 1),
+                       min(int(y_min + (j + rng.random()) * step), y_max - 1)) for i in range(columns) for j in range(rows)]  # Pick one jittered point per stratum
+        rng.shuffle(candidates)  # Visit strata in random order
+        grid.strata[(bounds, limit)] = candidates  # Keep candidates, a rejected one stays rejected because points are never removed
+    while candidates:  # Iterate over remaining candidates, each one is tested once
+        x, y = candidates.pop()  # Take candidate
+        if not grid.occupied(x, y, limit):  # Check if candidate is free
+            return x, y  # Return position
+    grid.saturated[bounds] = min(limit, grid.saturated.get(bounds, math.inf))  # Remember that the area is full for this distance
+    return None  # Return no position, the area is full
+
+# FREE SPACE
+
+# Define the occupancy grid class
+class OccupancyGrid:  # Define OccupancyGrid class, blocked and free positions of one moving body over a rectangle
+    def __init__(self, x_min, x_max, y_min, y_max, cell_size=OCCUPANCY_CELL):  # Initialize OccupancyGrid
+        self.x_min = x_min  # Set left edge
+        self.y_min = y_min  # Set bottom edge
+        self.cell_size = cell_size  # Set cell size
+        self.columns = max(math.ceil((x_max - x_min) / cell_size), 1)  # Calculate number of columns
+        self.rows = max(math.ceil((y_max - y_min) / cell_size), 1)  # Calculate number of rows
+        self.counts = np.zeros((self.rows, self.columns), dtype=np.int32)  # Count blockers covering each cell
+        self.centers_x = x_min + (np.arange(self.columns) + 0.5) * cell_size  # Calculate cell centre x positions
+        self.centers_y = y_min + (np.arange(self.rows) + 0.5) * cell_size  # Calculate cell centre y positions
+        self.labels = None  # Initialize free region of each cell, rebuilt lazily after changes
+        self.regions = []  # Initialize flat cell indices of each free region
+
+    def cell(self, x, y):  # Define cell method
+        i = math.floor((x - self.x_min) / self.cell_size)  # Calculate column
+        j = math.floor((y - self.y_min) / self.cell_size)  # Calculate row
+        if 0 <= i < self.columns and 0 <= j < self.rows:  # Check if position is inside the grid
+            return j, i  # Return row and column
+        return None  # Return no cell
+
+    def mark(self, x, y, radius, delta=1):  # Define mark method
+        i0 = max(math.floor((x - radius - self.x_min) / self.cell_size), 0)  # Calculate first column in reach
+        i1 = min(math.ceil((x + radius - self.x_min) / self.cell_size), self.columns)  # Calculate last column in reach
+        j0 = max(math.floor((y - radius - self.y_min) / self.cell_size), 0)  # Calculate first row in reach
+        j1 = min(math.ceil((y + radius - self.y_min) / self.cell_size), self.rows)  # Calculate last row in reach
+        if i0 >= i1 or j0 >= j1:  # Check if blocker is out of reach
+            return  # Return
+        dx = self.centers_x[i0:i1] - x  # Calculate column offsets
+        dy = self.centers_y[j0:j1, None] - y  # Calculate row offsets
+        self.counts[j0:j1, i0:i1] += delta * (np.hypot(dx, dy) < radius)  # Cover cells closer than radius
+        self.labels = None  # Invalidate free regions
+
+    def blocked(self, x, y):  # Define blocked method, constant time
+        cell = self.cell(x, y)  # Get cell
+        return cell is None or self.counts[cell] > 0  # Positions outside the grid count as blocked
+
+    def label(self):  # Define label method, connected free regions from horizontal runs of free cells
+        free = self.counts == 0  # Find free cells
+        runs = []  # Initialize runs as (row, first column, column after last)
+        parent = []  # Initialize union-find parent of each run
+        def find(run):  # Define find function
+            while parent[run] != run:  # Walk up to the root
+                parent[run] = parent[parent[run]]  # Halve path
+                run = parent[run]  # Move up
+            return run  # Return root
+        previous = []  # Initialize runs of the row below
+        for j in range(self.rows):  # Iterate over rows
+            edges = np.flatnonzero(np.diff(np.concatenate(([0], free[j].view(np.int8), [0]))))  # Find where runs start and stop
+            current = []  # Initialize runs of this row
+            for start, stop in zip(edges[::2], edges[1::2]):  # Iterate over runs
+                run = len(runs)  # Get run number
+                runs.append((j, start, stop))  # Add run
+                parent.append(run)  # Make run its own root
+                for below_start, below_stop, below in previous:  # Iterate over runs of the row below
+                    if below_start < stop and start < below_stop:  # Check if runs touch
+                        parent[find(below)] = find(run)  # Join regions
+                current.append((start, stop, run))  # Keep run for the next row
+            previous = current  # Move up one row
+        labels = np.full(free.shape, -1, dtype=np.int32)  # Initialize labels, -1 for blocked cells
+        roots = {}  # Map root runs to region labels
+        cells = []  # Initialize flat cell ranges of each region
+        for run, (j, start, stop) in enumerate(runs):  # Iterate over runs
+            region = roots.setdefault(find(run), len(roots))  # Get region label of run
+            if region == len(cells):  # Check if region is new
+                cells.append([])  # Add region
+            labels[j, start:stop] = region  # Label cells
+            cells[region].append(np.arange(j * self.columns + start, j * self.columns + stop))  # Add cells to region
+        self.labels = labels  # Store labels
+        self.regions = [np.concatenate(ranges) for ranges in cells]  # Store regions
+
+    def random_free(self, rng, x=None, y=None):  # Define random_free method
+        if self.labels is None:  # Check if regions are stale
+            self.label()  # Rebuild regions
+        if not self.regions:  # Check if there is no free cell at all
+            return None  # Return no position
+        cell = self.cell(x, y) if x is not None else None  # Get cell of the current position
+        if cell is not None and self.labels[cell] >= 0:  # Check if current position is free
+            cells = self.regions[self.labels[cell]]  # Pick among cells reachable from it
+        else:  # If position is unknown or blocked
+            cells = max(self.regions, key=len)  # Pick among cells of the largest region
+        index = int(cells[rng.randrange(len(cells))])  # Pick random cell
+        j, i = divmod(index, self.columns)  # Get row and column
+        return float(self.centers_x[i]), float(self.centers_y[j])  # Return cell centre
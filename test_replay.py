@@ -0,0 +1,96 @@
+# Tests of the session recorder and the deterministic replay (no Kivy imports)
+# Run with: python -m pytest -q
+import random
+
+import pytest
+
+from replay import InputRecorder, Replayer, LAYOUT, MODES, read_varint, unzigzag, write_varint, zigzag
+from levels import DEFAULT_PACK, LevelPack
+from verifier import LayoutVerifier
+from world import World, GameLoop, STEP
+
+# Define the verifier stand-in that serves verdicts by re-roll instead of sweeping layouts
+class ScriptedVerifier(LayoutVerifier):  # Define ScriptedVerifier class
+    def __init__(self, reaches, path):  # Initialize ScriptedVerifier
+        super().__init__(processes=1, path=path)  # Initialize verifier without starting workers
+        self.reaches = reaches  # Set reach of each attempt, None for a late verdict
+
+    def submit(self, world):  # Define submit method
+        return str(world.layout_attempt)  # Key verdicts by attempt
+
+    def verdict(self, key, deadline=None):  # Define verdict method
+        attempt = int(key)  # Get attempt
+        reach = self.reaches[attempt] if attempt < len(self.reaches) else 1  # Get reach of the attempt, later attempts are solvable
+        return None if reach is None else {'reach': reach}  # Return verdict
+
+# Define the helper that plays a session with random input
+def record_session(seed, frames=900, width=800, height=600, verifier=None):  # Define record_session function
+    rng = random.Random(seed)  # Create input random generator
+    world = World(width=width, height=height, seed=seed)  # Create world as the game does
+    world.verifier = verifier  # Re-roll layouts the verifier rejects
+    loop = GameLoop(world)  # Create fixed timestep loop
+    recorder = InputRecorder(world, loop)  # Route every input through the recorder
+    world.create_level()  # Create the first level
+    for frame in range(frames):  # Iterate over rendered frames
+        recorder.move(rng.choice((-1, 0, 0, 1)))  # Steer cannon
+        recorder.aim(rng.uniform(0, width), rng.uniform(0, height))  # Move cursor
+        if rng.random() < 0.05:  # Check if the player switches weapon
+            recorder.select(rng.choice(MODES))  # Switch weapon
+        if rng.random() < 0.2:  # Check if the player fires
+            recorder.fire(rng.uniform(width / 2, width), rng.uniform(0, height))  # Fire at the right half
+        loop.advance(rng.uniform(0.5, 2) * STEP)  # Run a frame of uneven length, as the render loop does
+        for name, value in world.drain_events():  # Iterate over events the view would show
+            if name == 'layout_rerolled':  # Check if the verifier re-rolled a layout
+                recorder.layout(*value)  # Record the kept re-roll, as the view does
+    return world, loop, recorder  # Return final state
+
+@pytest.mark.parametrize('value', [0, 1, -1, 63, -64, 64, 127, 128, 300, -300, 2 ** 31, -(2 ** 40)])
+def test_varint_zigzag_round_trip(value):  # Define test of the operand codec
+    buffer = bytearray()  # Initialize buffer
+    write_varint(buffer, zigzag(value))  # Encode value
+    write_varint(buffer, 7)  # Encode a following value
+    decoded, offset = read_varint(buffer, 0)  # Decode value
+    assert unzigzag(decoded) == value  # Check value
+    assert read_varint(buffer, offset) == (7, len(buffer))  # Check the next value starts where this one ends
+
+@pytest.mark.parametrize('seed', range(5))
+def test_replay_matches_recording(seed):  # Define test of the record and replay round trip
+    world, loop, recorder = record_session(seed)  # Play session
+    replayed, stats = Replayer(recorder.data()).run()  # Replay session
+    assert stats['matched']  # Check final fingerprints match
+    assert stats['steps'] == loop.steps  # Check every step was replayed
+    assert (replayed.level, replayed.score, replayed.remaining_shots) == (world.level, world.score, world.remaining_shots)  # Check game state
+
+def test_replay_applies_recorded_rerolls(tmp_path):  # Define test of replays of re-rolled layouts
+    verifier = ScriptedVerifier([0, 0, None, 1], str(tmp_path / 'verdicts.json'))  # Reject two layouts, miss the budget on the third
+    world, loop, recorder = record_session(7, width=640, height=480, verifier=verifier)  # Play session at a size with no compiled layouts
+    assert world.layout_attempt == 3  # Check the late re-roll was skipped
+    replayer = Replayer(recorder.data())  # Load recording
+    assert [operands for step, opcode, operands in replayer.events() if opcode == LAYOUT][0] == [1, 3]  # Check the kept re-roll was recorded
+    replayed, stats = replayer.run()  # Replay session without a verifier
+    assert stats['matched']  # Check final fingerprints match
+    assert (replayed.level, replayed.score) == (world.level, world.score)  # Check game state
+
+def test_choose_keeps_best_verified_layout(tmp_path):  # Define test of the fallback when every layout is rejected or late
+    world = World(width=640, height=480, seed=3)  # Create world
+    world.verifier = ScriptedVerifier([0.2, 0.5, None, 0.5, 0.1], str(tmp_path / 'verdicts.json'))  # Reject every layout, miss the budget on one
+    world.create_level()  # Create level
+    assert world.layout_attempt == 1  # Check the earliest layout with the best reach is kept
+    reference = World(width=640, height=480, seed=3)  # Create world without a verifier
+    reference.layout_plan = {1: 1}  # Lay out the kept re-roll as a replay does
+    reference.create_level()  # Create level
+    assert [(o.x, o.y) for o in world.obstacles] == [(o.x, o.y) for o in reference.obstacles]  # Check the same layout was restored
+
+def test_choose_keeps_verified_unseeded_layout(tmp_path):  # Define test of levels that cannot be laid out again
+    pack = LevelPack.load(DEFAULT_PACK, baked=False)  # Load pack
+    pack.levels = [{key: value for key, value in level.items() if key != 'seed'} for level in pack.levels]  # Make every level random on every play
+    world = World(width=640, height=480, seed=3, pack=pack)  # Create world
+    world.verifier = ScriptedVerifier([0.0, None, None, None, None], str(tmp_path / 'verdicts.json'))  # Reject the layout, miss the budget on every re-roll
+    world.create_level(baked=False)  # Create level
+    assert world.layout_attempt == 0  # Check the verified layout is kept over unverified re-rolls
+    assert world.verifier.stats['late'] == 0 and world.verifier.stats['rejected'] == 1  # Check no re-roll was laid out
+    world = World(width=640, height=480, seed=3, pack=pack)  # Create world
+    world.verifier = ScriptedVerifier([0.0, 0.0, 1], str(tmp_path / 'verdicts.json'))  # Reject two layouts
+    world.verifier.budget = None  # Wait for every verdict, as compiling does
+    world.create_level(baked=False)  # Create level
+    assert world.layout_attempt == 2  # Check unseeded levels are re-rolled when no verdict can be late
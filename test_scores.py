@@ -0,0 +1,73 @@
+# Tests of the Hall of Fame leaderboard against a plain sorted list (no Kivy imports)
+# Run with: python -m pytest -q
+import random
+
+from scores import Leaderboard, ScoreStore
+
+# Define the helper that ranks scores the slow way
+def sorted_rows(entries):  # Define sorted_rows function
+    ordered = sorted(entries, key=lambda entry: (-entry[1], entry[0]))  # Order higher scores first, earlier submissions first on ties
+    return [{'rank': i + 1, 'name': name, 'score': score, 'seq': seq} for i, (seq, score, name) in enumerate(ordered)]  # Return ranked rows
+
+# Define the helper that fills a leaderboard with random scores
+def random_board(count, seed):  # Define random_board function
+    rng = random.Random(seed)  # Create test random generator
+    entries = [(seq, rng.randint(0, 500), f'p{rng.randint(0, 50)}') for seq in range(count)]  # Create scores with many ties
+    return entries, rng  # Return scores and generator
+
+def test_page_matches_sorted_list():  # Define test of pages built by add
+    entries, rng = random_board(2000, seed=1)  # Create scores
+    board = Leaderboard(load=8)  # Create leaderboard with small buckets so they split often
+    for seq, score, name in entries:  # Iterate over scores
+        board.add(seq, score, name)  # Rank score
+    rows = sorted_rows(entries)  # Rank scores the slow way
+    assert len(board) == len(rows)  # Check number of scores
+    for size in (1, 7, 10):  # Iterate over page sizes
+        assert board.pages(size) == -(-len(rows) // size)  # Check number of pages
+        for number in range(board.pages(size)):  # Iterate over pages
+            assert board.page(number, size) == rows[number * size:(number + 1) * size]  # Check page rows
+    assert board.page(board.pages(10), 10) == [] and board.page(-1) == []  # Check pages out of range
+
+def test_page_after_build_matches_sorted_list():  # Define test of pages built in one pass
+    entries, rng = random_board(1500, seed=2)  # Create scores
+    board = Leaderboard(load=16)  # Create leaderboard
+    board.build([(-score, seq, name) for seq, score, name in entries[:1000]])  # Index most scores at once, as index_log does
+    for seq, score, name in entries[1000:]:  # Iterate over later scores
+        board.add(seq, score, name)  # Rank score
+    rows = sorted_rows(entries)  # Rank scores the slow way
+    for number in range(board.pages()):  # Iterate over pages
+        assert board.page(number) == rows[number * 10:(number + 1) * 10]  # Check page rows
+
+def test_rank_matches_sorted_list():  # Define test of ranks
+    entries, rng = random_board(1000, seed=3)  # Create scores
+    board = Leaderboard(load=8)  # Create leaderboard
+    for seq, score, name in entries:  # Iterate over scores
+        board.add(seq, score, name)  # Rank score
+    scores = [score for seq, score, name in entries]  # Get scores
+    for probe in [-1, 0, 250, 500, 501] + [rng.randint(0, 500) for _ in range(200)]:  # Iterate over probe scores
+        assert board.rank(probe) == sum(score > probe for score in scores) + 1  # Check rank is one plus the number of higher scores
+
+def test_best_matches_sorted_list():  # Define test of best scores by name
+    entries, rng = random_board(500, seed=4)  # Create scores
+    board = Leaderboard(load=8)  # Create leaderboard
+    for seq, score, name in entries:  # Iterate over scores
+        board.add(seq, score, name)  # Rank score
+    expected = {}  # Initialize best score of each name
+    for row in sorted_rows(entries):  # Iterate from best to worst
+        expected.setdefault(row['name'], row['score'])  # Keep the first, best score
+    for name, score in expected.items():  # Iterate over names
+        assert board.best(name) == {'name': name, 'score': score, 'rank': board.rank(score)}  # Check best score and its rank
+    assert board.best('nobody') is None  # Check unknown name
+
+def test_store_rank_before_indexing(tmp_path):  # Define test of ranks served while the log is indexed
+    store = ScoreStore(str(tmp_path / 'hall_of_fame.json'), str(tmp_path / 'hall_of_fame.log'), top=3)  # Create store
+    try:  # Rank scores
+        assert store.board_ready.wait(5)  # Wait for the indexer thread
+        for i, score in enumerate([50, 40, 30, 20, 10]):  # Iterate over scores
+            store.submit(f'p{i}', score)  # Submit score
+        assert [store.rank(score) for score in (60, 45, 35, 25, 5)] == [1, 2, 3, 4, 6]  # Check ranks from the leaderboard
+        store.board_ready.clear()  # Pretend the log is still being indexed
+        assert [store.rank(score) for score in (60, 45, 35, 25, 5)] == [1, 2, 3, None, None]  # Check ranks from the top-K index
+        assert store.best('p1') is None  # Check best scores wait for the index
+    finally:  # Stop writer
+        store.close()  # Close store
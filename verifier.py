@@ -0,0 +1,304 @@
+# Solvability verifier of generated levels, run ahead of time on a process pool with a verdict cache (no Kivy imports)
+# Verify the levels of a pack with: python verifier.py --seeds 20
+import argparse
+import functools
+import hashlib
+import json
+import logging
+import math
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+from levels import DEFAULT_PACK, LevelPack, layout_rows
+from solver import AimSolver, BODIES
+from spatial import ray_box
+from world import World, Target, LAYOUT_REROLLS, SHOTS_PER_LEVEL
+
+# Set up logging
+logger = logging.getLogger(__name__)  # Create logger instance
+
+# Define the verifier settings
+VERIFY_CACHE = 'verified_layouts.json'  # Verdicts by layout hash, kept between sessions
+CACHE_VERSION = 1  # Verdict format version, bump when the sweep changes so old verdicts are dropped
+VERIFY_BUDGET = 0.008  # Seconds create_level may wait for verdicts, half a frame at 60 fps
+SAMPLES = 24  # Target positions sampled from the target's free space
+SWEEP_ANGLES = 32  # Candidate launch angles per ballistic weapon, a coarse version of the auto-aim sweep
+SWEEP_FORCES = 12  # Candidate launch speeds per ballistic weapon
+BEAM_ANGLES = 361  # Cannon angles swept for the hitscan beam, half a degree apart
+TARGET_LIFE = 10  # Target life of levels whose pack does not tune it, as Target sets it
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'  # Start workers from a clean interpreter, never by forking the Kivy process
+
+# Define the helper that hashes a layout
+def layout_key(world):  # Define layout_key function
+    digest = hashlib.sha1(f'{CACHE_VERSION}:{int(world.width)}x{int(world.height)}:'
+                          f"{world.weapon_force('projectile')}:{world.weapon_force('bombshell')}".encode())  # Hash everything the sweep depends on
+    digest.update(np.ascontiguousarray(layout_rows(world)).tobytes())  # Hash hazard records
+    return digest.hexdigest()  # Return layout hash
+
+# Define the helper that describes a layout to the workers
+def describe(world):  # Define describe function
+    return {'width': world.width, 'height': world.height, 'level': world.pack.level(world.level),
+            'hazards': layout_rows(world).tolist()}  # Return picklable layout description
+
+# WORKERS
+
+# Define the worker initializer
+def init_worker():  # Define init_worker function
+    logging.disable(logging.CRITICAL)  # Silence the per-level debug logging
+
+# Define the helper that starts the workers
+def start_pool(processes):  # Define start_pool function
+    context = multiprocessing.get_context(START_METHOD)  # Get start method
+    main = vars(sys.modules['__main__'])  # Get namespace of the running script
+    if main.get('verify_chunk') is verify_chunk:  # Check if the verifier is the running script, its tasks then live in __main__
+        return context.Pool(processes, initializer=init_worker)  # Start workers importing the script
+    hidden = {name: main.get(name) for name in ('__file__', '__spec__')}  # Get the names workers find the script by
+    main.pop('__file__', None)  # Hide the script, workers would re-import it and open a game window
+    main['__spec__'] = None  # Hide the script's module name too
+    try:  # Start workers
+        return context.Pool(processes, initializer=init_worker)  # Start workers importing only this module
+    finally:  # Restore the script
+        main.update({name: value for name, value in hidden.items() if value is not None or name == '__spec__'})  # Restore the hidden names
+
+# Define the helper that rebuilds a described layout
+def rebuild(description):  # Define rebuild function
+    pack = LevelPack([description['level']])  # Create one-level pack carrying the level's tuning
+    world = World(width=description['width'], height=description['height'], seed=0, pack=pack)  # Create world with the cannon where levels start
+    world.load_layout({'hazards': np.array(description['hazards'], dtype=np.float64).reshape(-1, 5), 'target_space': None})  # Load hazards and build the target's free space
+    world.target = Target(image_source='', world=world)  # Create target for its size
+    return world  # Return world
+
+# Define the helper that picks the sampled target positions
+def sample_positions(world, count=SAMPLES):  # Define sample_positions function
+    space = world.target_space  # Get the target's free-space grid
+    cells = np.flatnonzero(space.counts.ravel() == 0)  # Find free cells
+    if not cells.size:  # Check if the target has no free space, it then wanders anywhere
+        cells = np.arange(space.counts.size)  # Use every cell
+    picked = np.sort(np.random.default_rng(0).choice(cells, min(count, cells.size), replace=False))  # Pick cells the same way for every worker
+    rows, columns = np.divmod(picked, space.columns)  # Get cell rows and columns
+    return list(zip(space.centers_x[columns].tolist(), space.centers_y[rows].tolist()))  # Return target corners
+
+# Define the helper that traces the beam sweep
+def beam_paths(world):  # Define beam_paths function
+    cannon_x, cannon_y = world.cannon_center()  # Get cannon centre
+    paths = []  # Initialize beam segments by angle
+    for angle in np.radians(np.linspace(-90, 90, BEAM_ANGLES)).tolist():  # Iterate over cannon angles
+        segments, blocker = world.trace_beam(cannon_x + 100 * math.cos(angle), cannon_y + 100 * math.sin(angle), angle)  # Trace beam from the barrel end
+        paths.append(segments)  # Keep segments, obstacles are left out since beams destroy them
+    return paths  # Return paths
+
+# Define the helper that tests the beam sweep against a target position
+def beam_reaches(paths, target):  # Define beam_reaches function
+    for segments in paths:  # Iterate over beams
+        for x1, y1, x2, y2 in segments:  # Iterate over segments
+            length = math.hypot(x2 - x1, y2 - y1)  # Calculate segment length
+            if length == 0:  # Check if segment is empty
+                continue  # Skip segment
+            t = ray_box(x1, y1, (x2 - x1) / length, (y2 - y1) / length, target.x, target.y, target.width, target.height)  # Intersect segment with target
+            if t is not None and t <= length:  # Check if segment crosses the target
+                return True  # Return reached
+    return False  # Return unreached
+
+# Define the worker task
+def verify_chunk(task):  # Define verify_chunk function
+    description, start, stop = task  # Unpack task
+    world = rebuild(description)  # Rebuild layout
+    target = world.target  # Get target
+    solver = AimSolver(world, angles=SWEEP_ANGLES, forces=SWEEP_FORCES)  # Create coarse solver
+    paths = beam_paths(world)  # Trace beam sweep once, beams do not depend on the target
+    rows = []  # Initialize (projectile, bombshell, beam) reach of each sample
+    for x, y in sample_positions(world)[start:stop]:  # Iterate over this task's samples
+        target.x, target.y = target.target_x, target.target_y = x, y  # Hold target still at the sample
+        solver.plan(delay=0)  # Span candidate shots
+        while not solver.advance(budget=0):  # Simulate one step at a time
+            if all(np.isfinite(batch.hit_time).any() for batch in solver.batches):  # Check if every weapon already hit
+                break  # Stop early
+        reach = [bool(np.isfinite(batch.hit_time).any()) for batch in solver.batches]  # Get ballistic reach
+        rows.append((*reach, beam_reaches(paths, target)))  # Add sample reach
+    return rows  # Return reach rows
+
+# Define the helper that turns reach rows into a verdict
+def summarize(rows):  # Define summarize function
+    reach = np.array(rows, dtype=bool).reshape(-1, len(BODIES) + 1)  # Get reach by sample and weapon
+    verdict = {weapon: float(column.mean()) if column.size else 0.0 for weapon, column in zip((*BODIES, 'beam'), reach.T)}  # Add reach per weapon
+    verdict['reach'] = float(reach.any(axis=1).mean()) if len(reach) else 0.0  # Add share of target positions some weapon hits
+    return verdict  # Return verdict
+
+# VERIFIER
+
+# Define the layout verifier class
+class LayoutVerifier:  # Define LayoutVerifier class, asynchronous verdicts by layout hash within a latency budget
+    def __init__(self, processes=None, budget=VERIFY_BUDGET, path=VERIFY_CACHE):  # Initialize LayoutVerifier
+        self.processes = processes or max(min((os.cpu_count() or 2) - 1, 4), 1)  # Set worker processes, leaving a core for the game
+        self.budget = budget  # Set seconds create_level may wait, None waits for every verdict
+        self.path = path  # Set verdict cache path
+        self.pool = None  # Initialize worker pool, started by the first submission
+        self.pending = {}  # Map layout hashes to their running worker tasks
+        self.cache = self.load()  # Map layout hashes to their verdicts
+        self.dirty = False  # Initialize whether verdicts were added since the last save
+        self.stats = {'hits': 0, 'verified': 0, 'late': 0, 'rejected': 0}  # Initialize verifier statistics
+
+    def load(self):  # Define load method
+        try:  # Try to read cache
+            with open(self.path) as file:  # Open cache
+                data = json.load(file)  # Parse cache
+        except FileNotFoundError:  # Handle first run
+            return {}  # Return empty cache
+        except (OSError, ValueError) as e:  # Handle unreadable cache
+            logger.warning(f'Ignoring verdict cache {self.path}: {e}')  # Log warning
+            return {}  # Return empty cache
+        if data.get('version') != CACHE_VERSION:  # Check if cache was written by another sweep
+            return {}  # Return empty cache
+        return data.get('verdicts', {})  # Return verdicts
+
+    def save(self):  # Define save method
+        if not self.dirty:  # Check if nothing changed
+            return  # Return
+        with open(self.path + '.tmp', 'w') as file:  # Write to a temporary file first
+            json.dump({'version': CACHE_VERSION, 'verdicts': self.cache}, file)  # Write verdicts
+        os.replace(self.path + '.tmp', self.path)  # Replace old cache atomically
+        self.dirty = False  # Mark cache as saved
+
+    def start(self):  # Define start method
+        if self.pool is None:  # Check if workers are not running
+            self.pool = start_pool(self.processes)  # Start workers
+        return self.pool  # Return pool
+
+    def submit(self, world):  # Define submit method
+        key = layout_key(world)  # Hash layout
+        if key not in self.cache and key not in self.pending:  # Check if layout was never verified
+            description = describe(world)  # Describe layout
+            bounds = np.linspace(0, SAMPLES, min(self.processes, SAMPLES) + 1).round().astype(int).tolist()  # Split samples across workers
+            self.pending[key] = [self.start().apply_async(verify_chunk, ((description, start, stop),))
+                                 for start, stop in zip(bounds, bounds[1:])]  # Queue tasks
+        return key  # Return layout hash
+
+    def deadline(self):  # Define deadline method
+        return time.perf_counter() + self.budget if self.budget is not None else None  # Return time the verdicts are due, None for no limit
+
+    def verdict(self, key, deadline=None):  # Define verdict method
+        if key in self.cache:  # Check if layout was verified
+            return self.cache[key]  # Return verdict
+        tasks = self.pending.get(key)  # Get running tasks
+        if tasks is None:  # Check if layout was never submitted
+            return None  # Return no verdict
+        for task in tasks:  # Iterate over tasks
+            task.wait(None if deadline is None else max(deadline - time.perf_counter(), 0))  # Wait for the task within the budget
+            if not task.ready():  # Check if task is still running
+                return None  # Return no verdict yet, the task keeps running
+        del self.pending[key]  # Forget finished tasks
+        try:  # Try to collect results
+            rows = [row for task in tasks for row in task.get()]  # Collect reach rows
+        except Exception as e:  # Handle failed task
+            logger.error(f'Error verifying layout {key[:8]}: {e}')  # Log error
+            return None  # Return no verdict
+        self.cache[key] = summarize(rows)  # Cache verdict
+        self.dirty = True  # Mark cache as changed
+        self.stats['verified'] += 1  # Count verification
+        return self.cache[key]  # Return verdict
+
+    def solvable(self, world, verdict):  # Define solvable method
+        shots = world.pack.tuning(world.level, 'shots', SHOTS_PER_LEVEL)  # Get shots of the level
+        life = world.pack.tuning(world.level, 'target_life', TARGET_LIFE)  # Get hits needed
+        return verdict['reach'] * shots >= life  # Check if a player hitting every reachable position clears the level
+
+    def choose(self, world, rerolls=LAYOUT_REROLLS):  # Define choose method, re-roll the world's layout until one is solvable
+        deadline = self.deadline()  # Start the latency budget shared by every attempt
+        seeded = world.pack.level(world.level).get('seed') is not None  # Check if layouts can be laid out again
+        reaches = {}  # Map attempts with a verdict to their reach
+        for attempt in range(rerolls + 1):  # Iterate over the layout and its re-rolls
+            if attempt:  # Check if this is a re-roll
+                if not seeded and deadline is not None:  # Check if a late re-roll could not be undone, unseeded layouts draw from the world generator
+                    break  # Keep the verified layout
+                world.reroll_layout(attempt)  # Generate level again
+            key = self.submit(world)  # Submit layout unless verified or running
+            cached = key in self.cache  # Check if verdict is already known
+            verdict = self.verdict(key, deadline)  # Get verdict within the budget
+            if verdict is None:  # Check if verdict is late
+                self.stats['late'] += 1  # Count late verdict
+                if not attempt:  # Check if the level's own layout is late
+                    logger.info(f'Layout {key[:8]} of level {world.level} not verified within budget, keeping it')  # Log fallback
+                    return attempt  # Keep layout rather than stall the level start, re-rolls are never kept unverified
+                logger.info(f'Layout {key[:8]} of level {world.level} not verified within budget, skipping it')  # Log skip
+                continue  # Try the next re-roll
+            self.stats['hits'] += cached  # Count cache hit
+            if self.solvable(world, verdict):  # Check if layout can be cleared
+                return attempt  # Keep layout
+            self.stats['rejected'] += 1  # Count rejection
+            logger.info(f"Layout {key[:8]} of level {world.level} rejected, reach {verdict['reach']:.0%}")  # Log rejection
+            reaches[attempt] = verdict['reach']  # Remember reach
+        best = max(reaches, key=lambda attempt: (reaches[attempt], -attempt))  # Get the verified layout reaching most positions, the earliest on ties
+        if best != world.layout_attempt and seeded:  # Check if the best layout can be laid out again
+            world.reroll_layout(best)  # Go back to the best layout
+        logger.info(f'No solvable layout of level {world.level}, keeping attempt {world.layout_attempt}')  # Log fallback
+        return world.layout_attempt  # Return kept attempt
+
+    def prefetch(self, world, level):  # Define prefetch method, verify a level's layout and its re-rolls before the level starts
+        if level > world.max_level or world.pack.level(level).get('seed') is None:  # Check if the layout is unknown before it is generated
+            return []  # Return no layout hashes
+        if world.pack.layout(level, world.width, world.height) is not None:  # Check if the level was compiled, compile --verify covers it
+            return []  # Return no layout hashes
+        scratch = World(width=world.width, height=world.height, seed=world.seed, pack=world.pack)  # Create scratch world
+        scratch.level = level  # Set level
+        keys = []  # Initialize layout hashes
+        for attempt in range(LAYOUT_REROLLS + 1):  # Iterate over the layouts create_level may try
+            scratch.clear_level()  # Drop previous layout
+            scratch.layout_rng = scratch.level_rng(attempt)  # Get the attempt's random generator
+            scratch.generate_level()  # Generate the layout create_level generates for this attempt
+            keys.append(self.submit(scratch))  # Queue verification, the level's own layout first
+        return keys  # Return layout hashes
+
+    def close(self):  # Define close method
+        if self.pool is not None:  # Check if workers run
+            self.pool.terminate()  # Stop workers, unfinished verdicts are recomputed next time
+            self.pool = None  # Forget pool
+        self.pending.clear()  # Drop running tasks
+        self.save()  # Save verdicts
+
+# Define the shared verifier
+@functools.lru_cache(maxsize=None)
+def default_verifier():  # Define default_verifier function
+    return LayoutVerifier()  # Create the verifier once per process
+
+# MAIN
+
+# Define the command line entry point
+def main():  # Define main function
+    parser = argparse.ArgumentParser(description="Verify and re-roll generated level layouts")  # Create argument parser
+    parser.add_argument('pack', nargs='?', default=DEFAULT_PACK)  # Set level pack path
+    parser.add_argument('--seeds', type=int, default=5)  # Set number of worlds per level
+    parser.add_argument('--size', default='800x600')  # Set window size
+    parser.add_argument('--processes', type=int)  # Set worker processes
+    parser.add_argument('--cache', default=VERIFY_CACHE)  # Set verdict cache path
+    args = parser.parse_args()  # Parse arguments
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')  # Show re-roll messages
+    logging.disable(logging.DEBUG)  # Silence the per-level debug logging
+    width, height = (int(value) for value in args.size.split('x'))  # Parse window size
+    pack = LevelPack.load(args.pack, baked=False)  # Load pack, compiled layouts are not re-rolled
+    verifier = LayoutVerifier(args.processes, budget=None, path=args.cache)  # Create verifier waiting for every verdict
+    start = time.perf_counter()  # Start timer
+    try:  # Verify levels
+        for level in range(1, len(pack) + 1):  # Iterate over levels
+            reaches, rerolls = [], 0  # Initialize level statistics
+            for seed in range(args.seeds):  # Iterate over worlds
+                world = World(width=width, height=height, seed=seed, pack=pack)  # Create world
+                world.level = level  # Set level
+                world.verifier = verifier  # Re-roll rejected layouts
+                rejected = verifier.stats['rejected']  # Get rejections so far
+                world.create_level(baked=False)  # Generate level
+                rerolls += verifier.stats['rejected'] - rejected  # Count re-rolls
+                reaches.append(verifier.verdict(verifier.submit(world))['reach'])  # Get reach of the kept layout
+            print(f"level {level}: reach {min(reaches):.0%} worst, {sum(reaches) / len(reaches):.0%} mean, {rerolls} re-rolls")  # Print level summary
+    finally:  # Stop workers even when interrupted
+        verifier.close()  # Stop workers and save verdicts
+    print(f"{verifier.stats['verified']} layouts verified, {verifier.stats['hits']} cached, "
+          f"in {time.perf_counter() - start:.1f} s on {verifier.processes} processes")  # Print totals
+
+# Run the verifier
+if __name__ == "__main__":  # Check if script is run directly
+    main()  # Run main
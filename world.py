@@ -0,0 +1,1282 @@
+# Headless simulation core for Invasion: Antibody Odyssey
+# This module must never import kivy: it is shared by the game view and by headless tools
+import math
+import random
+import logging
+import numpy as np
+from spatial import SpatialHash, PointGrid, OccupancyGrid, CELL_SIZE, ray_segment, ray_box, ray_exit, place
+from pools import Pool
+from levels import HAZARD_KINDS, default_pack
+
+# Set up logging
+logger = logging.getLogger(__name__)  # Create logger instance
+
+# Define the physics constants
+GRAVITY = -98.1  # Gravity applied to projectiles and bombshells
+GRAVITONIO_RADIUS = 200  # Influence radius of a gravitonio
+GRAVITONIO_STRENGTH = 5000  # Strength of the gravitonio inverse-square law
+GRAVITY_FIELD_CELL = 4  # Spacing in pixels of the precomputed gravitonio field samples
+WORMHOLE_COOLDOWN = 0.5  # Minimum time between two transports of the same object
+PIECE_FALL_SPEED = 120  # Falling speed of obstacle pieces
+PIECE_LIFETIME = 0.5  # Lifetime of obstacle pieces
+EXPLOSION_LIFETIME = 2  # Lifetime of bombshell explosions
+SHOTS_PER_LEVEL = 30  # Number of shots available in a level whose pack does not tune it
+STEP = 1 / 60  # Fixed simulation time step
+MAX_CATCH_UP_STEPS = 5  # Maximum number of simulation steps run for one rendered frame
+TARGET_CLEARANCE = 20  # Minimum gap kept between the target and the hazards, on top of its size
+PROJECTILE_FORCE = 700  # Launch speed of a projectile fired at full distance
+BOMBSHELL_FORCE = 450  # Launch speed of a bombshell fired at full distance
+BEAM_MAX_BOUNCES = 8  # Maximum number of mirror reflections traced for a hitscan beam
+BEAM_LIFETIME = 0.25  # Seconds a fired hitscan beam stays visible
+LAYOUT_REROLLS = 4  # Maximum re-rolls of a generated layout the solvability verifier rejects
+POOL_HIGH_WATER = {'bombshell': 32, 'laser': 32, 'piece': 200, 'explosion': 16}  # Maximum idle objects kept per entity pool
+
+# ENTITIES
+
+# Define the body class
+class Body:  # Define Body class, the plain data counterpart of a Kivy widget
+    width = 0  # Default width
+    height = 0  # Default height
+
+    def __init__(self, x=0, y=0):  # Initialize Body
+        self.x = x  # Set x position
+        self.y = y  # Set y position
+        self.last_transport_time = -math.inf  # Initialize last wormhole transport time
+        self.previous_pos = None  # Initialize position at the start of the last step
+
+    def remember(self):  # Define remember method
+        self.previous_pos = (self.x, self.y)  # Store position before the next step
+
+    def lerp(self, alpha):  # Define lerp method
+        if self.previous_pos is None:  # Check if body has not been stepped yet
+            return (self.x, self.y)  # Return current position
+        previous_x, previous_y = self.previous_pos  # Get previous position
+        return (previous_x + (self.x - previous_x) * alpha, previous_y + (self.y - previous_y) * alpha)  # Return interpolated position
+
+    @property
+    def pos(self):  # Define pos property
+        return (self.x, self.y)  # Return position
+
+    @property
+    def size(self):  # Define size property
+        return (self.width, self.height)  # Return size
+
+    @property
+    def right(self):  # Define right property
+        return self.x + self.width  # Return right edge
+
+    @property
+    def top(self):  # Define top property
+        return self.y + self.height  # Return top edge
+
+    @property
+    def center_x(self):  # Define center_x property
+        return self.x + self.width / 2  # Return center x position
+
+    @property
+    def center_y(self):  # Define center_y property
+        return self.y + self.height / 2  # Return center y position
+
+    @property
+    def center(self):  # Define center property
+        return (self.center_x, self.center_y)  # Return center
+
+    @center.setter
+    def center(self, value):  # Define center setter
+        self.x = value[0] - self.width / 2  # Update x position
+        self.y = value[1] - self.height / 2  # Update y position
+
+    def collide(self, other):  # Define collide method, same rules as Widget.collide_widget
+        if self.right < other.x or self.x > other.right:  # Check horizontal separation
+            return False  # Return False
+        if self.top < other.y or self.y > other.top:  # Check vertical separation
+            return False  # Return False
+        return True  # Return True
+
+    def contains_point(self, x, y):  # Define contains_point method
+        return self.x < x < self.right and self.y < y < self.top  # Check strict containment
+
+# Define the target class
+class Target(Body):  # Define Target class inheriting from Body
+    width = 120  # Set width
+    height = 120  # Set height
+
+    def __init__(self, image_source, world):  # Initialize Target
+        super().__init__()  # Call the superclass initializer
+        self.image_source = image_source  # Set image source
+        self.life = 10  # Set target life
+        self.speed = 150  # Set speed
+        self.x, self.y = self.random_waypoint(world)  # Set position
+        self.target_x, self.target_y = self.random_waypoint(world)  # Set waypoint
+
+    def random_waypoint(self, world):  # Define random_waypoint method
+        if world.target_space is not None:  # Check if the level has a free-space grid
+            waypoint = world.target_space.random_free(world.rng, self.x, self.y)  # Pick free waypoint reachable from the current position
+            if waypoint is not None:  # Check if a free waypoint exists
+                return waypoint  # Return waypoint
+        x = world.rng.uniform(world.width * 2 / 3, world.width - self.width)  # Pick x position in the right third
+        y = world.rng.uniform(0, world.height - self.height)  # Pick y position
+        return x, y  # Return waypoint
+
+    def step_towards_waypoint(self, dt):  # Define step_towards_waypoint method
+        dx = self.target_x - self.x  # Calculate dx
+        dy = self.target_y - self.y  # Calculate dy
+        length = math.hypot(dx, dy)  # Calculate distance to waypoint
+        if length == 0:  # Check if waypoint is reached exactly
+            return (self.x, self.y)  # Stay in place
+        step = self.speed * dt / length  # Calculate normalized step
+        return (self.x + dx * step, self.y + dy * step)  # Return new position
+
+    def move_target(self, dt, world):  # Define move_target method
+        new_pos = self.step_towards_waypoint(dt)  # Calculate new position
+        max_attempts = 8  # Cap re-rolls, waypoints come from free space so a blocked step is rare
+
+        while max_attempts > 0 and world.target_blocked(new_pos):  # Check if new position overlaps with other objects
+            max_attempts -= 1  # Decrement max attempts
+            self.target_x, self.target_y = self.random_waypoint(world)  # Set new waypoint
+            new_pos = self.step_towards_waypoint(dt)  # Calculate new position
+
+        if not world.target_blocked(new_pos) or world.target_blocked(self.pos):  # Check if step is free, or the target is already stuck inside a hazard's reach
+            self.x, self.y = new_pos  # Update position
+
+        if math.hypot(self.target_x - self.x, self.target_y - self.y) < self.speed * dt:  # Check if waypoint is reached
+            self.target_x, self.target_y = self.random_waypoint(world)  # Set new waypoint
+
+    def hit(self):  # Define hit method
+        self.life -= 1  # Decrease life
+
+# Define the projectile class
+class Projectile(Body):  # Define Projectile class inheriting from Body
+    width = 50  # Set width
+    height = 50  # Set height
+
+    def __init__(self, x=0, y=0, velocity_x=0, velocity_y=0):  # Initialize Projectile
+        super().__init__(x, y)  # Call the superclass initializer
+        self.velocity_x = velocity_x  # Set velocity_x
+        self.velocity_y = velocity_y  # Set velocity_y
+
+# Define the bombshell class
+class Bombshell(Projectile):  # Define Bombshell class inheriting from Projectile
+    width = 60  # Set width
+    height = 60  # Set height
+
+    def __init__(self, x=0, y=0, velocity_x=0, velocity_y=0):  # Initialize Bombshell
+        super().__init__(x, y, velocity_x, velocity_y)  # Call the superclass initializer
+        self.exploded = False  # Set exploded to False
+
+    def trajectory(self, dt):  # Define trajectory method
+        self.x += self.velocity_x * dt  # Update x position
+        self.y += self.velocity_y * dt  # Update y position
+        self.velocity_y += GRAVITY * dt  # Update velocity_y
+
+# Define the laser class
+class Laser(Body):  # Define Laser class inheriting from Body
+    width = 40  # Set width
+    height = 10  # Set height
+    length = 50  # Set beam length
+    speed = 10  # Set distance travelled per step
+
+    def __init__(self, x=0, y=0, angle=0):  # Initialize Laser
+        super().__init__(x, y)  # Call the superclass initializer
+        self.angle = angle  # Set angle in degrees
+        self.time = 0  # Initialize time
+
+    def trajectory(self):  # Define trajectory method
+        self.x += self.speed * math.cos(math.radians(self.angle))  # Update x position
+        self.y += self.speed * math.sin(math.radians(self.angle))  # Update y position
+        self.time += 0.5  # Update time
+
+    def points(self, alpha=1):  # Define points method
+        x, y = self.lerp(alpha)  # Get interpolated position
+        center_x = x + self.width / 2  # Calculate center x position
+        center_y = y + self.height / 2  # Calculate center y position
+        angle = math.radians(self.angle)  # Convert angle to radians
+        return [center_x, center_y,
+                center_x + self.length * math.cos(angle), center_y + self.length * math.sin(angle)]  # Return beam segment
+
+# Define the mirror class
+class MirrorBulletproof(Body):  # Define MirrorBulletproof class inheriting from Body
+    width = 10  # Set width
+    height = 100  # Set height
+
+    def __init__(self, x, y, angle):  # Initialize MirrorBulletproof
+        super().__init__(x, y)  # Call the superclass initializer
+        self.angle = angle  # Set angle
+
+    def segment(self):  # Define segment method, the mirror's long axis as drawn by the view's Rotate
+        angle = math.radians(self.angle)  # Convert angle to radians
+        half_x = -math.sin(angle) * self.height / 2  # Calculate x offset from centre to one end
+        half_y = math.cos(angle) * self.height / 2  # Calculate y offset from centre to one end
+        return (self.center_x - half_x, self.center_y - half_y, self.center_x + half_x, self.center_y + half_y)  # Return end points
+
+    def reflect_ray(self, dx, dy):  # Define reflect_ray method
+        angle = math.radians(self.angle)  # Convert angle to radians
+        normal_x, normal_y = math.cos(angle), math.sin(angle)  # Calculate mirror normal
+        dot = dx * normal_x + dy * normal_y  # Calculate direction along the normal
+        return dx - 2 * dot * normal_x, dy - 2 * dot * normal_y  # Return reflected direction
+
+    def reflect_laser(self, laser):  # Define reflect_laser method
+        incoming_angle = math.radians(laser.angle)  # Calculate incoming angle
+        mirror_angle = math.radians(self.angle)  # Calculate mirror angle
+        reflected_angle = 2 * mirror_angle - incoming_angle  # Calculate reflected angle
+        laser.angle = math.degrees(reflected_angle) % 360  # Update laser angle
+
+# Define the elastonio class
+class Elastonio(Body):  # Define Elastonio class inheriting from Body
+    width = 60  # Set width
+    height = 100  # Set height
+
+# Define the perpetio class
+class Perpetio(Body):  # Define Perpetio class inheriting from Body
+    width = 150  # Set width
+    height = 150  # Set height
+
+    def __init__(self, x, y, image_source="perpetio.png"):  # Initialize Perpetio
+        super().__init__(x, y)  # Call the superclass initializer
+        self.image_source = image_source  # Set image source
+
+# Define the obstacle class
+class Obstacle(Body):  # Define Obstacle class inheriting from Body
+    width = 50  # Set width
+    height = 50  # Set height
+
+    def __init__(self, x, y, oscillation_amplitude, oscillation_speed):  # Initialize Obstacle
+        super().__init__(x, y)  # Call the superclass initializer
+        self.oscillation_amplitude = oscillation_amplitude  # Set oscillation amplitude
+        self.oscillation_speed = oscillation_speed  # Set oscillation speed
+        self.initial_pos = (x, y)  # Set initial position
+
+    def oscillate(self, now):  # Define oscillate method
+        oscillation_x = self.oscillation_amplitude * math.sin(now * self.oscillation_speed)  # Calculate oscillation x
+        oscillation_y = self.oscillation_amplitude * math.cos(now * self.oscillation_speed)  # Calculate oscillation y
+        self.x = self.initial_pos[0] + oscillation_x  # Update x position
+        self.y = self.initial_pos[1] + oscillation_y  # Update y position
+
+# Define the gravitonio class
+class Gravitonio(Body):  # Define Gravitonio class inheriting from Body
+    width = 100  # Set width
+    height = 100  # Set height
+
+    def __init__(self, x, y, effect):  # Initialize Gravitonio
+        super().__init__(x, y)  # Call the superclass initializer
+        self.effect = effect  # Set effect, either "attract" or "repel"
+
+    def pull(self, x, y):  # Define pull method, the velocity change per step of bodies centred at x, y
+        dx = self.center_x - np.asarray(x, dtype=float)  # Calculate dx
+        dy = self.center_y - np.asarray(y, dtype=float)  # Calculate dy
+        distance = np.hypot(dx, dy)  # Calculate distance
+        inside = (distance > 0) & (distance < GRAVITONIO_RADIUS)  # Find points inside the influence radius
+        force = np.zeros_like(distance)  # Initialize force divided by distance
+        force[inside] = GRAVITONIO_STRENGTH / distance[inside] ** 3  # Calculate inverse-square force divided by distance
+        if self.effect == "repel":  # Check if effect is repel
+            force = -force  # Invert force
+        return force * dx, force * dy  # Return velocity change along x and y
+
+# Define the wormhole class
+class Wormhole:  # Define Wormhole class
+    size = (100, 100)  # Set size of each mouth
+
+    def __init__(self, pos1, pos2):  # Initialize Wormhole
+        self.pos1 = pos1  # Set pos1
+        self.pos2 = pos2  # Set pos2
+
+    def transport(self, obj, now):  # Define transport method
+        if now - obj.last_transport_time < WORMHOLE_COOLDOWN:  # Check if transport cooldown is active
+            return  # Return
+
+        if self.collide_with_circle(obj, self.pos1):  # Check collision with the first mouth
+            self.move_through(obj, self.pos1, self.pos2)  # Move object to the second mouth
+            obj.last_transport_time = now  # Update last_transport_time
+        elif self.collide_with_circle(obj, self.pos2):  # Check collision with the second mouth
+            self.move_through(obj, self.pos2, self.pos1)  # Move object to the first mouth
+            obj.last_transport_time = now  # Update last_transport_time
+
+    def move_through(self, obj, entry, exit):  # Define move_through method
+        offset_x = obj.center_x - entry[0] - self.size[0] / 2  # Calculate x offset from the entry centre
+        offset_y = obj.center_y - entry[1] - self.size[1] / 2  # Calculate y offset from the entry centre
+        obj.center = (exit[0] + self.size[0] / 2 + offset_x, exit[1] + self.size[1] / 2 + offset_y)  # Update object center
+        obj.previous_pos = None  # Do not interpolate across the jump
+
+    def collide_with_circle(self, obj, mouth):  # Define collide_with_circle method
+        radius = self.size[0] / 2  # Calculate radius
+        return math.hypot(obj.center_x - mouth[0] - radius, obj.center_y - mouth[1] - radius) <= radius  # Check collision with circular area
+
+# Define the piece class
+class Piece(Body):  # Define Piece class, a falling fragment of a destroyed obstacle
+    width = 5  # Set width
+    height = 5  # Set height
+
+    def __init__(self, x=0, y=0):  # Initialize Piece
+        super().__init__(x, y)  # Call the superclass initializer
+        self.ttl = PIECE_LIFETIME  # Set remaining lifetime
+
+# Define the explosion class
+class Explosion(Body):  # Define Explosion class, the blast left by a bombshell
+    width = 200  # Set width
+    height = 200  # Set height
+
+    def __init__(self, x=0, y=0):  # Initialize Explosion
+        super().__init__(x, y)  # Call the superclass initializer
+        self.ttl = EXPLOSION_LIFETIME  # Set remaining lifetime
+
+# Define the beam class
+class Beam:  # Define Beam class, the path of a fired hitscan laser
+    def __init__(self, segments, ttl=BEAM_LIFETIME):  # Initialize Beam
+        self.segments = segments  # Set (x1, y1, x2, y2) segments from the barrel to the last hit
+        self.ttl = ttl  # Set remaining lifetime
+
+# PROJECTILE STORE
+
+# Define the projectile store class
+class ProjectileStore:  # Define ProjectileStore class keeping every live projectile in contiguous NumPy arrays
+    fields = ('x', 'y', 'velocity_x', 'velocity_y', 'age', 'last_transport_time', 'previous_x', 'previous_y')  # Names of the per-projectile columns
+    width = Projectile.width  # Width shared by every projectile
+    height = Projectile.height  # Height shared by every projectile
+
+    def __init__(self, capacity=256):  # Initialize ProjectileStore
+        self.count = 0  # Initialize number of live projectiles
+        self.capacity = capacity  # Set allocated capacity
+        self.cell_size = CELL_SIZE  # Set broadphase cell size
+        self.index = None  # Initialize broadphase index, rebuilt lazily after projectiles move
+        for name in self.fields:  # Iterate over columns
+            setattr(self, name, np.zeros(capacity))  # Allocate column
+        self.last_transport_time.fill(-np.inf)  # Projectiles start without transport cooldown
+
+    def __len__(self):  # Define __len__ method
+        return self.count  # Return number of live projectiles
+
+    def grow(self):  # Define grow method
+        self.capacity *= 2  # Double capacity
+        for name in self.fields:  # Iterate over columns
+            column = np.zeros(self.capacity)  # Allocate larger column
+            column[:self.count] = getattr(self, name)[:self.count]  # Copy live values
+            setattr(self, name, column)  # Replace column
+
+    def spawn(self, x, y, velocity_x, velocity_y):  # Define spawn method
+        if self.count == self.capacity:  # Check if storage is full
+            self.grow()  # Grow storage
+        i = self.count  # Get free slot
+        self.x[i] = self.previous_x[i] = x  # Set x position
+        self.y[i] = self.previous_y[i] = y  # Set y position
+        self.velocity_x[i] = velocity_x  # Set velocity_x
+        self.velocity_y[i] = velocity_y  # Set velocity_y
+        self.age[i] = 0  # Reset age
+        self.last_transport_time[i] = -np.inf  # Reset transport cooldown
+        self.count += 1  # Increment number of live projectiles
+        self.index = None  # Invalidate broadphase index
+
+    def clear(self):  # Define clear method
+        self.count = 0  # Forget every projectile
+        self.index = None  # Invalidate broadphase index
+
+    def live(self, name):  # Define live method
+        return getattr(self, name)[:self.count]  # Return a view over the live part of a column
+
+    def positions(self, alpha=1):  # Define positions method
+        previous_x = self.live('previous_x')  # Get positions before the last step
+        previous_y = self.live('previous_y')  # Get positions before the last step
+        x = previous_x + (self.live('x') - previous_x) * alpha  # Interpolate x positions
+        y = previous_y + (self.live('y') - previous_y) * alpha  # Interpolate y positions
+        return zip(x.tolist(), y.tolist())  # Return live positions as plain floats
+
+    def remember(self):  # Define remember method
+        self.previous_x[:self.count] = self.x[:self.count]  # Store x positions before the next step
+        self.previous_y[:self.count] = self.y[:self.count]  # Store y positions before the next step
+
+    def integrate(self, dt):  # Define integrate method
+        n = self.count  # Get number of live projectiles
+        self.velocity_y[:n] += GRAVITY * dt  # Update velocity
+        self.x[:n] += self.velocity_x[:n] * dt  # Update x position
+        self.y[:n] += self.velocity_y[:n] * dt  # Update y position
+        self.age[:n] += dt  # Update age
+        self.index = None  # Invalidate broadphase index
+
+    def apply_field(self, field):  # Define apply_field method
+        n = self.count  # Get number of live projectiles
+        pull_x, pull_y = field.sample(self.x[:n] + self.width / 2, self.y[:n] + self.height / 2)  # Sample field at projectile centres
+        self.velocity_x[:n] += pull_x  # Update velocity_x
+        self.velocity_y[:n] += pull_y  # Update velocity_y
+
+    def cell_key(self, cx, cy):  # Define cell_key method
+        return cx * 2 ** 21 + cy + 2 ** 20  # Pack cell coordinates in one sortable integer
+
+    def build_index(self):  # Define build_index method
+        n = self.count  # Get number of live projectiles
+        cx = np.floor(self.x[:n] / self.cell_size).astype(np.int64)  # Calculate cell columns
+        cy = np.floor(self.y[:n] / self.cell_size).astype(np.int64)  # Calculate cell rows
+        keys = self.cell_key(cx, cy)  # Calculate cell keys
+        order = np.argsort(keys, kind='stable')  # Sort projectiles by cell
+        self.index = (keys[order], order)  # Store sorted keys and projectile indices
+
+    def near(self, body):  # Define near method
+        if self.index is None:  # Check if index is stale
+            self.build_index()  # Rebuild index
+        keys, order = self.index  # Get sorted keys and projectile indices
+        size = self.cell_size  # Get cell size
+        x0 = math.floor((body.x - self.width) / size)  # Projectiles are binned by their lower-left corner
+        y0 = math.floor((body.y - self.height) / size)  # Projectiles are binned by their lower-left corner
+        x1 = math.floor(body.right / size)  # Calculate last column
+        y1 = math.floor(body.top / size)  # Calculate last row
+        found = []  # Initialize candidate slices
+        for cx in range(x0, x1 + 1):  # Iterate over covered columns, each one is a contiguous key range
+            lo = np.searchsorted(keys, self.cell_key(cx, y0), 'left')  # Find first candidate
+            hi = np.searchsorted(keys, self.cell_key(cx, y1), 'right')  # Find last candidate
+            if hi > lo:  # Check if column has candidates
+                found.append(order[lo:hi])  # Add candidates
+        if not found:  # Check if no candidate was found
+            return np.empty(0, dtype=np.int64)  # Return no candidates
+        return np.sort(np.concatenate(found))  # Return candidates in storage order
+
+    def collide_indices(self, body):  # Define collide_indices method, same rules as Body.collide
+        candidates = self.near(body)  # Get broadphase candidates
+        x = self.x[candidates]  # Get candidate x positions
+        y = self.y[candidates]  # Get candidate y positions
+        hit = ~((x + self.width < body.x) | (x > body.right) | (y + self.height < body.y) | (y > body.top))  # Test overlap
+        return candidates[hit]  # Return colliding projectiles
+
+    def contains_indices(self, body):  # Define contains_indices method, same rules as Body.contains_point
+        candidates = self.near(body)  # Get broadphase candidates
+        x = self.x[candidates]  # Get candidate x positions
+        y = self.y[candidates]  # Get candidate y positions
+        inside = (body.x < x) & (x < body.right) & (body.y < y) & (y < body.top)  # Test containment
+        return candidates[inside]  # Return contained projectiles
+
+    def bounce(self, elastonios):  # Define bounce method
+        free = np.ones(self.count, dtype=bool)  # Each projectile bounces at most once per step
+        for elastonio in elastonios:  # Iterate over elastonios
+            hit = self.collide_indices(elastonio)  # Find projectiles touching the elastonio
+            hit = hit[free[hit]]  # Skip projectiles that already bounced
+            self.velocity_x[hit] *= -1  # Invert velocity_x
+            self.velocity_y[hit] *= -1  # Invert velocity_y
+            free[hit] = False  # Mark projectiles as bounced
+
+    def transport(self, wormholes, now):  # Define transport method
+        n = self.count  # Get number of live projectiles
+        for wormhole in wormholes:  # Iterate over wormholes
+            radius = wormhole.size[0] / 2  # Calculate mouth radius
+            center_x = self.x[:n] + self.width / 2  # Calculate projectile centres
+            center_y = self.y[:n] + self.height / 2  # Calculate projectile centres
+            ready = now - self.last_transport_time[:n] >= WORMHOLE_COOLDOWN  # Find projectiles out of cooldown
+            entered1 = ready & (np.hypot(center_x - wormhole.pos1[0] - radius, center_y - wormhole.pos1[1] - radius) <= radius)  # Find projectiles in the first mouth
+            entered2 = ready & ~entered1 & (np.hypot(center_x - wormhole.pos2[0] - radius, center_y - wormhole.pos2[1] - radius) <= radius)  # Find projectiles in the second mouth
+            shift_x = wormhole.pos2[0] - wormhole.pos1[0]  # Calculate x offset between mouths
+            shift_y = wormhole.pos2[1] - wormhole.pos1[1]  # Calculate y offset between mouths
+            for name, shift in (('x', shift_x), ('previous_x', shift_x), ('y', shift_y), ('previous_y', shift_y)):  # Iterate over moved columns
+                column = getattr(self, name)[:n]  # Get column, moving previous positions too so nothing streaks across the jump
+                column[entered1] += shift  # Move projectiles to the second mouth
+                column[entered2] -= shift  # Move projectiles to the first mouth
+            moved = entered1 | entered2  # Find transported projectiles
+            if moved.any():  # Check if any projectile was transported
+                self.last_transport_time[:n][moved] = now  # Update last_transport_time
+                self.index = None  # Invalidate broadphase index
+
+    def compact(self, keep):  # Define compact method
+        kept = int(np.count_nonzero(keep))  # Count surviving projectiles
+        if kept == self.count:  # Check if nothing was removed
+            return  # Return
+        for name in self.fields:  # Iterate over columns
+            column = getattr(self, name)  # Get column
+            column[:kept] = column[:self.count][keep]  # Pack survivors at the front
+        self.count = kept  # Update number of live projectiles
+        self.index = None  # Invalidate broadphase index
+
+# GRAVITY FIELD
+
+# Define the gravity field class
+class GravityField:  # Define GravityField class, the summed pull of every gravitonio precomputed on a grid
+    def __init__(self, cell_size=GRAVITY_FIELD_CELL):  # Initialize GravityField
+        self.cell_size = cell_size  # Set spacing between samples
+        self.key = ()  # Initialize positions and effects of the gravitonios the grid was built for
+        self.origin = (0, 0)  # Initialize position of the first sample
+        self.pull_x = None  # Initialize grid of velocity changes along x, None when no gravitonio exists
+        self.pull_y = None  # Initialize grid of velocity changes along y
+
+    def sync(self, gravitonios):  # Define sync method
+        key = tuple((gravitonio.center_x, gravitonio.center_y, gravitonio.effect) for gravitonio in gravitonios)  # Describe gravitonios
+        if key != self.key:  # Check if gravitonios changed since the last build
+            self.build(gravitonios)  # Rebuild grid
+            self.key = key  # Remember gravitonios
+
+    def load(self, pull_x, pull_y, origin, gravitonios):  # Define load method, adopt a grid compiled for these gravitonios
+        self.pull_x = pull_x  # Set grid of velocity changes along x
+        self.pull_y = pull_y  # Set grid of velocity changes along y
+        self.origin = origin  # Set position of the first sample
+        self.key = tuple((gravitonio.center_x, gravitonio.center_y, gravitonio.effect) for gravitonio in gravitonios)  # Remember gravitonios
+
+    def build(self, gravitonios):  # Define build method
+        if not gravitonios:  # Check if there is no gravitonio
+            self.pull_x = self.pull_y = None  # Drop grid
+            return  # Return
+        size = self.cell_size  # Get cell size
+        radius = GRAVITONIO_RADIUS  # Get influence radius
+        x0 = math.floor((min(gravitonio.center_x for gravitonio in gravitonios) - radius) / size) * size  # Calculate left edge of the influence area
+        y0 = math.floor((min(gravitonio.center_y for gravitonio in gravitonios) - radius) / size) * size  # Calculate bottom edge of the influence area
+        x1 = max(gravitonio.center_x for gravitonio in gravitonios) + radius  # Calculate right edge of the influence area
+        y1 = max(gravitonio.center_y for gravitonio in gravitonios) + radius  # Calculate top edge of the influence area
+        columns = math.ceil((x1 - x0) / size) + 2  # Calculate number of sample columns
+        rows = math.ceil((y1 - y0) / size) + 2  # Calculate number of sample rows
+        x, y = np.meshgrid(x0 + np.arange(columns) * size, y0 + np.arange(rows) * size)  # Calculate sample positions
+        self.origin = (x0, y0)  # Set position of the first sample
+        self.pull_x = np.zeros((rows, columns))  # Allocate grid of velocity changes along x
+        self.pull_y = np.zeros((rows, columns))  # Allocate grid of velocity changes along y
+        for gravitonio in gravitonios:  # Iterate over gravitonios
+            pull_x, pull_y = gravitonio.pull(x, y)  # Calculate pull at every sample
+            self.pull_x += pull_x  # Add pull along x
+            self.pull_y += pull_y  # Add pull along y
+        logger.debug(f'Built gravity field of {columns}x{rows} samples for {len(gravitonios)} gravitonios')  # Log build
+
+    def sample(self, x, y):  # Define sample method, bilinear interpolation of the grid at many points at once
+        x = np.asarray(x, dtype=float)  # Convert x positions to an array
+        y = np.asarray(y, dtype=float)  # Convert y positions to an array
+        pull_x = np.zeros(x.shape)  # Initialize velocity changes along x
+        pull_y = np.zeros(x.shape)  # Initialize velocity changes along y
+        if self.pull_x is None or not x.size:  # Check if there is nothing to sample
+            return pull_x, pull_y  # Return no pull
+        rows, columns = self.pull_x.shape  # Get grid shape
+        gx = (x - self.origin[0]) / self.cell_size  # Calculate fractional sample columns
+        gy = (y - self.origin[1]) / self.cell_size  # Calculate fractional sample rows
+        inside = (gx >= 0) & (gy >= 0) & (gx < columns - 1) & (gy < rows - 1)  # Points outside the grid feel no pull
+        gx = gx[inside]  # Keep points inside the grid
+        gy = gy[inside]  # Keep points inside the grid
+        i = gx.astype(np.intp)  # Calculate column of the lower-left sample
+        j = gy.astype(np.intp)  # Calculate row of the lower-left sample
+        fx = gx - i  # Calculate horizontal weight
+        fy = gy - j  # Calculate vertical weight
+        for grid, out in ((self.pull_x, pull_x), (self.pull_y, pull_y)):  # Iterate over grids
+            out[inside] = ((grid[j, i] * (1 - fx) + grid[j, i + 1] * fx) * (1 - fy)
+                           + (grid[j + 1, i] * (1 - fx) + grid[j + 1, i + 1] * fx) * fy)  # Blend the four surrounding samples
+        return pull_x, pull_y  # Return velocity changes
+
+    def sample_bodies(self, bodies):  # Define sample_bodies method
+        return self.sample([body.center_x for body in bodies], [body.center_y for body in bodies])  # Sample field at body centres
+
+# GAME LOOP
+
+# Define the fixed timestep loop class
+class GameLoop:  # Define GameLoop class turning variable frame times into fixed simulation steps
+    def __init__(self, world, step=STEP, max_steps=MAX_CATCH_UP_STEPS):  # Initialize GameLoop
+        self.world = world  # Set simulation world
+        self.step = step  # Set fixed time step
+        self.max_steps = max_steps  # Set catch-up cap
+        self.accumulator = 0  # Initialize unsimulated time
+        self.alpha = 0  # Initialize interpolation factor between the last two states
+        self.steps = 0  # Initialize number of simulation steps run
+        self.dropped = 0  # Initialize simulated time thrown away by the catch-up cap
+
+    def advance(self, frame_dt):  # Define advance method
+        self.accumulator += frame_dt  # Add frame time to unsimulated time
+        steps = 0  # Initialize steps run this frame
+        while self.accumulator >= self.step and steps < self.max_steps:  # Loop while a whole step is pending
+            self.world.step(self.step)  # Advance simulation by one fixed step
+            self.accumulator -= self.step  # Consume simulated time
+            steps += 1  # Increment steps run this frame
+        if self.accumulator >= self.step:  # Check if the cap was hit, e.g. after a GC pause
+            self.dropped += self.accumulator - self.accumulator % self.step  # Record time that will never be simulated
+            self.accumulator %= self.step  # Drop whole steps instead of spiralling
+        self.steps += steps  # Update number of simulation steps run
+        self.alpha = self.accumulator / self.step  # Update interpolation factor
+        return steps  # Return steps run this frame
+
+    def reset(self):  # Define reset method
+        self.accumulator = 0  # Forget unsimulated time
+        self.alpha = 0  # Reset interpolation factor
+
+# WORLD
+
+# Define the world class
+class World:  # Define World class holding the whole game state as plain data
+    def __init__(self, width=800, height=600, seed=None, max_level=None, pack=None):  # Initialize World
+        self.width = width  # Set world width
+        self.height = height  # Set world height
+        self.seed = seed if seed is not None else random.randrange(1 << 62)  # Pick a seed that recordings can store
+        self.rng = random.Random(self.seed)  # Create the world random generator
+        self.layout_rng = self.rng  # Initialize random generator used to lay out the current level
+        self.verifier = None  # Initialize solvability verifier of generated layouts, None accepts every layout
+        self.layout_plan = None  # Initialize re-rolls a replay recorded by layout count, None asks the verifier
+        self.layouts = 0  # Initialize number of layouts created, recordings key re-rolls by this count
+        self.layout_attempt = 0  # Initialize re-roll the current layout was generated from
+        self.pack = pack if pack is not None else default_pack()  # Set level pack
+
+        self.level = 1  # Initialize level
+        self.max_level = max_level if max_level is not None else len(self.pack)  # Set max level
+        self.time = 0  # Initialize simulation time
+        self.finished = False  # Set finished to False
+        self.target = None  # Initialize target
+        self.events = []  # Initialize pending events list
+
+        self.cannon_x = 20  # Set cannon x position
+        self.cannon_y = 10  # Set cannon y position
+        self.cannon_width = 250  # Set cannon width
+        self.cannon_height = 110  # Set cannon height
+        self.cannon_angle = 0  # Set cannon angle in degrees
+        self.cannon_speed = 100  # Set cannon movement speed
+        self.cannon_direction = 0  # Set cannon movement direction, -1 left, 0 still, 1 right
+        self.previous_cannon_x = self.cannon_x  # Initialize cannon x position before the last step
+
+        self.projectiles = ProjectileStore()  # Initialize projectiles store
+        self.lasers = []  # Initialize lasers list
+        self.bombshells = []  # Initialize bombshells list
+        self.obstacles = []  # Initialize obstacles list
+        self.mirrors = []  # Initialize mirrors list
+        self.elastonios = []  # Initialize elastonios list
+        self.gravitonios = []  # Initialize gravitonios list
+        self.perpetios = []  # Initialize perpetios list
+        self.hazards = SpatialHash()  # Initialize broadphase over obstacles, mirrors, elastonios and perpetios
+        self.gravity = GravityField()  # Initialize precomputed pull of the gravitonios
+        self.placements = PointGrid()  # Initialize occupancy index of the level's placed hazards
+        self.target_space = None  # Initialize free-space grid of the target, built with each level
+        self.wormholes = []  # Initialize wormholes list
+        self.pieces = []  # Initialize pieces list
+        self.explosions = []  # Initialize explosions list
+        self.beams = []  # Initialize hitscan beams list
+        self.beam_cache = (None, None)  # Initialize last traced beam key and path
+        self.pools = {name: Pool(cls, reset=cls.__init__, high_water=POOL_HIGH_WATER[name])
+                      for name, cls in (('bombshell', Bombshell), ('laser', Laser), ('piece', Piece), ('explosion', Explosion))}  # Create pools recycling short-lived entities
+        self.pools['piece'].prefill(POOL_HIGH_WATER['piece'])  # Create pieces ahead of the first obstacle hit
+
+        self.shooting_mode = 'projectile'  # Set shooting mode
+        self.projectile_shoot_cooldown = 0.5  # Set projectile shoot cooldown
+        self.bombshell_shoot_cooldown = 0.5  # Set bombshell shoot cooldown
+        self.laser_shoot_cooldown = 0.5  # Set laser shoot cooldown
+        self.last_projectile_shot_time = -math.inf  # Initialize last projectile shot time
+        self.last_bombshell_shot_time = -math.inf  # Initialize last bombshell shot time
+        self.last_shot_time = -math.inf  # Initialize last laser shot time
+        self.last_beam_shot_time = -math.inf  # Initialize last hitscan beam shot time
+
+        self.remaining_shots = self.pack.tuning(self.level, 'shots', SHOTS_PER_LEVEL)  # Set remaining shots
+        self.score = 0  # Initialize score
+
+    def emit(self, name, value=None):  # Define emit method
+        self.events.append((name, value))  # Queue event for the view
+
+    def drain_events(self):  # Define drain_events method
+        events, self.events = self.events, []  # Swap out pending events
+        return events  # Return events
+
+    def resize(self, width, height):  # Define resize method
+        self.width = width  # Update world width
+        self.height = height  # Update world height
+        if self.target_space is not None:  # Check if a level is running
+            self.build_target_space()  # Rebuild free space for the new right third
+
+    # CANNON AND SHOOTING
+
+    def cannon_center(self):  # Define cannon_center method
+        return (self.cannon_x + self.cannon_width / 2, self.cannon_y + self.cannon_height / 2)  # Return cannon center
+
+    def move_cannon(self, direction, dt):  # Define move_cannon method
+        currentx = self.cannon_x + direction * self.cannon_speed * dt  # Move cannon
+        max_x = self.width * 1 / 2 - self.cannon_width  # Calculate max x position
+        if currentx < 0:  # Check if current x is less than 0
+            currentx = 0  # Set current x to 0
+        elif currentx > max_x:  # Check if current x is greater than max x
+            currentx = max_x  # Set current x to max x
+        self.cannon_x = currentx  # Update cannon position
+
+    def aim(self, x, y):  # Define aim method
+        cannon_x, cannon_y = self.cannon_center()  # Get cannon center
+        self.cannon_angle = math.degrees(math.atan2(y - cannon_y, x - cannon_x))  # Set cannon angle
+
+    def fire(self, x, y):  # Define fire method
+        if self.remaining_shots <= 0:  # Check if no remaining shots
+            self.emit('out_of_shots')  # Notify the view
+            return  # Return
+        if self.shooting_mode == 'projectile':  # Check if shooting mode is projectile
+            self.shoot_projectile(x, y)  # Shoot projectile
+        elif self.shooting_mode == 'laser':  # Check if shooting mode is laser
+            self.shoot_laser()  # Shoot laser
+        elif self.shooting_mode == 'bombshell':  # Check if shooting mode is bombshell
+            self.shoot_bombshell(x, y)  # Shoot bombshell
+        elif self.shooting_mode == 'beam':  # Check if shooting mode is hitscan beam
+            self.shoot_beam()  # Shoot hitscan beam
+        self.decrement_shots()  # Decrement remaining shots
+
+    def decrement_shots(self):  # Define decrement_shots method
+        self.remaining_shots -= 1  # Decrement remaining shots
+        self.emit('shots_changed', self.remaining_shots)  # Notify the view
+        if self.remaining_shots <= 0:  # Check if remaining shots are zero
+            self.emit('out_of_shots')  # Notify the view
+
+    def update_score(self, points):  # Define update_score method
+        self.score += points  # Update score
+        self.emit('score_changed', self.score)  # Notify the view
+
+    def shot_velocity(self, x, y, max_force):  # Define shot_velocity method
+        cannon_x, cannon_y = self.cannon_center()  # Get cannon center
+        angle = math.atan2(y - cannon_y, x - cannon_x)  # Calculate angle
+        distance = math.hypot(x - cannon_x, y - cannon_y)  # Calculate distance
+        max_distance = 1000  # Set max distance
+        force = min(distance / max_distance, 1) * max_force  # Calculate force
+        return angle, force * math.cos(angle), force * math.sin(angle)  # Return angle and velocity
+
+    def weapon_force(self, weapon):  # Define weapon_force method
+        default = PROJECTILE_FORCE if weapon == 'projectile' else BOMBSHELL_FORCE  # Get built-in launch speed
+        return self.pack.tuning(self.level, f'{weapon}_force', default)  # Return launch speed, tunable per level
+
+    def shoot_projectile(self, x, y):  # Define shoot_projectile method
+        if self.time - self.last_projectile_shot_time >= self.projectile_shoot_cooldown:  # Check if cooldown is over
+            cannon_x, cannon_y = self.cannon_center()  # Get cannon center
+            angle, velocity_x, velocity_y = self.shot_velocity(x, y, self.weapon_force('projectile'))  # Calculate velocity
+            barrel_end_x = cannon_x + 100 * math.cos(angle)  # Calculate barrel end x position
+            barrel_end_y = cannon_y + 100 * math.sin(angle)  # Calculate barrel end y position
+            self.projectiles.spawn(barrel_end_x - Projectile.width / 2, barrel_end_y - Projectile.height / 2,
+                                   velocity_x, velocity_y)  # Add projectile to store
+            self.last_projectile_shot_time = self.time  # Update last shot time
+
+    def shoot_bombshell(self, x, y):  # Define shoot_bombshell method
+        if self.time - self.last_bombshell_shot_time >= self.bombshell_shoot_cooldown:  # Check if cooldown is over
+            cannon_x, cannon_y = self.cannon_center()  # Get cannon center
+            angle, velocity_x, velocity_y = self.shot_velocity(x, y, self.weapon_force('bombshell'))  # Calculate velocity
+            bombshell = self.pools['bombshell'].acquire(velocity_x=velocity_x, velocity_y=velocity_y)  # Create bombshell
+            bombshell.center = (cannon_x + 100 * math.cos(angle), cannon_y + 100 * math.sin(angle))  # Set position
+            self.bombshells.append(bombshell)  # Add bombshell to list
+            self.last_bombshell_shot_time = self.time  # Update last shot time
+
+    def shoot_laser(self):  # Define shoot_laser method
+        if self.time - self.last_shot_time >= self.laser_shoot_cooldown:  # Check if cooldown is over
+            cannon_x, cannon_y = self.cannon_center()  # Get cannon center
+            angle = math.radians(self.cannon_angle)  # Convert cannon angle to radians
+            laser = self.pools['laser'].acquire(angle=self.cannon_angle)  # Create laser
+            laser.center = (cannon_x + 100 * math.cos(angle), cannon_y + 100 * math.sin(angle))  # Set position
+            self.lasers.append(laser)  # Add laser to list
+            self.last_shot_time = self.time  # Update last shot time
+
+    def shoot_beam(self):  # Define shoot_beam method
+        if self.time - self.last_beam_shot_time >= self.laser_shoot_cooldown:  # Check if cooldown is over
+            segments, blocker = self.beam_path()  # Get beam path through the static hazards
+            segments = list(segments)  # Copy cached path before truncating it
+            moving = self.obstacles + ([self.target] if self.target else [])  # Collect bodies that move between shots
+            for index, (x1, y1, x2, y2) in enumerate(segments):  # Iterate over beam segments
+                length = math.hypot(x2 - x1, y2 - y1)  # Calculate segment length
+                if length == 0:  # Check if segment is empty
+                    continue  # Skip segment
+                dx, dy = (x2 - x1) / length, (y2 - y1) / length  # Calculate segment direction
+                nearest, hit = length, None  # Initialize nearest moving body on this segment
+                for body in moving:  # Iterate over moving bodies
+                    t = ray_box(x1, y1, dx, dy, body.x, body.y, body.width, body.height)  # Intersect segment with body
+                    if t is not None and t < nearest:  # Check if body is hit first
+                        nearest, hit = t, body  # Remember hit
+                if hit is not None:  # Check if a moving body stops the beam
+                    segments[index:] = [(x1, y1, x1 + dx * nearest, y1 + dy * nearest)]  # Cut beam at the hit
+                    blocker = hit  # Set body that stopped the beam
+                    break  # Break loop
+            self.resolve_beam_hit(blocker)  # Apply the hit
+            self.beams.append(Beam(segments))  # Add beam to list
+            self.last_beam_shot_time = self.time  # Update last shot time
+
+    def beam_path(self):  # Define beam_path method, cached until the cannon or the set of hazards changes
+        cannon_x, cannon_y = self.cannon_center()  # Get cannon center
+        angle = math.radians(self.cannon_angle)  # Convert cannon angle to radians
+        origin = (cannon_x + 100 * math.cos(angle), cannon_y + 100 * math.sin(angle))  # Calculate barrel end
+        key = (origin, self.cannon_angle, self.hazards.version, self.width, self.height)  # Describe everything the path depends on
+        if self.beam_cache[0] != key:  # Check if cached path is stale
+            self.beam_cache = (key, self.trace_beam(origin[0], origin[1], angle))  # Trace and cache path
+        return self.beam_cache[1]  # Return segments and blocking hazard
+
+    def trace_beam(self, ox, oy, angle, max_bounces=BEAM_MAX_BOUNCES):  # Define trace_beam method
+        dx, dy = math.cos(angle), math.sin(angle)  # Calculate beam direction
+        segments = []  # Initialize beam segments
+        blockers = self.elastonios + self.perpetios  # Collect boxes that absorb the beam
+        for _ in range(max_bounces + 1):  # Iterate over bounces
+            nearest, hit = ray_exit(ox, oy, dx, dy, self.width, self.height), None  # Start with the distance to the screen edge
+            for mirror in self.mirrors:  # Iterate over mirrors
+                t = ray_segment(ox, oy, dx, dy, *mirror.segment())  # Intersect beam with the oriented mirror
+                if t is not None and t < nearest:  # Check if mirror is hit first
+                    nearest, hit = t, mirror  # Remember hit
+            for hazard in blockers:  # Iterate over absorbing hazards
+                t = ray_box(ox, oy, dx, dy, hazard.x, hazard.y, hazard.width, hazard.height)  # Intersect beam with hazard
+                if t is not None and t < nearest:  # Check if hazard is hit first
+                    nearest, hit = t, hazard  # Remember hit
+            end_x, end_y = ox + dx * nearest, oy + dy * nearest  # Calculate segment end
+            segments.append((ox, oy, end_x, end_y))  # Add segment
+            if not isinstance(hit, MirrorBulletproof):  # Check if beam stops here
+                return segments, hit  # Return path and blocking hazard
+            dx, dy = hit.reflect_ray(dx, dy)  # Reflect beam
+            ox, oy = end_x, end_y  # Continue from the mirror
+        return segments, None  # Return path cut at the bounce limit
+
+    def resolve_beam_hit(self, blocker):  # Define resolve_beam_hit method
+        if blocker is None:  # Check if beam hit nothing
+            return  # Return
+        if blocker is self.target:  # Check if beam hit the target
+            self.target.hit()  # Hit target
+            self.update_score(5)  # Update score
+            self.emit('target_hit', 'beam')  # Notify listeners
+        elif blocker in self.obstacles:  # Check if beam hit an obstacle
+            self.destroy_obstacle(blocker)  # Destroy obstacle
+        elif blocker in self.elastonios:  # Check if beam hit an elastonio
+            self.burn_elastonio(blocker)  # Lasers burn elastonios away
+
+    # SIMULATION
+
+    def step(self, dt):  # Define step method
+        if self.finished:  # Check if the game is over
+            return  # Return
+        self.remember_positions()  # Keep positions for render interpolation
+        self.time += dt  # Advance simulation time
+        self.move_cannon(self.cannon_direction, dt)  # Move cannon
+        self.update_target(dt)  # Move target
+        self.update_projectiles(dt)  # Update projectiles
+        self.update_bombshells(dt)  # Update bombshells
+        self.update_lasers(dt)  # Update lasers
+        self.update_pieces(dt)  # Update pieces
+        self.update_explosions(dt)  # Update explosions
+        self.update_beams(dt)  # Update beams
+        self.update_obstacles(dt)  # Update obstacles
+        if self.target and self.target.life <= 0:  # Check if target is dead
+            self.level_up()  # Level up
+
+    def remember_positions(self):  # Define remember_positions method
+        self.previous_cannon_x = self.cannon_x  # Remember cannon position
+        self.projectiles.remember()  # Remember projectile positions
+        if self.target:  # Check if target exists
+            self.target.remember()  # Remember target position
+        for entities in (self.bombshells, self.lasers, self.pieces, self.obstacles):  # Iterate over moving entity lists
+            for body in entities:  # Iterate over bodies
+                body.remember()  # Remember body position
+
+    def cannon_lerp(self, alpha):  # Define cannon_lerp method
+        return self.previous_cannon_x + (self.cannon_x - self.previous_cannon_x) * alpha  # Return interpolated cannon x position
+
+    def update_target(self, dt):  # Define update_target method
+        if self.target:  # Check if target exists
+            self.target.move_target(dt, self)  # Move target
+
+    def update_projectiles(self, dt):  # Define update_projectiles method
+        projectiles = self.projectiles  # Get projectile store
+        if not projectiles.count:  # Check if there is nothing to update
+            return  # Return
+
+        projectiles.integrate(dt)  # Apply gravity and move every projectile
+        self.gravity.sync(self.gravitonios)  # Rebuild gravity field if gravitonios changed
+        projectiles.apply_field(self.gravity)  # Affect projectile trajectories
+        projectiles.bounce(self.elastonios)  # Bounce projectiles off elastonios
+        projectiles.transport(self.wormholes, self.time)  # Transport projectiles
+
+        dead = projectiles.live('y') <= 0  # Drop projectiles that fell out of bounds
+        if self.target:  # Check if target exists
+            hits = projectiles.collide_indices(self.target)  # Find projectiles touching the target
+            for _ in range(hits.size):  # Iterate over hits
+                self.target.hit()  # Hit target
+                self.update_score(10)  # Update score
+                self.emit('target_hit', 'projectile')  # Notify listeners
+            dead[hits] = True  # Remove projectiles that hit the target
+
+        used = np.zeros(projectiles.count, dtype=bool)  # Each projectile destroys at most one obstacle
+        for obstacle in list(self.obstacles):  # Iterate over obstacles
+            inside = projectiles.contains_indices(obstacle)  # Find projectiles inside the obstacle
+            inside = inside[~used[inside]]  # Skip projectiles that already destroyed an obstacle
+            if inside.size:  # Check collision with obstacle
+                dead[inside[0]] = used[inside[0]] = True  # Remove the projectile that got there first
+                self.destroy_obstacle(obstacle)  # Destroy obstacle
+
+        for hazard in self.perpetios + self.mirrors:  # Iterate over perpetios and mirrors
+            dead[projectiles.collide_indices(hazard)] = True  # Remove projectiles touching the hazard
+
+        x = projectiles.live('x')  # Get x positions
+        velocity_x = projectiles.live('velocity_x')  # Get x velocities
+        dead |= ((x > self.width) & (velocity_x > 0)) | ((x + projectiles.width < 0) & (velocity_x < 0))  # Drop projectiles that left the screen for good
+        projectiles.compact(~dead)  # Keep surviving projectiles
+
+    def update_bombshells(self, dt):  # Define update_bombshells method
+        new_bombshells = []  # Initialize new bombshells list
+        self.gravity.sync(self.gravitonios)  # Rebuild gravity field if gravitonios changed
+        pulls = self.gravity.sample_bodies(self.bombshells)  # Sample gravity field for every bombshell at once
+
+        for bombshell, pull_x, pull_y in zip(self.bombshells, *pulls):  # Iterate over bombshells
+            bombshell.velocity_x += float(pull_x)  # Affect bombshell trajectory
+            bombshell.velocity_y += float(pull_y)  # Affect bombshell trajectory
+            bombshell.trajectory(dt)  # Update trajectory
+
+            for elastonio in self.nearby(bombshell, Elastonio):  # Iterate over nearby elastonios
+                if elastonio.collide(bombshell):  # Check collision with elastonio
+                    bombshell.velocity_x = -bombshell.velocity_x  # Invert velocity_x
+                    bombshell.velocity_y = -bombshell.velocity_y  # Invert velocity_y
+                    break  # Break loop
+
+            for wormhole in self.wormholes:  # Iterate over wormholes
+                wormhole.transport(bombshell, self.time)  # Transport bombshell
+
+            alive = True  # Set alive to True
+            if self.target and self.target.collide(bombshell):  # Check collision with target
+                self.target.hit()  # Hit target
+                self.update_score(20)  # Update score
+                self.emit('target_hit', 'bombshell')  # Notify listeners
+                alive = False  # Remove bombshell
+            elif bombshell.y <= 0:  # Check if bombshell is out of bounds
+                self.explode(bombshell)  # Explode bombshell
+                alive = False  # Remove bombshell
+
+            for obstacle in self.nearby(bombshell, Obstacle):  # Iterate over nearby obstacles
+                if obstacle.contains_point(bombshell.x, bombshell.y):  # Check collision with obstacle
+                    self.destroy_obstacle(obstacle)  # Destroy obstacle
+                    break  # Break loop
+
+            if alive:  # Check if bombshell is still flying
+                for hazard in self.nearby(bombshell, (Perpetio, MirrorBulletproof)):  # Iterate over nearby perpetios and mirrors
+                    if hazard.collide(bombshell):  # Check collision with hazard
+                        self.explode(bombshell)  # Explode bombshell
+                        alive = False  # Remove bombshell
+                        break  # Break loop
+
+            if alive:  # Check if bombshell survived
+                new_bombshells.append(bombshell)  # Keep bombshell
+            else:  # If bombshell is gone
+                self.pools['bombshell'].release(bombshell)  # Recycle bombshell
+
+        self.bombshells = new_bombshells  # Update bombshells list
+
+    def explode(self, bombshell):  # Define explode method
+        bombshell.exploded = True  # Set exploded to True
+        bombshell.velocity_x = 0  # Set velocity_x to 0
+        bombshell.velocity_y = 0  # Set velocity_y to 0
+        self.explosions.append(self.pools['explosion'].acquire(bombshell.x - 50, bombshell.y - 50))  # Add explosion
+
+    def update_lasers(self, dt):  # Define update_lasers method
+        new_lasers = []  # Initialize new lasers list
+
+        for laser in self.lasers:  # Iterate over lasers
+            laser.trajectory()  # Update trajectory
+            if laser.x > self.width or laser.x < 0 or laser.y > self.height or laser.y < 0:  # Check if laser is out of bounds
+                self.pools['laser'].release(laser)  # Recycle laser
+                continue  # Drop laser
+
+            alive = True  # Set alive to True
+            for obstacle in self.nearby(laser, Obstacle):  # Iterate over nearby obstacles
+                if obstacle.contains_point(laser.x, laser.y):  # Check collision with obstacle
+                    alive = False  # Remove laser
+                    self.destroy_obstacle(obstacle)  # Destroy obstacle
+                    break  # Break loop
+
+            for elastonio in self.nearby(laser, Elastonio):  # Iterate over nearby elastonios
+                if elastonio.collide(laser):  # Check collision with elastonio
+                    alive = False  # Remove laser
+                    self.burn_elastonio(elastonio)  # Lasers burn elastonios away
+                    break  # Break loop
+
+            for wormhole in self.wormholes:  # Iterate over wormholes
+                wormhole.transport(laser, self.time)  # Transport laser
+
+            if self.target and self.target.collide(laser):  # Check collision with target
+                self.target.hit()  # Hit target
+                self.update_score(5)  # Update score
+                self.emit('target_hit', 'laser')  # Notify listeners
+                self.pools['laser'].release(laser)  # Recycle laser
+                continue  # Drop laser
+
+            for perpetio in self.nearby(laser, Perpetio):  # Iterate over nearby perpetios
+                if perpetio.collide(laser):  # Check collision with perpetio
+                    alive = False  # Remove laser
+                    break  # Break loop
+
+            for mirror in self.nearby(laser, MirrorBulletproof):  # Iterate over nearby mirrors
+                if mirror.collide(laser):  # Check collision with mirror
+                    mirror.reflect_laser(laser)  # Reflect laser
+
+            if alive:  # Check if laser survived
+                new_lasers.append(laser)  # Keep laser
+            else:  # If laser is gone
+                self.pools['laser'].release(laser)  # Recycle laser
+
+        self.lasers = new_lasers  # Update lasers list
+
+    def update_pieces(self, dt):  # Define update_pieces method
+        for piece in self.pieces:  # Iterate over pieces
+            piece.y -= PIECE_FALL_SPEED * dt  # Update position
+            piece.ttl -= dt  # Decrease lifetime
+        self.pools['piece'].release_all(piece for piece in self.pieces if piece.ttl <= 0)  # Recycle expired pieces
+        self.pieces = [piece for piece in self.pieces if piece.ttl > 0]  # Drop expired pieces
+
+    def update_explosions(self, dt):  # Define update_explosions method
+        for explosion in self.explosions:  # Iterate over explosions
+            explosion.ttl -= dt  # Decrease lifetime
+        self.pools['explosion'].release_all(explosion for explosion in self.explosions if explosion.ttl <= 0)  # Recycle expired explosions
+        self.explosions = [explosion for explosion in self.explosions if explosion.ttl > 0]  # Drop expired explosions
+
+    def update_beams(self, dt):  # Define update_beams method
+        for beam in self.beams:  # Iterate over beams
+            beam.ttl -= dt  # Decrease lifetime
+        self.beams = [beam for beam in self.beams if beam.ttl > 0]  # Drop faded beams
+
+    def update_obstacles(self, dt):  # Define update_obstacles method
+        for obstacle in self.obstacles:  # Iterate over obstacles
+            obstacle.oscillate(self.time)  # Update position
+            self.hazards.update(obstacle)  # Move obstacle between broadphase cells if needed
+
+    def nearby(self, body, kind):  # Define nearby method
+        return [hazard for hazard in self.hazards.near(body) if isinstance(hazard, kind)]  # Return broadphase candidates of one kind
+
+    def destroy_obstacle(self, obstacle):  # Define destroy_obstacle method
+        self.disintegrate_obstacle(obstacle)  # Disintegrate obstacle
+        self.obstacles.remove(obstacle)  # Remove obstacle from list
+        self.hazards.remove(obstacle)  # Remove obstacle from broadphase
+        self.mark_target_space(obstacle, -1)  # Free the space the obstacle blocked
+
+    def burn_elastonio(self, elastonio):  # Define burn_elastonio method
+        self.elastonios.remove(elastonio)  # Remove elastonio from list
+        self.hazards.remove(elastonio)  # Remove elastonio from broadphase
+        self.mark_target_space(elastonio, -1)  # Free the space the elastonio blocked
+
+    def disintegrate_obstacle(self, obstacle):  # Define disintegrate_obstacle method
+        num_pieces = 20  # Set number of pieces
+        for _ in range(num_pieces):  # Iterate over number of pieces
+            piece_x = self.rng.randint(int(obstacle.x), int(obstacle.right))  # Calculate piece x position
+            piece_y = self.rng.randint(int(obstacle.y), int(obstacle.top))  # Calculate piece y position
+            self.pieces.append(self.pools['piece'].acquire(piece_x, piece_y))  # Add piece to list
+
+    # LEVELS
+
+    def placement_bounds(self, y_low=0.2, y_high=0.8):  # Define placement_bounds method
+        x_min = int(self.width * 1 / 3)  # Set x min position
+        x_max = int(self.width * 0.9)  # Set x max position
+        y_min = int(self.height * y_low)  # Set y min position
+        y_max = int(self.height * y_high)  # Set y max position
+        if x_max <= x_min:  # Check if x max is less than or equal to x min
+            x_max = x_min + 1  # Set x max
+        if y_max <= y_min:  # Check if y max is less than or equal to y min
+            y_max = y_min + 1  # Set y max
+        return x_min, x_max, y_min, y_max  # Return bounds
+
+    def create_obstacles(self):  # Define create_obstacles method
+        try:  # Try to create obstacles
+            num_obstacles = self.pack.count(self.level, 'obstacles')  # Get number of obstacles
+            for i in range(num_obstacles):  # Iterate over number of obstacles
+                position = self.place((Obstacle.width, Obstacle.height))  # Find free position
+                if position is None:  # Check if level is full
+                    break  # Stop creating obstacles
+                obstacle = Obstacle(*position, self.layout_rng.randint(5, 20), self.layout_rng.uniform(1, 3))  # Create obstacle
+                self.obstacles.append(obstacle)  # Add obstacle to list
+                self.hazards.insert(obstacle)  # Add obstacle to broadphase
+        except Exception as e:  # Handle exception
+            logger.error(f'Error creating obstacles: {e}')  # Log error
+
+    def create_mirrors(self):  # Define create_mirrors method
+        num_mirrors = self.pack.count(self.level, 'mirrors')  # Get number of mirrors
+        for i in range(num_mirrors):  # Iterate over number of mirrors
+            position = self.place((MirrorBulletproof.width, MirrorBulletproof.height), 0.1, 0.9)  # Find free position
+            if position is None:  # Check if level is full
+                break  # Stop creating mirrors
+            mirror = MirrorBulletproof(*position, self.layout_rng.randint(0, 360))  # Create mirror
+            self.mirrors.append(mirror)  # Add mirror to list
+            self.hazards.insert(mirror)  # Add mirror to broadphase
+
+    def create_elastonios(self):  # Define create_elastonios method
+        try:  # Try to create elastonios
+            num_elastonios = self.pack.count(self.level, 'elastonios')  # Get number of elastonios
+            for i in range(num_elastonios):  # Iterate over number of elastonios
+                position = self.place((Elastonio.width, Elastonio.height))  # Find free position
+                if position is None:  # Check if level is full
+                    break  # Stop creating elastonios
+                elastonio = Elastonio(*position)  # Create elastonio
+                self.elastonios.append(elastonio)  # Add elastonio to list
+                self.hazards.insert(elastonio)  # Add elastonio to broadphase
+            logger.debug('Elastonios created successfully')  # Log success
+        except Exception as e:  # Handle exception
+            logger.error(f'Error creating elastonios: {e}')  # Log error
+
+    def create_gravitonios(self):  # Define create_gravitonios method
+        try:  # Try to create gravitonios
+            num_gravitonios = self.pack.count(self.level, 'gravitonios')  # Get number of gravitonios
+            for i in range(num_gravitonios):  # Iterate over number of gravitonios
+                position = self.place((Gravitonio.width, Gravitonio.height))  # Find free position
+                if position is None:  # Check if level is full
+                    break  # Stop creating gravitonios
+                self.gravitonios.append(Gravitonio(*position, self.layout_rng.choice(["attract", "repel"])))  # Add gravitonio to list
+            logger.debug('Gravitonios created successfully')  # Log success
+        except Exception as e:  # Handle exception
+            logger.error(f'Error creating gravitonios: {e}')  # Log error
+
+    def create_perpetios(self):  # Define create_perpetios method
+        try:  # Try to create perpetios
+            logger.debug('Creating perpetios')  # Log creation
+            num_perpetios = self.pack.count(self.level, 'perpetios')  # Get number of perpetios
+            for i in range(num_perpetios):  # Iterate over number of perpetios
+                position = self.place((Perpetio.width, Perpetio.height))  # Find free position
+                if position is None:  # Check if level is full
+                    break  # Stop creating perpetios
+                perpetio = Perpetio(*position)  # Create perpetio
+                self.perpetios.append(perpetio)  # Add perpetio to list
+                self.hazards.insert(perpetio)  # Add perpetio to broadphase
+                logger.debug(f'Created perpetio at position {position}')  # Log creation
+            logger.debug('Perpetios created successfully')  # Log success
+        except Exception as e:  # Handle exception
+            logger.error(f'Error creating perpetios: {e}')  # Log error
+
+    def create_wormholes(self):  # Define create_wormholes method
+        try:  # Try to create wormholes
+            logger.debug('Creating wormholes')  # Log creation
+            num_wormholes = self.pack.count(self.level, 'wormholes')  # Get number of wormholes
+            for i in range(num_wormholes):  # Iterate over number of wormholes
+                first = self.place((50, 50))  # Find free position for the first mouth
+                second = None  # Initialize second mouth position
+                for _ in range(10 if first else 0):  # Try a few free positions far enough from the first mouth
+                    second = self.place((50, 50), register=False)  # Find free position for the second mouth
+                    if second is None or math.hypot(second[0] - first[0], second[1] - first[1]) >= 300:  # Check if mouths are far apart
+                        break  # Stop searching
+                    second = None  # Reject position too close to the first mouth
+                if second is None:  # Check if no pair of mouths fits
+                    logger.warning('Could not create the desired number of wormholes')  # Log warning
+                    break  # Stop creating wormholes
+                self.placements.add(*second)  # Reserve second mouth position
+                self.wormholes.append(Wormhole(pos1=first, pos2=second))  # Add wormhole to list
+                logger.debug(f'Created wormhole from {first} to {second}')  # Log creation
+            logger.debug('Wormholes created successfully')  # Log success
+        except Exception as e:  # Handle exception
+            logger.error(f'Error creating wormholes: {e}')  # Log error
+
+    def place(self, size, y_low=0.2, y_high=0.8, radius=150, register=True):  # Define place method
+        limit = radius + max(size[0], size[1])  # Calculate minimum allowed distance from every placed hazard
+        position = place(self.layout_rng, self.placement_bounds(y_low, y_high), limit, self.placements)  # Find free position
+        if position is None:  # Check if the placement area is full
+            logger.warning(f'No room left for a {size[0]}x{size[1]} hazard')  # Log warning
+        elif register:  # Check if position should be reserved
+            self.placements.add(*position)  # Reserve position
+        return position  # Return position or None
+
+    def build_target_space(self, counts=None):  # Define build_target_space method
+        self.target_space = OccupancyGrid(self.width * 2 / 3, self.width - Target.width, 0, self.height - Target.height)  # Cover the target's lower-left corner range
+        if counts is not None and counts.shape == self.target_space.counts.shape:  # Check if a compiled grid fits
+            self.target_space.counts = np.array(counts)  # Copy compiled grid, obstacles may still free cells
+            return  # Return
+        for hazard in self.obstacles + self.mirrors + self.elastonios + self.gravitonios + self.perpetios + self.wormholes:  # Iterate over hazards
+            self.mark_target_space(hazard, 1)  # Block space around hazard
+
+    def mark_target_space(self, hazard, delta):  # Define mark_target_space method
+        if self.target_space is None:  # Check if there is no free-space grid
+            return  # Return
+        limit = TARGET_CLEARANCE + max(Target.width, Target.height)  # Calculate minimum allowed distance
+        if isinstance(hazard, Wormhole):  # Check if hazard is a wormhole
+            points = [hazard.pos1, hazard.pos2]  # Block both mouths
+        elif isinstance(hazard, Obstacle):  # Check if hazard is an oscillating obstacle
+            points = [hazard.initial_pos]  # Block the centre of its oscillation
+            limit += math.hypot(hazard.oscillation_amplitude, hazard.oscillation_amplitude)  # Widen by its furthest swing
+        else:  # If hazard never moves
+            points = [hazard.pos]  # Block its position
+        for x, y in points:  # Iterate over blocked points
+            self.target_space.mark(x, y, limit, delta)  # Update grid
+
+    def target_blocked(self, pos):  # Define target_blocked method
+        return self.target_space is not None and self.target_space.blocked(*pos)  # Check free-space grid in constant time
+
+    def level_rng(self, attempt=0):  # Define level_rng method
+        seed = self.pack.level(self.level).get('seed')  # Get level seed
+        if seed is None:  # Check if level is random on every play
+            return self.rng  # Lay out from the world random generator
+        return random.Random(f'{seed}:{self.width}x{self.height}' + (f':{attempt}' if attempt else ''))  # Lay out seeded levels the same way on every play
+
+    def create_level(self, baked=True):  # Define create_level method
+        self.layouts += 1  # Count layout
+        self.layout_attempt = 0  # Start from the level's own layout
+        self.layout_rng = self.level_rng()  # Get layout random generator
+        layout = self.pack.layout(self.level, self.width, self.height) if baked else None  # Get compiled layout
+        if layout is not None:  # Check if level was compiled for this window size
+            logger.debug(f'Loading compiled level {self.level}')  # Log loading
+            self.load_layout(layout)  # Load level
+        else:  # If level must be generated
+            self.generate_level()  # Generate level
+            if self.layout_plan is not None:  # Check if a replay decides the re-roll
+                for attempt in range(1, self.layout_plan.get(self.layouts, 0) + 1):  # Iterate over re-rolls, unseeded levels draw each from the world generator in turn
+                    self.reroll_layout(attempt)  # Generate level again
+            elif self.verifier is not None:  # Check if generated layouts are verified
+                self.verifier.choose(self, LAYOUT_REROLLS)  # Re-roll until a layout is solvable
+            if self.layout_attempt:  # Check if a re-roll was kept
+                self.emit('layout_rerolled', (self.layouts, self.layout_attempt))  # Notify the recorder, replays cannot ask the verifier
+        logger.debug('Adding target')  # Log addition
+        self.target = Target(image_source=f"target_{self.level}.png", world=self)  # Create target
+        self.target.life = self.pack.tuning(self.level, 'target_life', self.target.life)  # Set target life
+        self.target.speed = self.pack.tuning(self.level, 'target_speed', self.target.speed)  # Set target speed
+
+    def reroll_layout(self, attempt):  # Define reroll_layout method
+        logger.debug(f'Re-rolling layout of level {self.level}, attempt {attempt}')  # Log re-roll
+        self.clear_level()  # Drop current layout
+        self.layout_rng = self.level_rng(attempt)  # Get re-roll random generator
+        self.layout_attempt = attempt  # Remember re-roll
+        self.generate_level()  # Generate level again
+
+    def generate_level(self):  # Define generate_level method
+        logger.debug('Creating obstacles')  # Log creation
+        self.create_obstacles()  # Create obstacles
+        logger.debug('Creating mirrors')  # Log creation
+        self.create_mirrors()  # Create mirrors
+        logger.debug('Creating elastonios')  # Log creation
+        self.create_elastonios()  # Create elastonios
+        logger.debug('Creating gravitonios')  # Log creation
+        self.create_gravitonios()  # Create gravitonios
+        logger.debug('Creating perpetios')  # Log creation
+        self.create_perpetios()  # Create perpetios
+        logger.debug('Creating wormholes')  # Log creation
+        self.create_wormholes()  # Create wormholes
+        self.build_target_space()  # Precompute free space for the target
+
+    def load_layout(self, layout):  # Define load_layout method
+        for code, x, y, a, b in layout['hazards'].tolist():  # Iterate over hazard records
+            kind = HAZARD_KINDS[int(code)]  # Get hazard kind
+            if kind == 'obstacle':  # Check if hazard is an obstacle
+                hazard = Obstacle(x, y, a, b)  # Create obstacle
+                self.obstacles.append(hazard)  # Add obstacle to list
+            elif kind == 'mirror':  # Check if hazard is a mirror
+                hazard = MirrorBulletproof(x, y, a)  # Create mirror
+                self.mirrors.append(hazard)  # Add mirror to list
+            elif kind == 'elastonio':  # Check if hazard is an elastonio
+                hazard = Elastonio(x, y)  # Create elastonio
+                self.elastonios.append(hazard)  # Add elastonio to list
+            elif kind == 'gravitonio':  # Check if hazard is a gravitonio
+                self.gravitonios.append(Gravitonio(x, y, "repel" if a else "attract"))  # Add gravitonio to list
+                continue  # Gravitonios are not in the broadphase
+            elif kind == 'perpetio':  # Check if hazard is a perpetio
+                hazard = Perpetio(x, y)  # Create perpetio
+                self.perpetios.append(hazard)  # Add perpetio to list
+            else:  # If hazard is a wormhole
+                self.wormholes.append(Wormhole(pos1=(x, y), pos2=(a, b)))  # Add wormhole to list
+                continue  # Wormholes are not in the broadphase
+            self.hazards.insert(hazard)  # Add hazard to broadphase
+        if 'gravity_x' in layout:  # Check if level has a compiled gravity field
+            self.gravity.load(layout['gravity_x'], layout['gravity_y'], tuple(layout['gravity_origin'].tolist()), self.gravitonios)  # Use compiled field
+        self.build_target_space(layout['target_space'])  # Use compiled free space
+
+    def clear_level(self):  # Define clear_level method
+        logger.debug('Clearing level')  # Log clearing
+        for name, entities in (('bombshell', self.bombshells), ('laser', self.lasers), ('piece', self.pieces), ('explosion', self.explosions)):  # Iterate over pooled entity lists
+            self.pools[name].release_all(entities)  # Recycle entities still alive
+            logger.debug(f'Pool stats: {self.pools[name].stats()}')  # Log pool statistics
+        for entities in (self.obstacles, self.mirrors, self.elastonios, self.gravitonios, self.perpetios, self.wormholes,
+                         self.projectiles, self.lasers, self.bombshells, self.pieces, self.explosions, self.beams):  # Iterate over entity lists
+            entities.clear()  # Clear entity list
+        self.hazards.clear()  # Clear broadphase
+        self.placements.clear()  # Clear placement index
+        self.target = None  # Set target to None
+        self.target_space = None  # Drop free-space grid
+        logger.debug('Level cleared')  # Log level cleared
+
+    def start_next_level(self):  # Define start_next_level method
+        if self.level > self.max_level:  # Check if level is greater than max level
+            return  # Return
+        logger.debug(f'Starting level {self.level}')  # Log level start
+        self.clear_level()  # Clear level
+        self.create_level()  # Create level
+        self.remaining_shots = self.pack.tuning(self.level, 'shots', SHOTS_PER_LEVEL)  # Set remaining shots
+        self.emit('shots_changed', self.remaining_shots)  # Notify the view
+        self.finished = False  # Set finished to False
+        self.emit('level_started', self.level)  # Notify the view
+        logger.debug(f'Level {self.level} started successfully')  # Log success
+
+    def level_up(self):  # Define level_up method
+        logger.debug('World: Level up triggered')  # Log level up
+        if self.level < self.max_level:  # Check if level is less than max level
+            self.level += 1  # Increment level
+            self.start_next_level()  # Start next level
+        else:  # If level is equal to max level
+            self.finished = True  # Stop the simulation
+            self.emit('victory', self.calculate_score())  # Notify the view
+
+    def reset(self):  # Define reset method
+        self.level = 1  # Reset level
+        self.score = 0  # Reset score
+        self.emit('score_changed', self.score)  # Notify the view
+        self.remaining_shots = self.pack.tuning(self.level, 'shots', SHOTS_PER_LEVEL)  # Reset remaining shots
+        self.start_next_level()  # Start next level
+
+    def calculate_score(self):  # Define calculate_score method
+        base_score = self.level * 100  # Calculate base score
+        bonus = self.remaining_shots * 10  # Calculate bonus
+        return base_score + bonus  # Return total score